@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+# Columns the tracking writer decides on before it writes; everything else stays in SQLite
+INDEX_COLUMNS = ("isoBarcode", "leadBarcode", "orderNumber", "containerID", "prodType", "itemNum")
+
+# Rows fetched per round trip while building the index
+LOAD_BATCH_ROWS = 5000
+
+
+class StaleIndex(Exception):
+    """A job's indexed row is gone: it was deleted behind the writer's back (e.g. serverJanitor.py run while the server is up)."""
+
+
+class BarcodeIndex:
+    """
+    In-memory iso / lead / order -> rowid index for the tracking worker, so a scan job finds
+    its row without a SELECT and only goes to SQLite for the UPDATE or INSERT itself.
+    load() builds it once at startup (after any offline serverJanitor purge); apply() then
+    keeps it exact with the writes collect_tracking_writes reports for every job, retention
+    deletes included. A job whose UPDATE finds its row gone raises StaleIndex; the worker
+    redoes it on SqlRowLookup and reloads the index. Only the tracking worker thread uses
+    it, so it takes no lock.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._by_iso = {}
+        self._by_lead = defaultdict(set)
+        self._by_order = defaultdict(set)
+        self.loads = 0
+
+    def __len__(self):
+        return len(self._rows)
+
+    def load(self, cursor):
+        """(Re)build from tracking_data. Returns the number of rows indexed."""
+        self._rows.clear()
+        self._by_iso.clear()
+        self._by_lead.clear()
+        self._by_order.clear()
+        cursor.execute(f"SELECT rowid, {', '.join(INDEX_COLUMNS)} FROM tracking_data")
+        while True:
+            rows = cursor.fetchmany(LOAD_BATCH_ROWS)
+            if not rows:
+                break
+            for r in rows:
+                self._add(r[0], dict(zip(INDEX_COLUMNS, r[1:])))
+        self.loads += 1
+        return len(self._rows)
+
+    def _add(self, rowid, row):
+        entry = {column: row.get(column) for column in INDEX_COLUMNS}
+        self._rows[rowid] = entry
+        if entry["isoBarcode"] is not None:
+            self._by_iso[entry["isoBarcode"]] = rowid
+        if entry["leadBarcode"] is not None:
+            self._by_lead[entry["leadBarcode"]].add(rowid)
+        if entry["orderNumber"] is not None:
+            self._by_order[entry["orderNumber"]].add(rowid)
+
+    def _remove(self, rowid):
+        entry = self._rows.pop(rowid, None)
+        if entry is None:
+            return
+        if self._by_iso.get(entry["isoBarcode"]) == rowid:
+            del self._by_iso[entry["isoBarcode"]]
+        for index, key in ((self._by_lead, entry["leadBarcode"]), (self._by_order, entry["orderNumber"])):
+            rowids = index.get(key)
+            if rowids is not None:
+                rowids.discard(rowid)
+                if not rowids:
+                    del index[key]
+
+    def apply(self, writes):
+        """Mirror one job's writes (as returned by collect_tracking_writes)."""
+        for write in writes:
+            self._remove(write["rowid"])
+            if write["op"] != "delete":
+                self._add(write["rowid"], write["row"])
+
+    def get(self, rowid):
+        return self._rows.get(rowid)
+
+    def iso_rowid(self, iso_barcode):
+        return self._by_iso.get(iso_barcode)
+
+    def lead_rows(self, lead_barcode):
+        """[(rowid, row)] for a lead barcode, oldest row first."""
+        return [(rowid, self._rows[rowid]) for rowid in sorted(self._by_lead.get(lead_barcode, ()))]
+
+    def order_rows(self, order_number):
+        """[(rowid, row)] for an order number, oldest row first."""
+        return [(rowid, self._rows[rowid]) for rowid in sorted(self._by_order.get(order_number, ()))]
+
+
+class SqlRowLookup:
+    """BarcodeIndex's lookups answered by SQLite on the writer's cursor: slower, but never stale."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def _rows(self, where, params):
+        self.cursor.execute(f"SELECT rowid, {', '.join(INDEX_COLUMNS)} FROM tracking_data WHERE {where} ORDER BY rowid", params)
+        return [(r[0], dict(zip(INDEX_COLUMNS, r[1:]))) for r in self.cursor.fetchall()]
+
+    def get(self, rowid):
+        rows = self._rows("rowid = ?", (rowid,)) if rowid is not None else []
+        return rows[0][1] if rows else None
+
+    def iso_rowid(self, iso_barcode):
+        rows = self._rows("isoBarcode = ?", (iso_barcode,))
+        return rows[0][0] if rows else None
+
+    def lead_rows(self, lead_barcode):
+        return self._rows("leadBarcode = ?", (lead_barcode,))
+
+    def order_rows(self, order_number):
+        return self._rows("orderNumber = ?", (order_number,))
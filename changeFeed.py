@@ -0,0 +1,90 @@
+import time
+from collections import deque
+from threading import Condition
+
+# Number of changes kept in memory before the oldest are dropped
+DEFAULT_MAX_ENTRIES = 5000
+
+
+class ChangeFeed:
+    """
+    In-memory, monotonically sequenced log of row changes.
+
+    Writers call record() after they commit. Readers ask for everything after
+    the last sequence number they have seen, optionally blocking (long-poll)
+    until something new arrives. The log is bounded, so a reader that falls
+    behind the oldest retained entry - or that still holds a sequence number
+    from before a server restart (different epoch) - is told to resync.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.epoch = str(int(time.time() * 1000))
+        self._entries = deque(maxlen=max_entries)
+        self._cond = Condition()
+        self._seq = 0
+
+    @property
+    def seq(self):
+        with self._cond:
+            return self._seq
+
+    def record(self, table, op, key, row=None, previous=None):
+        """Append one change (op is 'insert', 'update' or 'delete') and wake any waiting readers."""
+        with self._cond:
+            self._seq += 1
+            self._entries.append({
+                "seq": self._seq,
+                "table": table,
+                "op": op,
+                "key": key,
+                "row": row,
+                "previous": previous,
+                "ts": time.time()
+            })
+            self._cond.notify_all()
+            return self._seq
+
+    def _collect(self, since, limit, match):
+        latest = self._seq
+        oldest = self._entries[0]["seq"] if self._entries else latest + 1
+
+        if since > latest or since < oldest - 1:
+            return [], latest, True
+
+        changes = []
+        next_seq = latest
+        for entry in self._entries:
+            if entry["seq"] <= since:
+                continue
+            if match is not None and not match(entry):
+                continue
+            changes.append(entry)
+            if limit and len(changes) >= limit:
+                next_seq = entry["seq"]
+                break
+        return changes, next_seq, False
+
+    def since(self, since, limit=None, match=None, epoch=None):
+        """
+        Return (changes, next_seq, resync) for every entry after `since`.
+        `next_seq` is the cursor the caller should send next time.
+        """
+        with self._cond:
+            if epoch is not None and epoch != self.epoch:
+                return [], self._seq, True
+            return self._collect(since, limit, match)
+
+    def wait(self, since, timeout, limit=None, match=None, epoch=None):
+        """Like since(), but blocks up to `timeout` seconds while there is nothing to return."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            if epoch is not None and epoch != self.epoch:
+                return [], self._seq, True
+            while True:
+                changes, next_seq, resync = self._collect(since, limit, match)
+                remaining = deadline - time.monotonic()
+                if changes or resync or remaining <= 0:
+                    return changes, next_seq, resync
+                # Skip past entries the caller is not interested in
+                since = next_seq
+                self._cond.wait(remaining)
@@ -126,7 +126,8 @@ def fetch_tracking_history(orderNumber=None, leadBarcode=None, isoBarcode=None,
                 print(f"[DEBUG] Server returned error: {data.get('message', 'Unknown error')}")
             return {"status": "error", "message": data.get("message", "Unknown server error")}
 
-        return {"status": "success", "history": data.get("history", [])}
+        return {"status": "success", "history": data.get("history", []),
+                "rows": data.get("rows", []), "matches": data.get("matches", {})}
 
     except requests.RequestException as e:
         if debug:
@@ -156,6 +157,71 @@ def fetch_employees_tasks(server_ip=target_ip, port=8080):
         print(f"Error fetching employees tasks: {e}")
         return []
 
+def fetch_employees_tasks_snapshot(names=None, page_size=100, server_ip=target_ip, port=8080):
+    """
+    Fetch the tasks assigned to any of `names` (employee and/or workstation names,
+    all tasks if None) together with the row ids and change cursor needed to follow
+    them with fetch_employees_tasks_changes(). Pages through the results server-side.
+    Returns (tasks, rowids, seq, epoch) or None on failure.
+    """
+    url = f"http://{server_ip}:{port}/api/employeesTasks"
+    params = {"limit": page_size}
+    if names:
+        params["employeeName"] = list(names)
+
+    tasks, rowids = [], []
+    seq, epoch = 0, None
+    try:
+        while True:
+            response = requests.get(url, params=params, timeout=10)
+            response.raise_for_status()
+            data = response.json()
+
+            if data.get("status") != "success":
+                print(f"Server error: {data.get('message')}")
+                return None
+
+            # Keep the cursor of the first page so changes made while paging are replayed
+            if epoch is None:
+                seq, epoch = data.get("seq", 0), data.get("epoch")
+
+            tasks.extend(data.get("tasks", []))
+            rowids.extend(data.get("rowids", []))
+
+            if data.get("nextAfter") is None:
+                return tasks, rowids, seq, epoch
+            params["after"] = data["nextAfter"]
+
+    except requests.RequestException as e:
+        print(f"Error fetching employees tasks: {e}")
+        return None
+
+def fetch_employees_tasks_changes(since, epoch, names, wait=25, server_ip=target_ip, port=8080):
+    """
+    Long-poll the server for task changes after `since` that concern any of `names`
+    (employee and/or workstation names). Blocks for up to `wait` seconds.
+    Returns the response dict ({"changes", "seq", "epoch", "resync"}) or None on failure.
+    """
+    url = f"http://{server_ip}:{port}/api/employeesTasksChanges"
+    params = {"since": since, "timeout": wait, "employeeName": list(names)}
+    if epoch:
+        params["epoch"] = epoch
+
+    try:
+        response = requests.get(url, params=params, timeout=wait + 10)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") != "success":
+            print(f"Server error: {data.get('message')}")
+            return None
+
+        return data
+
+    except requests.RequestException as e:
+        print(f"Error fetching employees task changes: {e}")
+        return None
+
 
 def update_employee_task(employeeName, liveTask=None, status=None, isobarcode=None, erase=False, 
                         server_ip=target_ip, port=8080):
@@ -449,7 +515,7 @@ def get_facility_workstations(server_ip=target_ip, port=8080):
 
 
 def send_tracking_data(containerID, orderNumber, leadBarcode, isoBarcode, workstation, employeeName,
-                       server_ip=target_ip, port=8080):
+                       server_ip=target_ip, port=8080, idempotency_key=None):
 
     base_url = f"http://{server_ip}:{port}"
     params = {
@@ -462,7 +528,9 @@ def send_tracking_data(containerID, orderNumber, leadBarcode, isoBarcode, workst
     }
 
     try:
-        resp = requests.get(f"{base_url}/api/orderTrack", params=params)
+        # Reuse the same key when retrying a scan so the server applies it once
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        resp = requests.get(f"{base_url}/api/orderTrack", params=params, headers=headers)
         resp.raise_for_status()
         return resp.json()
 
@@ -470,7 +538,7 @@ def send_tracking_data(containerID, orderNumber, leadBarcode, isoBarcode, workst
         return {"status": "error", "message": str(e)}
 
 def move_container(leadBarcode=None, isoBarcode=None, workstation="", employeeName="",
-                   server_ip=target_ip, port=8080):
+                   server_ip=target_ip, port=8080, idempotency_key=None):
 
     base_url = f"http://{server_ip}:{port}"
     params = {
@@ -481,7 +549,8 @@ def move_container(leadBarcode=None, isoBarcode=None, workstation="", employeeNa
     }
 
     try:
-        resp = requests.get(f"{base_url}/api/moveContainer", params=params)
+        headers = {"Idempotency-Key": idempotency_key} if idempotency_key else None
+        resp = requests.get(f"{base_url}/api/moveContainer", params=params, headers=headers)
         resp.raise_for_status()
         return resp.json()
 
@@ -547,3 +616,32 @@ def fetch_facility_workstations(server_ip=target_ip, port=8080):
         print(f"Request failed: {e}")
         return [], [], []
 
+
+def fetch_changes(since=0, epoch=None, limit=500, tables=None, wait=0, server_ip=target_ip, port=8080):
+    """
+    Fetch the server-wide change log after `since`. Callers keep the returned "seq" and
+    "epoch" and pass them back next time; when "resync" is True they must reload their
+    full snapshot first (the server restarted or they fell behind the retained log).
+    Returns the response dict or None on failure.
+    """
+    url = f"http://{server_ip}:{port}/api/changes"
+    params = {"since": since, "limit": limit, "timeout": wait}
+    if epoch:
+        params["epoch"] = epoch
+    if tables:
+        params["tables"] = ",".join(tables)
+
+    try:
+        response = requests.get(url, params=params, timeout=wait + 10)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") != "success":
+            print(f"Server error: {data.get('message')}")
+            return None
+
+        return data
+
+    except requests.RequestException as e:
+        print(f"Error fetching changes: {e}")
+        return None
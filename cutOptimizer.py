@@ -0,0 +1,145 @@
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+# Lengths are in inches, matching the 16x20" dimensions on the cut list
+DEFAULT_STOCK_LENGTHS = (96.0,)
+DEFAULT_KERF = 0.125
+
+DEPTH_RE = re.compile(r"^(\d+)mm$")
+DIMENSIONS_RE = re.compile(r'^(\d+(?:\.\d+)?)[xX](\d+(?:\.\d+)?)"?$')
+DATE_RE = re.compile(r"^\d{2}-\d{2}-\d{2}$")
+
+
+def parse_size(size):
+    """
+    Split a cut-list size such as '38mm/16x20"' or '38mm/16x20"/Black Float'
+    (optionally still carrying its 'DD-MM-YY/' prefix) into
+    (depth, width, height, frame) where frame is e.g. 'Black Float' or None.
+    Returns None for sizes without a depth and dimensions.
+    """
+    if not size:
+        return None
+    depth, dimensions, frame = None, None, None
+    for part in (p.strip() for p in size.split("/")):
+        if not part or DATE_RE.match(part):
+            continue
+        if depth is None and DEPTH_RE.match(part):
+            depth = part
+        elif dimensions is None and DIMENSIONS_RE.match(part):
+            m = DIMENSIONS_RE.match(part)
+            dimensions = (float(m.group(1)), float(m.group(2)))
+        elif depth and dimensions:
+            frame = part
+    if not depth or not dimensions:
+        return None
+    return depth, dimensions[0], dimensions[1], frame
+
+
+def bar_group(depth, frame):
+    """(profile, colour) the bars of an item are cut from, e.g. ('38mm Float', 'Black') or ('38mm Stretcher', None)."""
+    if not frame:
+        return f"{depth} Stretcher", None
+    words = frame.split()
+    if len(words) > 1:
+        return f"{depth} {words[-1]}", " ".join(words[:-1])
+    return f"{depth} {frame}", None
+
+
+def expand_bars(items, allowance=0.0):
+    """
+    Expand [prodType, size, count] cut-list rows into the bar lengths each item needs:
+    two of its width and two of its height (plus `allowance`, e.g. for mitres), grouped
+    by (profile, colour). Returns (groups, skipped) where skipped counts unparseable items.
+    """
+    groups = defaultdict(list)
+    skipped = 0
+    for _prod_type, size, count in items:
+        parsed = parse_size(size)
+        if not parsed:
+            skipped += count
+            continue
+        depth, width, height, frame = parsed
+        lengths = groups[bar_group(depth, frame)]
+        lengths.extend([width + allowance, width + allowance, height + allowance, height + allowance] * count)
+    return groups, skipped
+
+
+def pack_bars(lengths, stock_lengths=DEFAULT_STOCK_LENGTHS, kerf=DEFAULT_KERF):
+    """
+    Best-fit-decreasing 1-D cutting stock. Every cut consumes its length plus one kerf.
+    Bars are opened at the longest stock length, then each is shrunk to the shortest
+    stock length that still holds its cuts. Each of the n pieces costs one bisect over the
+    open bars (O(log b)) plus a list pop / insort, which moves O(b) entries: O(n log n) to
+    sort and O(n * b) in the worst case overall, with the moves being memmoves of a short list.
+    Returns (bars, oversize) where each bar is {"stock", "cuts", "used", "waste"} and
+    oversize lists pieces longer than any stock length.
+    """
+    stock_lengths = sorted(stock_lengths)
+    longest = stock_lengths[-1]
+
+    bars = []
+    # (remaining capacity, bar index) kept sorted for best-fit lookups
+    open_bars = []
+    oversize = []
+
+    for length in sorted(lengths, reverse=True):
+        need = length + kerf
+        if need > longest:
+            oversize.append(length)
+            continue
+        pos = bisect_left(open_bars, (need, -1))
+        if pos < len(open_bars):
+            remaining, index = open_bars.pop(pos)
+        else:
+            bars.append([])
+            remaining, index = longest, len(bars) - 1
+        bars[index].append(length)
+        remaining -= need
+        if remaining > 0:
+            insort(open_bars, (remaining, index))
+
+    plans = []
+    for cuts in bars:
+        used = sum(cuts) + kerf * len(cuts)
+        stock = next((s for s in stock_lengths if s >= used - 1e-9), longest)
+        plans.append({"stock": stock, "cuts": cuts, "used": round(used, 3), "waste": round(stock - used, 3)})
+    return plans, oversize
+
+
+def optimise_cut_list(items, stock_lengths=DEFAULT_STOCK_LENGTHS, kerf=DEFAULT_KERF, allowance=0.0):
+    """Build cut plans for every (profile, colour) in a cut list and total their waste."""
+    groups, skipped = expand_bars(items, allowance)
+
+    results = []
+    for (profile, colour), lengths in sorted(groups.items(), key=lambda g: (g[0][0], g[0][1] or "")):
+        plans, oversize = pack_bars(lengths, stock_lengths, kerf)
+
+        # Bars with an identical cut pattern are reported once with a quantity
+        patterns = defaultdict(int)
+        for plan in plans:
+            patterns[(plan["stock"], tuple(plan["cuts"]), plan["used"], plan["waste"])] += 1
+
+        results.append({
+            "profile": profile,
+            "colour": colour,
+            "pieces": len(lengths),
+            "bars": len(plans),
+            "stockUsed": round(sum(p["stock"] for p in plans), 3),
+            "waste": round(sum(p["waste"] for p in plans), 3),
+            "oversize": oversize,
+            "plans": [
+                {"stock": stock, "quantity": quantity, "cuts": list(cuts), "used": used, "waste": waste}
+                for (stock, cuts, used, waste), quantity in sorted(patterns.items(), key=lambda p: -p[1])
+            ]
+        })
+
+    return {
+        "stockLengths": sorted(stock_lengths),
+        "kerf": kerf,
+        "allowance": allowance,
+        "groups": results,
+        "totalBars": sum(g["bars"] for g in results),
+        "totalWaste": round(sum(g["waste"] for g in results), 3),
+        "skipped": skipped
+    }
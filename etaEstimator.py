@@ -0,0 +1,166 @@
+import math
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from threading import Lock
+
+from orderStatus import is_packing
+from scanAnalytics import parse_scans
+from trackingArchive import all_archived_rows
+
+# Archived days of history the model also learns from (the hot table only holds a few days)
+ETA_TRAINING_DAYS = 30
+
+# Quantiles kept per (prodType, stage)
+QUANTILES = (10, 50, 90)
+
+# Samples needed before a (prodType, stage) row is trusted over the stage-wide fallback
+MIN_SAMPLES = 5
+
+ANY = "*"
+
+
+def quantile(sorted_values, p):
+    n = len(sorted_values)
+    return sorted_values[min(n - 1, max(0, math.ceil(p / 100 * n) - 1))]
+
+
+def remaining_samples(prod_type, scans):
+    """
+    (prodType, stage, seconds until packed) for each scan of an item that reached packing.
+    Scans at or after the first packing scan count as 0. Items never packed yield nothing.
+    """
+    packed_at = next((epoch for epoch, _hour, workstation in scans if is_packing(workstation)), None)
+    if packed_at is None:
+        return []
+    return [(prod_type or "", workstation, max(0.0, packed_at - epoch)) for epoch, _hour, workstation in scans]
+
+
+def init_eta_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS eta_quantiles (
+            prodType TEXT NOT NULL,
+            stage TEXT NOT NULL,
+            samples INTEGER NOT NULL,
+            p10 INTEGER NOT NULL,
+            p50 INTEGER NOT NULL,
+            p90 INTEGER NOT NULL,
+            PRIMARY KEY (prodType, stage)
+        ) WITHOUT ROWID
+    """)
+
+
+class EtaModel:
+    """
+    Time-to-packed quantiles per (prodType, stage), plus per-stage rows across all product
+    types (prodType '*') as a fallback. refresh() relearns them from history, persist() saves
+    them to eta_quantiles for the next start; estimate() is dictionary lookups only.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._table = {}
+        self.refreshed = None
+
+    def load(self, cursor):
+        cursor.execute("SELECT prodType, stage, samples, p10, p50, p90 FROM eta_quantiles")
+        table = {(r[0], r[1]): r[2:] for r in cursor.fetchall()}
+        with self._lock:
+            self._table = table
+        return len(table)
+
+    def refresh(self, layout, archive_since=None):
+        """
+        Relearn from the tracking_data of every partition of `layout` (a PartitionLayout) and
+        recent archive partitions (read only). Returns the table size.
+        """
+        if archive_since is None:
+            archive_since = (datetime.now() - timedelta(days=ETA_TRAINING_DAYS)).strftime("%Y-%m-%d")
+        samples = defaultdict(list)
+
+        def learn(prod_type, history):
+            for pt, stage, seconds in remaining_samples(prod_type, parse_scans(history)):
+                samples[(pt, stage)].append(seconds)
+                samples[(ANY, stage)].append(seconds)
+
+        def read(cursor, _partition):
+            cursor.execute("SELECT prodType, history FROM tracking_data")
+            return cursor.fetchall()
+
+        for rows in layout.read_all(read):
+            for prod_type, history in rows:
+                learn(prod_type, history)
+        for row in all_archived_rows(since=archive_since):
+            learn(row.get("prodType"), row.get("history"))
+
+        table = {}
+        for key, values in samples.items():
+            values.sort()
+            table[key] = (len(values),) + tuple(int(quantile(values, p)) for p in QUANTILES)
+
+        with self._lock:
+            self._table = table
+            self.refreshed = time.time()
+        return len(table)
+
+    def persist(self, cursor):
+        """Replace eta_quantiles with the current table so a restart starts from it. The caller commits."""
+        with self._lock:
+            rows = [key + value for key, value in self._table.items()]
+        cursor.execute("DELETE FROM eta_quantiles")
+        cursor.executemany("INSERT INTO eta_quantiles (prodType, stage, samples, p10, p50, p90) VALUES (?, ?, ?, ?, ?, ?)", rows)
+
+    def quantiles_for(self, prod_type, stage):
+        """(samples, p10, p50, p90) for a prodType at a stage, falling back to the stage across all types."""
+        with self._lock:
+            row = self._table.get((prod_type or "", stage))
+            if row and row[0] >= MIN_SAMPLES:
+                return row
+            return self._table.get((ANY, stage))
+
+    def estimate(self, items, now=None):
+        """
+        ETA for an order from its items' current locations (dicts with prodType, workstation
+        and timestamp as in current_location). The order is ready when its slowest item is,
+        so the band is the latest p10 / p50 / p90 across items.
+        """
+        now = now if now is not None else time.time()
+        low = mid = high = now
+        remaining, unknown, min_samples = 0, 0, None
+        for item in items:
+            if is_packing(item.get("workstation")):
+                continue
+            remaining += 1
+            q = self.quantiles_for(item.get("prodType"), item.get("workstation"))
+            try:
+                scanned = datetime.fromisoformat(item.get("timestamp") or "").timestamp()
+            except ValueError:
+                scanned = None
+            if q is None or scanned is None:
+                unknown += 1
+                continue
+            samples, p10, p50, p90 = q
+            min_samples = samples if min_samples is None else min(min_samples, samples)
+            low, mid, high = max(low, scanned + p10), max(mid, scanned + p50), max(high, scanned + p90)
+
+        known = bool(items) and not unknown
+        if not known:
+            confidence = "none"
+        elif not remaining:
+            confidence = "complete"
+        else:
+            confidence = "high" if min_samples >= 50 else "medium" if min_samples >= MIN_SAMPLES else "low"
+
+        def iso(epoch):
+            return datetime.fromtimestamp(epoch).replace(microsecond=0).isoformat()
+
+        return {
+            "items": len(items),
+            "itemsRemaining": remaining,
+            "itemsUnknown": unknown,
+            "eta": iso(mid) if known else None,
+            "etaLow": iso(low) if known else None,
+            "etaHigh": iso(high) if known else None,
+            "etaSeconds": int(mid - now) if known else None,
+            "confidence": confidence
+        }
@@ -0,0 +1,63 @@
+def strip_timestamp(line):
+    parts = line.split(" | ", 1)
+    return parts[1] if len(parts) > 1 else line
+
+
+def append_history_line(existing_history, new_line, float_canv=False):
+    """
+    Append a 'timestamp | workstation | employee' line unless it repeats the last line apart
+    from its timestamp. With float_canv, a FloatCanv scan not straight after CanvMach is
+    recorded as 'FloatCanv & FloatStretch' (the orderTrack rule).
+    """
+    if not existing_history or existing_history.strip() == "":
+        # Apply FloatCanv rule even on first entry
+        if float_canv and "FloatCanv" in new_line:
+            new_line = new_line.replace("FloatCanv", "FloatCanv & FloatStretch")
+        return new_line
+
+    lines = existing_history.strip().split("\n")
+    last_line = lines[-1]
+
+    # --- Special FloatCanv rule ---
+    if float_canv and "FloatCanv" in new_line and "CanvMach" not in last_line:
+        new_line = new_line.replace("FloatCanv", "FloatCanv & FloatStretch")
+
+    # --- Normal duplicate-prevention logic ---
+    if strip_timestamp(last_line) != strip_timestamp(new_line):
+        lines.append(new_line)
+
+    return "\n".join(lines)
+
+
+def register_history_functions(conn):
+    """Make append_history(history, new_line, float_canv) callable from SQL on this connection."""
+    conn.create_function(
+        "append_history", 3,
+        lambda history, new_line, float_canv: append_history_line(history, new_line, bool(float_canv)),
+        deterministic=True
+    )
+
+
+def append_to_lead(cursor, lead_barcode, new_line, container_id=None, order_number=None):
+    """
+    One UPDATE for every ISO under a lead barcode: append the line (orderTrack rules) and
+    move them to container_id / order_number when given. Returns rows updated.
+    """
+    cursor.execute("""
+        UPDATE tracking_data
+        SET history = append_history(history, ?, 1),
+            containerID = COALESCE(?, containerID),
+            orderNumber = COALESCE(NULLIF(?, ''), orderNumber)
+        WHERE leadBarcode = ? AND isoBarcode IS NOT NULL
+    """, (new_line, container_id, order_number, lead_barcode))
+    return cursor.rowcount
+
+
+def append_to_container(cursor, container_id, new_line):
+    """One UPDATE appending the line to every ISO in a container. Returns rows updated."""
+    cursor.execute("""
+        UPDATE tracking_data
+        SET history = append_history(history, ?, 0)
+        WHERE containerID = ? AND isoBarcode IS NOT NULL
+    """, (new_line, container_id))
+    return cursor.rowcount
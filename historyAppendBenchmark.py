@@ -0,0 +1,63 @@
+import sqlite3
+import time
+
+from historyAppend import append_history_line, register_history_functions, append_to_container
+
+# === CONFIGURATION ===
+CONTAINER_SIZES = (10, 50, 200, 1000)
+OTHER_ROWS = 20000          # unrelated rows in the table, as in a busy day's tracking_data
+REPEATS = 20
+
+# Compares the per-row SELECT + UPDATE loop moveContainer used to run with the set-based
+# UPDATE it runs now, on an in-memory copy of the tracking_data layout. Run:
+#   python historyAppendBenchmark.py
+
+
+def build_db(container_size):
+    conn = sqlite3.connect(":memory:")
+    register_history_functions(conn)
+    c = conn.cursor()
+    c.execute("""
+        CREATE TABLE tracking_data (
+            containerID INTEGER, orderNumber TEXT, leadBarcode TEXT, isoBarcode TEXT UNIQUE,
+            history TEXT, itemNum INTEGER, prodType TEXT
+        )
+    """)
+    c.execute("CREATE INDEX idx_tracking_containerID ON tracking_data (containerID)")
+    history = "2025-10-10T14:56:00 | Printer Station: Oneflow Order Forms Printed | Harry Howford\n2025-10-10T15:10:00 | RBRoll | Jason Tyler"
+    rows = [(1, "100", "L1", f"iso-{i}", history) for i in range(container_size)]
+    rows += [(2 + i // 50, str(200 + i), f"L{i}", f"other-{i}", history) for i in range(OTHER_ROWS)]
+    c.executemany("INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, history) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    return conn
+
+
+def per_row(cursor, container_id, new_line):
+    cursor.execute("SELECT isoBarcode, history FROM tracking_data WHERE containerID = ?", (container_id,))
+    for iso, history in cursor.fetchall():
+        cursor.execute("UPDATE tracking_data SET history = ? WHERE isoBarcode = ?", (append_history_line(history, new_line), iso))
+
+
+def run(method, container_size):
+    total = 0.0
+    for i in range(REPEATS):
+        conn = build_db(container_size)
+        cursor = conn.cursor()
+        new_line = f"2025-10-10T16:{i:02d}:00 | Station {i} | Bench"
+        started = time.perf_counter()
+        method(cursor, 1, new_line)
+        conn.commit()
+        total += time.perf_counter() - started
+        conn.close()
+    return total / REPEATS
+
+
+def main():
+    print(f"{'items':>6} {'per-row ms':>11} {'set-based ms':>13} {'speed-up':>9}")
+    for size in CONTAINER_SIZES:
+        loop = run(per_row, size)
+        set_based = run(append_to_container, size)
+        print(f"{size:>6} {loop * 1000:>11.2f} {set_based * 1000:>13.2f} {loop / set_based:>8.1f}x")
+
+if __name__ == "__main__":
+    main()
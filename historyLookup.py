@@ -0,0 +1,89 @@
+import trackingArchive
+
+# Keys a tracking row can be found by; each has its own index on tracking_data
+KEY_TYPES = ("isoBarcode", "leadBarcode", "orderNumber")
+
+ROW_COLUMNS = ("rowid", "containerID", "orderNumber", "leadBarcode", "isoBarcode", "prodType", "size", "itemNum", "history")
+
+# Bound parameters per IN list, well under SQLite's limit
+MAX_KEYS_PER_QUERY = 500
+
+
+def normalise_keys(lookups):
+    """{keyType: [keys]} from values that may be a single key, a list or None; blanks dropped, order kept."""
+    keys = {}
+    for key_type in KEY_TYPES:
+        values = lookups.get(key_type)
+        if values is None:
+            continue
+        if not isinstance(values, list):
+            values = [values]
+        unique = list(dict.fromkeys(str(v) for v in values if v not in (None, "")))
+        if unique:
+            keys[key_type] = unique
+    return keys
+
+
+def lookup_rows(cursor, lookups, include_archive=True):
+    """
+    Resolve many iso / lead / order keys at once. Every key type becomes one branch of a
+    UNION ALL, each branch an IN lookup on that column's index, so a row is read once per
+    key it matches and never by a table scan. Rows come back deduplicated by rowid.
+
+    Returns (rows, matches): rows is {rowid: row dict} in first-seen order, and matches is
+    {keyType: {key: [rowid, ...]}} for every requested key (empty list if nothing matched).
+    Keys with no rows in tracking_data are looked up in the archive when include_archive
+    is set; archived rows are flagged with "archived": True.
+    """
+    keys = normalise_keys(lookups)
+    matches = {key_type: {key: [] for key in values} for key_type, values in keys.items()}
+    rows = {}
+
+    # Split into batches so each statement stays under the bound-parameter limit
+    batches, batch, size = [], [], 0
+    for key_type, values in keys.items():
+        for start in range(0, len(values), MAX_KEYS_PER_QUERY):
+            chunk = values[start:start + MAX_KEYS_PER_QUERY]
+            if size + len(chunk) > MAX_KEYS_PER_QUERY and batch:
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append((key_type, chunk))
+            size += len(chunk)
+    if batch:
+        batches.append(batch)
+
+    for batch in batches:
+        sql = " UNION ALL ".join(
+            f"SELECT '{key_type}', {key_type}, {', '.join(ROW_COLUMNS)} FROM tracking_data "
+            f"WHERE {key_type} IN ({', '.join('?' * len(chunk))})"
+            for key_type, chunk in batch
+        )
+        cursor.execute(sql, [key for _key_type, chunk in batch for key in chunk])
+        for r in cursor.fetchall():
+            key_type, key, row = r[0], r[1], dict(zip(ROW_COLUMNS, r[2:]))
+            rows.setdefault(row["rowid"], row)
+            matches[key_type][key].append(row["rowid"])
+
+    for by_key in matches.values():
+        for rowids in by_key.values():
+            rowids.sort()
+
+    if include_archive:
+        add_archived_rows(rows, matches)
+
+    return rows, matches
+
+
+def add_archived_rows(rows, matches):
+    """Fill in, from the archive, every key of matches that found nothing in tracking_data."""
+    for key_type, by_key in matches.items():
+        for key, rowids in by_key.items():
+            if rowids:
+                continue
+            for archived in sorted(trackingArchive.lookup(key_type, key), key=lambda r: r["rowid"] or 0):
+                # Archived rowids may since have been reused by the hot table
+                ref = f"archived:{archived['rowid']}:{archived.get('last_activity')}"
+                row = {column: archived.get(column) for column in ROW_COLUMNS}
+                row["archived"] = True
+                rows.setdefault(ref, row)
+                rowids.append(ref)
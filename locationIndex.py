@@ -0,0 +1,125 @@
+# Where every tracked item is right now, one row per tracking_data row, so "where is X?"
+# is an indexed read instead of splitting the history text of every matching row
+LOCATION_COLUMNS = ("trackingRowid", "isoBarcode", "leadBarcode", "containerID", "orderNumber",
+                    "prodType", "workstation", "employee", "timestamp")
+
+# Keys /api/whereIs can look items up by
+LOOKUP_KEYS = ("isoBarcode", "leadBarcode", "containerID", "orderNumber", "workstation")
+
+
+def last_location(history):
+    """(timestamp, workstation, employee) from the last 'timestamp | workstation | employee' history line."""
+    if not history or not isinstance(history, str):
+        return None, None, None
+    lines = [line.strip() for line in history.splitlines() if line.strip()]
+    if not lines:
+        return None, None, None
+    parts = lines[-1].split(" | ", 1)
+    if len(parts) < 2:
+        return None, parts[0], None
+    timestamp, rest = parts
+    # Workstation labels may contain ' | ' themselves, the employee never does
+    workstation, _, employee = rest.rpartition(" | ")
+    if not workstation:
+        workstation, employee = rest, None
+    return timestamp, workstation, employee
+
+
+def _location_row(rowid, row):
+    timestamp, workstation, employee = last_location(row.get("history"))
+    return (rowid, row.get("isoBarcode"), row.get("leadBarcode"), row.get("containerID"), row.get("orderNumber"),
+            row.get("prodType"), workstation, employee, timestamp)
+
+
+def init_current_location(cursor):
+    """Create current_location and bring it in line with tracking_data. Returns rows (re)built."""
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS current_location (
+            trackingRowid INTEGER PRIMARY KEY,
+            isoBarcode TEXT,
+            leadBarcode TEXT,
+            containerID INTEGER,
+            orderNumber TEXT,
+            prodType TEXT,
+            workstation TEXT,
+            employee TEXT,
+            timestamp TEXT
+        )
+    """)
+    for column in ("isoBarcode", "leadBarcode", "containerID", "orderNumber", "workstation"):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_current_location_{column} ON current_location ({column})")
+
+    # Drop entries for rows deleted while the server was down (e.g. by serverJanitor.py)
+    cursor.execute("""
+        DELETE FROM current_location
+        WHERE trackingRowid NOT IN (SELECT rowid FROM tracking_data)
+    """)
+
+    # Build entries for rows written before the table existed
+    cursor.execute("""
+        SELECT rowid, isoBarcode, leadBarcode, containerID, orderNumber, prodType, history
+        FROM tracking_data
+        WHERE rowid NOT IN (SELECT trackingRowid FROM current_location)
+    """)
+    rows = [
+        _location_row(r[0], dict(zip(("isoBarcode", "leadBarcode", "containerID", "orderNumber", "prodType", "history"), r[1:])))
+        for r in cursor.fetchall()
+    ]
+    cursor.executemany(f"INSERT INTO current_location ({', '.join(LOCATION_COLUMNS)}) VALUES ({', '.join('?' * len(LOCATION_COLUMNS))})", rows)
+    return len(rows)
+
+
+def apply_location_writes(cursor, writes):
+    """
+    Apply tracking writes (as returned by collect_tracking_writes) to current_location on the
+    same cursor, so the caller's commit covers both the tracking rows and their locations.
+    Returns ({rowid: (workstation, prodType)} before, the same after) for the touched rows.
+    """
+    upserts, deletes = [], []
+    for write in writes:
+        if write["op"] == "delete":
+            deletes.append((write["rowid"],))
+        else:
+            upserts.append(_location_row(write["rowid"], write["row"]))
+
+    before = {}
+    rowids = [w["rowid"] for w in writes]
+    for start in range(0, len(rowids), 500):
+        chunk = rowids[start:start + 500]
+        cursor.execute(f"""
+            SELECT trackingRowid, workstation, prodType FROM current_location
+            WHERE trackingRowid IN ({', '.join('?' * len(chunk))})
+        """, chunk)
+        before.update({r[0]: (r[1], r[2]) for r in cursor.fetchall()})
+    after = {r[0]: (r[6], r[5]) for r in upserts}
+
+    if deletes:
+        cursor.executemany("DELETE FROM current_location WHERE trackingRowid = ?", deletes)
+    if upserts:
+        cursor.executemany(f"INSERT OR REPLACE INTO current_location ({', '.join(LOCATION_COLUMNS)}) VALUES ({', '.join('?' * len(LOCATION_COLUMNS))})", upserts)
+    return before, after
+
+
+def where_is(cursor, lookups, limit=None):
+    """
+    Current locations for every item matching any of `lookups`, a dict of key -> list of values
+    (keys from LOOKUP_KEYS). Each lookup is a single IN query on an indexed column.
+    """
+    results = {}
+    for key in LOOKUP_KEYS:
+        values = [v for v in lookups.get(key) or [] if v not in (None, "")]
+        if key == "containerID":
+            values = [int(v) for v in values]
+        # SQLite caps bound parameters per statement, so very large lookups are chunked
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            cursor.execute(f"""
+                SELECT {', '.join(LOCATION_COLUMNS)} FROM current_location
+                WHERE {key} IN ({', '.join('?' * len(chunk))})
+            """, chunk)
+            for r in cursor.fetchall():
+                results[r[0]] = dict(zip(LOCATION_COLUMNS, r))
+    items = sorted(results.values(), key=lambda r: r["trackingRowid"])
+    if limit:
+        items = items[:limit]
+    return items
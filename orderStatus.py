@@ -0,0 +1,219 @@
+import json
+
+# An item counts as packed once its history includes a workstation ending in one of these
+PACKING_SUFFIXES = ("Pack",)
+
+# order_status keeps one row per order number and one per lead barcode
+KEY_TYPES = ("orderNumber", "leadBarcode")
+
+STATUS_COLUMNS = ("keyType", "key", "expectedItems", "packedItems", "stageCounts", "lastStage", "lastScan", "complete")
+
+
+def is_packing(workstation):
+    return bool(workstation) and workstation.endswith(PACKING_SUFFIXES)
+
+
+def init_order_status(cursor):
+    """Create order_status (and the tracking_data key indexes it is rebuilt from); fill it if empty."""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracking_orderNumber ON tracking_data (orderNumber)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracking_leadBarcode ON tracking_data (leadBarcode)")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS order_status (
+            keyType TEXT NOT NULL,
+            key TEXT NOT NULL,
+            expectedItems INTEGER NOT NULL,
+            packedItems INTEGER NOT NULL,
+            stageCounts TEXT,
+            lastStage TEXT,
+            lastScan TEXT,
+            complete INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (keyType, key)
+        ) WITHOUT ROWID
+    """)
+    cursor.execute("SELECT 1 FROM order_status LIMIT 1")
+    if cursor.fetchone() is not None:
+        return 0
+    keys = set()
+    for key_type in KEY_TYPES:
+        cursor.execute(f"SELECT DISTINCT {key_type} FROM tracking_data WHERE {key_type} IS NOT NULL AND {key_type} != ''")
+        keys.update((key_type, r[0]) for r in cursor.fetchall())
+    refresh_keys(cursor, keys)
+    return len(keys)
+
+
+def item_status(history):
+    """(stages, packed, last_scan, last_stage) of one item from its history."""
+    stages = set()
+    last_scan, last_stage = None, None
+    for line in (history or "").splitlines():
+        parts = line.strip().split(" | ")
+        if len(parts) < 3:
+            continue
+        workstation = " | ".join(parts[1:-1]).strip()
+        stages.add(workstation)
+        if last_scan is None or parts[0] >= last_scan:
+            last_scan, last_stage = parts[0], workstation
+    return stages, any(is_packing(stage) for stage in stages), last_scan, last_stage
+
+
+def compute_status(histories):
+    """Status of one order / lead barcode from the histories of its items."""
+    stage_counts = {}
+    packed = 0
+    last_scan, last_stage = None, None
+    for history in histories:
+        stages, item_packed, item_last_scan, item_last_stage = item_status(history)
+        for stage in stages:
+            stage_counts[stage] = stage_counts.get(stage, 0) + 1
+        if item_packed:
+            packed += 1
+        if item_last_scan is not None and (last_scan is None or item_last_scan >= last_scan):
+            last_scan, last_stage = item_last_scan, item_last_stage
+    expected = len(histories)
+    return {
+        "expectedItems": expected,
+        "packedItems": packed,
+        "stageCounts": stage_counts,
+        "lastStage": last_stage,
+        "lastScan": last_scan,
+        "complete": expected > 0 and packed == expected
+    }
+
+
+def status_deltas(writes):
+    """
+    Per (keyType, key), how the writes change its status: each write takes its item's old
+    history away from the keys of its old row and adds the new history to the keys of the new.
+    """
+    deltas = {}
+
+    def add(key, history, sign):
+        delta = deltas.get(key)
+        if delta is None:
+            delta = deltas[key] = {"items": 0, "packed": 0, "stages": {}, "added": None, "removed": None}
+        stages, packed, last_scan, last_stage = item_status(history)
+        delta["items"] += sign
+        delta["packed"] += sign * packed
+        for stage in stages:
+            delta["stages"][stage] = delta["stages"].get(stage, 0) + sign
+        if last_scan is None:
+            return
+        if sign > 0:
+            if delta["added"] is None or last_scan >= delta["added"][0]:
+                delta["added"] = (last_scan, last_stage)
+        elif delta["removed"] is None or last_scan > delta["removed"]:
+            delta["removed"] = last_scan
+
+    for write in writes:
+        old_row = write.get("old_row")
+        row = write["row"] if write["op"] != "delete" else None
+        for key_type in KEY_TYPES:
+            if old_row and old_row.get(key_type):
+                add((key_type, old_row[key_type]), write["old_history"], -1)
+            if row and row.get(key_type):
+                add((key_type, row[key_type]), row.get("history"), 1)
+    return deltas
+
+
+def apply_status_writes(cursor, writes):
+    """
+    Update order_status for tracking writes (as returned by collect_tracking_writes) on the
+    caller's transaction, from each write's old and new history. A key is only recomputed from
+    its tracking rows when the deltas can't say what its status is now: its latest scan was
+    taken away, or its stored row doesn't agree with what is being subtracted from it.
+    """
+    deltas = status_deltas(writes)
+    current = {(s["keyType"], s["key"]): s for s in get_statuses(cursor, {
+        key_type: [key for kt, key in deltas if kt == key_type] for key_type in KEY_TYPES
+    })}
+    upserts, deletes, recompute = [], [], []
+    for key, delta in deltas.items():
+        status = current.get(key) or {"expectedItems": 0, "packedItems": 0, "stageCounts": {}, "lastStage": None, "lastScan": None}
+        expected = status["expectedItems"] + delta["items"]
+        packed = status["packedItems"] + delta["packed"]
+        stage_counts = dict(status["stageCounts"])
+        for stage, change in delta["stages"].items():
+            stage_counts[stage] = stage_counts.get(stage, 0) + change
+            if not stage_counts[stage]:
+                del stage_counts[stage]
+        last_scan, last_stage = status["lastScan"], status["lastStage"]
+        if delta["added"] is not None and (last_scan is None or delta["added"][0] >= last_scan):
+            last_scan, last_stage = delta["added"]
+        elif delta["removed"] is not None and last_scan is not None and delta["removed"] >= last_scan:
+            recompute.append(key)
+            continue
+        if expected < 0 or packed < 0 or packed > expected or any(n < 0 for n in stage_counts.values()):
+            recompute.append(key)
+            continue
+        if expected == 0:
+            if current.get(key) is not None:
+                deletes.append(key)
+            continue
+        upserts.append((key[0], key[1], expected, packed, json.dumps(stage_counts), last_stage, last_scan,
+                        int(packed == expected)))
+    if deletes:
+        cursor.executemany("DELETE FROM order_status WHERE keyType = ? AND key = ?", deletes)
+    if upserts:
+        cursor.executemany(f"INSERT OR REPLACE INTO order_status ({', '.join(STATUS_COLUMNS)}) VALUES ({', '.join('?' * len(STATUS_COLUMNS))})", upserts)
+    if recompute:
+        refresh_keys(cursor, recompute)
+
+
+def refresh_keys(cursor, keys):
+    """Recompute order_status for `keys` from all their tracking rows on the caller's transaction; for backfill and repair."""
+    upserts, deletes = [], []
+    for key_type, key in keys:
+        cursor.execute(f"SELECT history FROM tracking_data WHERE {key_type} = ?", (key,))
+        histories = [r[0] for r in cursor.fetchall()]
+        if not histories:
+            deletes.append((key_type, key))
+            continue
+        status = compute_status(histories)
+        upserts.append((key_type, key, status["expectedItems"], status["packedItems"], json.dumps(status["stageCounts"]),
+                        status["lastStage"], status["lastScan"], int(status["complete"])))
+    if deletes:
+        cursor.executemany("DELETE FROM order_status WHERE keyType = ? AND key = ?", deletes)
+    if upserts:
+        cursor.executemany(f"INSERT OR REPLACE INTO order_status ({', '.join(STATUS_COLUMNS)}) VALUES ({', '.join('?' * len(STATUS_COLUMNS))})", upserts)
+
+
+def get_statuses(cursor, lookups):
+    """Statuses for a dict of keyType -> list of keys; one primary-key IN query per key type."""
+    results = []
+    for key_type in KEY_TYPES:
+        keys = [k for k in lookups.get(key_type) or [] if k]
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            cursor.execute(f"""
+                SELECT {', '.join(STATUS_COLUMNS)} FROM order_status
+                WHERE keyType = ? AND key IN ({', '.join('?' * len(chunk))})
+            """, [key_type] + chunk)
+            for r in cursor.fetchall():
+                status = dict(zip(STATUS_COLUMNS, r))
+                status["stageCounts"] = json.loads(status["stageCounts"] or "{}")
+                status["complete"] = bool(status["complete"])
+                results.append(status)
+    return results
+
+
+def merge_statuses(results):
+    """
+    Combine get_statuses results from several tracking partitions (a lead barcode's items may
+    be spread over them) into one status per key: counts are summed, the latest scan wins.
+    """
+    merged = {}
+    for statuses in results:
+        for status in statuses:
+            key = (status["keyType"], status["key"])
+            into = merged.get(key)
+            if into is None:
+                merged[key] = status
+                continue
+            into["expectedItems"] += status["expectedItems"]
+            into["packedItems"] += status["packedItems"]
+            for stage, count in status["stageCounts"].items():
+                into["stageCounts"][stage] = into["stageCounts"].get(stage, 0) + count
+            if status["lastScan"] is not None and (into["lastScan"] is None or status["lastScan"] >= into["lastScan"]):
+                into["lastScan"], into["lastStage"] = status["lastScan"], status["lastStage"]
+            into["complete"] = into["expectedItems"] > 0 and into["packedItems"] == into["expectedItems"]
+    return list(merged.values())
@@ -426,7 +426,7 @@ class FileDropbox(DraggableBoxContainer.ResizableRectItem):
     def processContainer(self):
         import re, os, PyPDF2, requests
         from PyQt6.QtCore import QVariantAnimation, QEasingCurve, QTimer, Qt
-        from PyQt6.QtWidgets import QApplication, QLabel, QWidget, QGraphicsOpacityEffect
+        from PyQt6.QtWidgets import QApplication, QLabel, QWidget, QGraphicsOpacityEffect, QMessageBox
         from PyQt6.QtGui import QPixmap
         from pdfAnalysis import extract_pdf_info
         from clientCalls import send_print_data, fetch_next_container_id
@@ -512,6 +512,21 @@ class FileDropbox(DraggableBoxContainer.ResizableRectItem):
 
                 today_str = datetime.now().strftime('%d-%m-%y')
 
+                # Once the server reports it is busy the remaining records are not sent (each would
+                # wait out its own retries here, on the UI thread); they are counted and reported
+                backlog = {"sent": 0, "unsent": 0}
+
+                def send(**record):
+                    if backlog["unsent"]:
+                        backlog["unsent"] += 1
+                        return None
+                    response = send_print_data(**record)
+                    if response.get("status") == "busy":
+                        backlog["unsent"] += 1
+                    else:
+                        backlog["sent"] += 1
+                    return response
+
                 if pdf_files:
                     orders_all, leads_all, isos_all, quantities_all, sizes_all, prodtypes_all = [], [], [], [], [], []
                     for pdf in pdf_files:
@@ -549,7 +564,7 @@ class FileDropbox(DraggableBoxContainer.ResizableRectItem):
                                     'size': size
                                 })
 
-                                response = send_print_data(
+                                response = send(
                                     containerID="",
                                     orderNumber=order,
                                     leadBarcode=leads_all[idx] if idx < len(leads_all) else None,
@@ -583,7 +598,7 @@ class FileDropbox(DraggableBoxContainer.ResizableRectItem):
                             'itemNum': item_num
                         })
 
-                        response = send_print_data(
+                        response = send(
                             containerID=container_id,
                             orderNumber=order_number,
                             leadBarcode=None,
@@ -597,6 +612,16 @@ class FileDropbox(DraggableBoxContainer.ResizableRectItem):
 
                         print("Server response:", response)
 
+                if backlog["unsent"]:
+                    # The files stay in the drop box so they can be processed again
+                    QMessageBox.warning(
+                        parent_window, "Server busy",
+                        f"The server is busy: {backlog['unsent']} of {backlog['sent'] + backlog['unsent']} "
+                        "records were not sent.\nThe files have been kept; process them again in a moment."
+                    )
+                    QTimer.singleShot(150, fade_out)
+                    return
+
                 self.drop_widget.pdf_paths.clear()
                 if hasattr(self.drop_widget, 'clear'):
                     self.drop_widget.clear()
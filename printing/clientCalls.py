@@ -2,10 +2,19 @@ import requests
 from dataclasses import dataclass
 from typing import List
 import json
+import time
+import uuid
 from datetime import datetime
 
 target_ip = "192.168.111.184"
 
+# A print record the server refuses (503 while its tracking queue sheds load) is resent after
+# the Retry-After it sends, at most this many times and never waiting longer than the cap
+PRINT_DATA_RETRIES = 5
+MAX_RETRY_AFTER = 30
+# Total seconds send_print_data waits across its retries; it is called on the UI thread
+PRINT_DATA_MAX_WAIT = 5
+
 @dataclass
 class Employee:
     id: int
@@ -53,14 +62,35 @@ def send_print_data(containerID=None, orderNumber=None, leadBarcode=None, isoBar
         "size": size,
         "itemNum": itemNum
     }
+    # The same key on every attempt, so a resent record is never applied twice
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
 
     try:
-        resp = requests.get(f"{base_url}/api/receivePrintData", params=params)
+        waited = 0
+        for attempt in range(PRINT_DATA_RETRIES + 1):
+            resp = requests.get(f"{base_url}/api/receivePrintData", params=params, headers=headers)
+            if resp.status_code != 503 or attempt == PRINT_DATA_RETRIES:
+                break
+            if waited >= PRINT_DATA_MAX_WAIT:
+                break
+            delay = min(retry_after_seconds(resp), PRINT_DATA_MAX_WAIT - waited)
+            time.sleep(delay)
+            waited += delay
+        if resp.status_code == 503:
+            # Still queued up after PRINT_DATA_MAX_WAIT: the caller reports it rather than waiting on
+            return {"status": "busy", "message": "Server queue is full", "retryAfter": retry_after_seconds(resp)}
         resp.raise_for_status()
         return resp.json()
     except requests.RequestException as e:
         return {"status": "error", "message": str(e)}
 
+def retry_after_seconds(resp, default=1):
+    """Seconds to wait from a 503's Retry-After header, capped at MAX_RETRY_AFTER."""
+    try:
+        return min(max(float(resp.headers.get("Retry-After", default)), 0), MAX_RETRY_AFTER)
+    except ValueError:
+        return default
+
 
 def fetch_next_container_id(server_ip=target_ip, port=8080):
     url = f"http://{server_ip}:{port}/api/nextContainerID"
@@ -170,3 +200,73 @@ def fetch_cut_list_by_date(date_str: str, server_ip=target_ip, port=8080):
     except requests.RequestException as e:
         print(f"[Client] Request failed: {e}")
         return []
+
+def fetch_cut_list_counts(date_str: str, date_to: str = None, server_ip=target_ip, port=8080):
+    """
+    Fetches per-(prodType, size) item counts for a production date (DD-MM-YY),
+    or for the inclusive range date_str..date_to. Sizes come back without the
+    date prefix. Returns a list of [prodType, size, count] or an empty list on failure.
+    """
+
+    url = f"http://{server_ip}:{port}/api/cutListByDate"
+    params = {"date": date_str, "aggregate": 1}
+    if date_to:
+        params["dateTo"] = date_to
+
+    try:
+        response = requests.get(url, params=params, timeout=10)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") != "success":
+            print(f"[Client] Server error: {data.get('message')}")
+            return []
+
+        return data.get("cutList", [])
+
+    except json.JSONDecodeError as e:
+        print(f"[Client] JSON parse error: {e}")
+        print(f"[Client] Raw response text: {response.text[:300]}")
+        return []
+
+    except requests.RequestException as e:
+        print(f"[Client] Request failed: {e}")
+        return []
+
+def fetch_cut_plan(date_str: str, date_to: str = None, stock_lengths=None, kerf=None, allowance=None,
+                   server_ip=target_ip, port=8080):
+    """
+    Fetches optimised bar cut plans for a production date (DD-MM-YY) or range.
+    stock_lengths, kerf and allowance are in inches; server defaults are used when None.
+    Returns the plan dict (groups, totalBars, totalWaste, ...) or None on failure.
+    """
+
+    url = f"http://{server_ip}:{port}/api/cutPlan"
+    params = {"date": date_str}
+    if date_to:
+        params["dateTo"] = date_to
+    if stock_lengths:
+        params["stock"] = ",".join(str(s) for s in stock_lengths)
+    if kerf is not None:
+        params["kerf"] = kerf
+    if allowance is not None:
+        params["allowance"] = allowance
+
+    try:
+        response = requests.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+
+        if data.get("status") != "success":
+            print(f"[Client] Server error: {data.get('message')}")
+            return None
+
+        return data
+
+    except json.JSONDecodeError as e:
+        print(f"[Client] JSON parse error: {e}")
+        return None
+
+    except requests.RequestException as e:
+        print(f"[Client] Request failed: {e}")
+        return None
@@ -0,0 +1,19 @@
+from clientCalls import fetch_cut_plan
+
+# Stock bar lengths and saw kerf in inches
+STOCK_LENGTHS = [96, 120]
+KERF = 0.125
+
+plan = fetch_cut_plan("11-11-25", stock_lengths=STOCK_LENGTHS, kerf=KERF)
+
+if plan:
+    for group in plan["groups"]:
+        colour = f" ({group['colour']})" if group["colour"] else ""
+        print(f"{group['profile']}{colour}: {group['pieces']} pieces from {group['bars']} bars, waste {group['waste']}\"")
+        for bar in group["plans"]:
+            cuts = ", ".join(f"{c:g}\"" for c in bar["cuts"])
+            print(f"    {bar['quantity']} x {bar['stock']:g}\" bar: {cuts} (waste {bar['waste']}\")")
+        for length in group["oversize"]:
+            print(f"    Longer than any stock bar: {length:g}\"")
+
+    print(f"Total: {plan['totalBars']} bars, waste {plan['totalWaste']}\", {plan['skipped']} items without a bar size")
@@ -0,0 +1,139 @@
+import sqlite3
+from collections import Counter
+
+from trackingArchive import all_archived_rows, ARCHIVE_DIR
+
+# === CONFIGURATION (backfill command) ===
+DB_PATH = "trackingData.db"
+
+# Items processed per hour x workstation x employee x prodType. Rows are only ever added to,
+# so counts survive retention purging the tracking rows they were built from.
+# Rebuild from existing history (tracking_data plus the archive) with:  python productionRollup.py
+
+GROUP_COLUMNS = ("workstation", "employee", "prodType")
+
+
+def init_rollup_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS hourly_rollup (
+            hour TEXT NOT NULL,
+            workstation TEXT NOT NULL,
+            employee TEXT NOT NULL,
+            prodType TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (hour, workstation, employee, prodType)
+        ) WITHOUT ROWID
+    """)
+
+
+def parse_line(line):
+    """('YYYY-MM-DDTHH', workstation, employee) for a 'timestamp | workstation | employee' line, or None."""
+    parts = line.strip().split(" | ")
+    if len(parts) < 3 or len(parts[0]) < 13 or parts[0][10] != "T":
+        return None
+    return parts[0][:13], " | ".join(parts[1:-1]).strip(), parts[-1].strip()
+
+
+def new_lines(old_history, new_history):
+    """History lines present in new_history but not old_history - normally the appended tail."""
+    old = [line for line in (old_history or "").splitlines() if line.strip()]
+    new = [line for line in (new_history or "").splitlines() if line.strip()]
+    if new[:len(old)] == old:
+        return new[len(old):]
+    # History was rewritten rather than appended to: count whatever lines are new
+    return list((Counter(new) - Counter(old)).elements())
+
+
+def rollup_deltas(writes):
+    """Counts to add for tracking writes (as returned by collect_tracking_writes). Deletes add nothing."""
+    deltas = Counter()
+    for write in writes:
+        if write["op"] == "delete":
+            continue
+        row = write["row"]
+        old_history = write["old_history"] if write["op"] == "update" else None
+        for line in new_lines(old_history, row.get("history")):
+            parsed = parse_line(line)
+            if parsed:
+                deltas[parsed + (row.get("prodType") or "",)] += 1
+    return deltas
+
+
+def persist_rollup(cursor, deltas):
+    """Add deltas to hourly_rollup on the caller's transaction."""
+    if not deltas:
+        return
+    cursor.executemany("""
+        INSERT INTO hourly_rollup (hour, workstation, employee, prodType, count) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (hour, workstation, employee, prodType) DO UPDATE SET count = count + excluded.count
+    """, [key + (count,) for key, count in deltas.items()])
+
+
+def backfill(cursor, archive_dir=ARCHIVE_DIR, owns=None):
+    """
+    Rebuild hourly_rollup from every history line in tracking_data and the archive.
+    The archive is shared by every tracking partition, so `owns(row)` picks the archived
+    rows counted here (all of them when None). The caller commits. Returns the number of
+    scans counted.
+    """
+    counts = Counter()
+
+    def add(prod_type, history):
+        for line in (history or "").splitlines():
+            parsed = parse_line(line)
+            if parsed:
+                counts[parsed + (prod_type or "",)] += 1
+
+    cursor.execute("SELECT prodType, history FROM tracking_data")
+    for prod_type, history in cursor.fetchall():
+        add(prod_type, history)
+    for row in all_archived_rows(archive_dir):
+        if owns is None or owns(row):
+            add(row.get("prodType"), row.get("history"))
+
+    cursor.execute("DELETE FROM hourly_rollup")
+    persist_rollup(cursor, counts)
+    return sum(counts.values())
+
+
+def query_rollup(cursor, date_from, date_to, group_by=GROUP_COLUMNS, granularity="day", filters=None):
+    """
+    Sum hourly_rollup over [date_from, date_to] (YYYY-MM-DD, inclusive), bucketed by 'hour',
+    'day' or 'total' and grouped by any of GROUP_COLUMNS. `filters` maps a group column to
+    the values to keep. Only the primary-key range for the dates is read.
+    """
+    bucket = {"hour": "hour", "day": "substr(hour, 1, 10)", "total": None}[granularity]
+    columns = ([bucket] if bucket else []) + list(group_by)
+
+    conditions, params = ["hour >= ?", "hour < ?"], [date_from, date_to + "U"]  # 'U' sorts after 'THH'
+    for column, values in (filters or {}).items():
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+
+    sql = f"""
+        SELECT {', '.join(columns + ['SUM(count)'])}
+        FROM hourly_rollup
+        WHERE {' AND '.join(conditions)}
+    """
+    if columns:
+        sql += f" GROUP BY {', '.join(columns)} ORDER BY {', '.join(columns)}"
+    cursor.execute(sql, params)
+
+    keys = (["period"] if bucket else []) + list(group_by)
+    # An ungrouped SUM over no rows comes back as a single NULL
+    return [dict(zip(keys + ["count"], r)) for r in cursor.fetchall() if r[-1] is not None]
+
+
+# === BACKFILL COMMAND ===
+def main():
+    conn = sqlite3.connect(DB_PATH, timeout=30)
+    c = conn.cursor()
+    init_rollup_table(c)
+    counted = backfill(c)
+    conn.commit()
+    conn.close()
+    print(f"✅ Rebuilt hourly rollups from {counted} scans.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import time
+from datetime import datetime
+from trackingArchive import ARCHIVE_COLUMNS
+
+# Days a tracking row is kept after its last activity, and per-prodType overrides
+DEFAULT_RETENTION_DAYS = 3
+RETENTION_DAYS_BY_PROD_TYPE = {}
+
+# Rows deleted per statement, and the most time one purge call may spend (seconds)
+RETENTION_BATCH_SIZE = 200
+RETENTION_TIME_BUDGET = 0.05
+
+
+def last_activity_from_history(history):
+    """Epoch seconds of the last 'timestamp | workstation | employee' line, or None."""
+    if not history or not isinstance(history, str):
+        return None
+    lines = [line.strip() for line in history.splitlines() if line.strip()]
+    if not lines:
+        return None
+    timestamp_str = lines[-1].split(" | ", 1)[0].strip()
+    try:
+        return int(datetime.fromisoformat(timestamp_str).timestamp())
+    except ValueError:
+        return None
+
+
+def init_last_activity(cursor):
+    """
+    Add the indexed last_activity column and the triggers that keep it current on every
+    insert / history change, then backfill it from history for rows that predate it.
+    """
+    cursor.execute("PRAGMA table_info(tracking_data)")
+    if "last_activity" not in {row[1] for row in cursor.fetchall()}:
+        cursor.execute("ALTER TABLE tracking_data ADD COLUMN last_activity INTEGER")
+
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracking_last_activity ON tracking_data (last_activity)")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tracking_last_activity_insert AFTER INSERT ON tracking_data
+        BEGIN
+            UPDATE tracking_data SET last_activity = CAST(strftime('%s', 'now') AS INTEGER) WHERE rowid = NEW.rowid;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS tracking_last_activity_update AFTER UPDATE OF history ON tracking_data
+        WHEN NEW.history IS NOT OLD.history
+        BEGIN
+            UPDATE tracking_data SET last_activity = CAST(strftime('%s', 'now') AS INTEGER) WHERE rowid = NEW.rowid;
+        END
+    """)
+
+    cursor.execute("SELECT rowid, history FROM tracking_data WHERE last_activity IS NULL")
+    backfill = [(last_activity_from_history(history), rowid) for rowid, history in cursor.fetchall()]
+    cursor.executemany("UPDATE tracking_data SET last_activity = ? WHERE rowid = ?",
+                       [(ts, rowid) for ts, rowid in backfill if ts is not None])
+    return len(backfill)
+
+
+def purge_expired(cursor, now=None, default_days=DEFAULT_RETENTION_DAYS, days_by_prod_type=None,
+                  batch_size=RETENTION_BATCH_SIZE, time_budget=RETENTION_TIME_BUDGET, archive=None):
+    """
+    Delete rows whose last_activity is older than their prodType's retention, walking the
+    last_activity index in batches of `batch_size` until nothing is left or `time_budget`
+    seconds have passed. If `archive` is given it is called with each batch (a list of
+    dicts keyed by ARCHIVE_COLUMNS) before the batch is deleted. The caller commits.
+    Returns (deleted, finished).
+    """
+    now = now if now is not None else time.time()
+    days_by_prod_type = RETENTION_DAYS_BY_PROD_TYPE if days_by_prod_type is None else days_by_prod_type
+    started = time.monotonic()
+
+    # One (cutoff, extra condition, params) per retention rule
+    overrides = list(days_by_prod_type.items())
+    rules = [(
+        now - default_days * 86400,
+        f"AND (prodType IS NULL OR prodType NOT IN ({', '.join('?' * len(overrides))}))" if overrides else "",
+        [prod_type for prod_type, _ in overrides]
+    )]
+    rules.extend((now - days * 86400, "AND prodType = ?", [prod_type]) for prod_type, days in overrides)
+
+    deleted = 0
+    for cutoff, condition, params in rules:
+        while True:
+            cursor.execute(f"""
+                SELECT {', '.join(ARCHIVE_COLUMNS)} FROM tracking_data
+                WHERE last_activity < ? {condition}
+                LIMIT ?
+            """, [cutoff] + params + [batch_size])
+            rows = cursor.fetchall()
+            if rows:
+                if archive is not None:
+                    archive([dict(zip(ARCHIVE_COLUMNS, r)) for r in rows])
+                cursor.executemany("DELETE FROM tracking_data WHERE rowid = ?", [(r[0],) for r in rows])
+                deleted += len(rows)
+            if len(rows) < batch_size:
+                break
+            if time.monotonic() - started >= time_budget:
+                return deleted, False
+    return deleted, True
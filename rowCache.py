@@ -0,0 +1,163 @@
+import bisect
+from collections import OrderedDict
+from threading import Lock
+
+from historyLookup import ROW_COLUMNS
+
+# Approximate memory the cache may hold; least recently used rows are evicted past it
+ROW_CACHE_MAX_BYTES = 16 * 1024 * 1024
+
+# Rough fixed cost of one cached row (slots object, dict entries, ints) on top of its strings
+ROW_OVERHEAD_BYTES = 200
+
+
+class TrackingRow:
+    __slots__ = ROW_COLUMNS + ("nbytes",)
+
+    def __init__(self, rowid, row):
+        self.rowid = rowid
+        self.containerID = row.get("containerID")
+        self.orderNumber = row.get("orderNumber")
+        self.leadBarcode = row.get("leadBarcode")
+        self.isoBarcode = row.get("isoBarcode")
+        self.prodType = row.get("prodType")
+        self.size = row.get("size")
+        self.itemNum = row.get("itemNum")
+        self.history = row.get("history")
+        self.nbytes = ROW_OVERHEAD_BYTES + sum(
+            len(v) for v in (self.orderNumber, self.leadBarcode, self.isoBarcode, self.prodType, self.size, self.history)
+            if isinstance(v, str)
+        )
+
+    def as_dict(self):
+        return {column: getattr(self, column) for column in ROW_COLUMNS}
+
+
+class RowCache:
+    """
+    Bounded LRU cache of recently touched tracking_data rows, found by isoBarcode or by
+    orderNumber (an order is cached only with every one of its rows). The tracking worker
+    writes every committed write through with apply(), so cached rows are never stale.
+    Readers fill misses with put_rows / put_order, passing the generation they read at;
+    a fill is dropped if the worker applied writes in the meantime.
+    """
+
+    def __init__(self, max_bytes=ROW_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._rows = OrderedDict()
+        self._by_iso = {}
+        self._orders = {}
+        self.nbytes = 0
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.fills_skipped = 0
+
+    def _drop(self, rowid):
+        row = self._rows.pop(rowid, None)
+        if row is None:
+            return None
+        self.nbytes -= row.nbytes
+        if self._by_iso.get(row.isoBarcode) == rowid:
+            del self._by_iso[row.isoBarcode]
+        return row
+
+    def _put(self, row):
+        self._drop(row.rowid)
+        self._rows[row.rowid] = row
+        self.nbytes += row.nbytes
+        if row.isoBarcode is not None:
+            self._by_iso[row.isoBarcode] = row.rowid
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._rows:
+            row = self._drop(next(iter(self._rows)))
+            # An order is only served from the cache while all of its rows are here
+            self._orders.pop(row.orderNumber, None)
+            self.evictions += 1
+
+    def apply(self, writes):
+        """Write through one committed batch of tracking writes (as returned by collect_tracking_writes)."""
+        with self._lock:
+            self.generation += 1
+            for write in writes:
+                rowid = write["rowid"]
+                old_order = (write["old_row"] or {}).get("orderNumber")
+                new_order = None if write["op"] == "delete" else write["row"].get("orderNumber")
+                if old_order != new_order and old_order in self._orders:
+                    rowids = self._orders[old_order]
+                    if rowid in rowids:
+                        rowids.remove(rowid)
+                    if not rowids:
+                        del self._orders[old_order]
+                if write["op"] == "delete":
+                    self._drop(rowid)
+                    continue
+                self._put(TrackingRow(rowid, write["row"]))
+                rowids = self._orders.get(new_order)
+                if rowids is not None and rowid not in rowids:
+                    bisect.insort(rowids, rowid)
+            self._evict()
+
+    def get_iso(self, iso_barcode):
+        """Cached row dict for an isoBarcode, or None on a miss."""
+        with self._lock:
+            rowid = self._by_iso.get(iso_barcode)
+            if rowid is None:
+                self.misses += 1
+                return None
+            self._rows.move_to_end(rowid)
+            self.hits += 1
+            return self._rows[rowid].as_dict()
+
+    def get_order(self, order_number):
+        """Every row of an order as dicts, oldest first, or None if the order is not cached."""
+        with self._lock:
+            rowids = self._orders.get(order_number)
+            if rowids is None:
+                self.misses += 1
+                return None
+            for rowid in rowids:
+                self._rows.move_to_end(rowid)
+            self.hits += 1
+            return [self._rows[rowid].as_dict() for rowid in rowids]
+
+    def put_rows(self, rows, generation):
+        """Cache row dicts (with rowid) read from tracking_data at the given generation."""
+        with self._lock:
+            if generation != self.generation:
+                self.fills_skipped += 1
+                return
+            for row in rows:
+                self._put(TrackingRow(row["rowid"], row))
+            self._evict()
+
+    def put_order(self, order_number, rows, generation):
+        """Cache an order read in full (every row, with rowid) at the given generation."""
+        if not rows:
+            return
+        with self._lock:
+            if generation != self.generation:
+                self.fills_skipped += 1
+                return
+            for row in rows:
+                self._put(TrackingRow(row["rowid"], row))
+            self._orders[order_number] = sorted(row["rowid"] for row in rows)
+            self._evict()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "rows": len(self._rows),
+                "orders": len(self._orders),
+                "bytes": self.nbytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRatio": round(self.hits / lookups, 4) if lookups else None,
+                "evictions": self.evictions,
+                "fillsSkipped": self.fills_skipped
+            }
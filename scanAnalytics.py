@@ -0,0 +1,318 @@
+import math
+import time
+from array import array
+from collections import Counter, defaultdict
+from datetime import datetime
+from threading import Lock
+
+PERCENTILES = (50, 90, 95)
+
+
+def parse_scans(history):
+    """[(epoch seconds, hour of day, workstation)] for each parseable 'ts | workstation | employee' line."""
+    scans = []
+    if not history or not isinstance(history, str):
+        return scans
+    for line in history.splitlines():
+        parts = line.strip().split(" | ")
+        if len(parts) < 2:
+            continue
+        try:
+            ts = datetime.fromisoformat(parts[0].strip())
+        except ValueError:
+            continue
+        workstation = " | ".join(parts[1:-1]) if len(parts) > 2 else parts[1]
+        scans.append((ts.timestamp(), ts.hour, workstation.strip()))
+    return scans
+
+
+def summarise(histogram):
+    """count / mean / percentiles (seconds) of durations, given as a {duration: occurrences} histogram."""
+    n = sum(histogram.values())
+    if not n:
+        return {"count": 0}
+    result = {"count": n, "mean": round(math.fsum(value * count for value, count in histogram.items()) / n, 1)}
+    values = sorted(histogram)
+    ranks = [min(n - 1, max(0, math.ceil(p / 100 * n) - 1)) for p in PERCENTILES]
+    seen = 0
+    i = 0
+    for value in values:
+        seen += histogram[value]
+        while i < len(ranks) and ranks[i] < seen:
+            result[f"p{PERCENTILES[i]}"] = round(value, 1)
+            i += 1
+    return result
+
+
+def _bump(counter, key, delta):
+    counter[key] += delta
+    if not counter[key]:
+        del counter[key]
+
+
+class _Aggregates:
+    """Scan counts and duration histograms over a set of scans: one hour, or all of them."""
+
+    __slots__ = ("label", "slots", "scans", "dwell", "cycle")
+
+    def __init__(self, label=None):
+        self.label = label
+        # Slots whose scan falls in this hour (deleted ones included until the next compaction)
+        self.slots = []
+        # workstation code -> scans
+        self.scans = Counter()
+        # ("ws" | "pt" | "hour", key) -> {dwell seconds: scans}
+        self.dwell = defaultdict(Counter)
+        # prodType code -> {cycle seconds: items}, counted in the hour of the item's first scan
+        self.cycle = defaultdict(Counter)
+
+
+class ScanAnalytics:
+    """
+    Columnar store of every scan in tracking_data, for dwell, cycle-time and throughput stats.
+
+    Each scan is one slot across parallel typed arrays (timestamp, hour, workstation code,
+    prodType code, dwell, rowid). Dwell is the time until the same item's next scan, filled in
+    when that scan arrives; NaN while the item is still at the workstation. load() does the one
+    bulk pass over the table; apply() then folds in each committed tracking write, parsing only
+    the lines appended since the row was last seen.
+
+    Alongside the arrays, scan counts and dwell / cycle-time histograms are kept per clock hour
+    and in total, adjusted by each slot apply() adds, fills or drops. stats() merges those
+    rather than walking the slots; only the hour that `since` falls in is filtered slot by slot.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ts = array("d")
+        self.hour = array("b")
+        self.workstation = array("l")
+        self.prod_type = array("l")
+        self.dwell = array("d")
+        self.rowid = array("q")
+        self.alive = array("b")
+        self._names = {"workstation": [], "prodType": []}
+        self._codes = {"workstation": {}, "prodType": {}}
+        # rowid -> slots of that row's scans, in order
+        self._rows = {}
+        # hour index (epoch hours) -> _Aggregates of the scans in that hour
+        self._hours = {}
+        self._total = _Aggregates()
+        self._dead = 0
+        self._version = 0
+        self._cache = {}
+
+    def _code(self, kind, name):
+        codes = self._codes[kind]
+        if name not in codes:
+            codes[name] = len(self._names[kind])
+            self._names[kind].append(name)
+        return codes[name]
+
+    def _hour_of(self, slot):
+        hour_index = int(self.ts[slot] // 3600)
+        aggregates = self._hours.get(hour_index)
+        if aggregates is None:
+            label = datetime.fromtimestamp(hour_index * 3600).strftime("%Y-%m-%dT%H:00")
+            aggregates = self._hours[hour_index] = _Aggregates(label)
+        return aggregates
+
+    def _count_scan(self, slot, delta):
+        for aggregates in (self._hour_of(slot), self._total):
+            _bump(aggregates.scans, self.workstation[slot], delta)
+
+    def _count_dwell(self, slot, delta):
+        d = self.dwell[slot]
+        if d != d:  # NaN: still at the workstation
+            return
+        keys = (("ws", self.workstation[slot]), ("pt", self.prod_type[slot]), ("hour", self.hour[slot]))
+        for aggregates in (self._hour_of(slot), self._total):
+            for key in keys:
+                _bump(aggregates.dwell[key], d, delta)
+
+    def _count_cycle(self, slots, delta):
+        if len(slots) < 2:
+            return
+        first = slots[0]
+        value = self.ts[slots[-1]] - self.ts[first]
+        for aggregates in (self._hour_of(first), self._total):
+            _bump(aggregates.cycle[self.prod_type[first]], value, delta)
+
+    def _append_scans(self, rowid, prod_type, scans):
+        slots = self._rows.setdefault(rowid, [])
+        prod_code = self._code("prodType", prod_type or "")
+        self._count_cycle(slots, -1)
+        for epoch, hour, workstation in scans:
+            if slots and math.isnan(self.dwell[slots[-1]]):
+                self.dwell[slots[-1]] = max(0.0, epoch - self.ts[slots[-1]])
+                self._count_dwell(slots[-1], 1)
+            slot = len(self.ts)
+            slots.append(slot)
+            self.ts.append(epoch)
+            self.hour.append(hour)
+            self.workstation.append(self._code("workstation", workstation))
+            self.prod_type.append(prod_code)
+            self.dwell.append(math.nan)
+            self.rowid.append(rowid)
+            self.alive.append(1)
+            self._hour_of(slot).slots.append(slot)
+            self._count_scan(slot, 1)
+        self._count_cycle(slots, 1)
+
+    def _drop_row(self, rowid):
+        slots = self._rows.pop(rowid, [])
+        self._count_cycle(slots, -1)
+        for slot in slots:
+            self._count_scan(slot, -1)
+            self._count_dwell(slot, -1)
+            self.alive[slot] = 0
+            self._dead += 1
+
+    def load(self, cursor):
+        """Rebuild from tracking_data in a single pass. Returns the number of scans loaded."""
+        cursor.execute("SELECT rowid, prodType, history FROM tracking_data ORDER BY rowid")
+        return self.load_rows(cursor.fetchall())
+
+    def load_rows(self, rows):
+        """Rebuild from (rowid, prodType, history) rows, e.g. gathered from several partitions."""
+        with self._lock:
+            self._reset()
+            for rowid, prod_type, history in rows:
+                self._append_scans(rowid, prod_type, parse_scans(history))
+            return len(self.ts)
+
+    def apply(self, writes):
+        """Fold in tracking writes (as returned by collect_tracking_writes) after they commit."""
+        if not writes:
+            return
+        with self._lock:
+            for write in writes:
+                rowid = write["rowid"]
+                if write["op"] == "delete":
+                    self._drop_row(rowid)
+                    continue
+                row = write["row"]
+                scans = parse_scans(row.get("history"))
+                slots = self._rows.get(rowid, [])
+                known = len(slots)
+                # Appended lines are the common case; anything else (history rewritten, prodType
+                # changed) re-parses the row
+                appended = known <= len(scans) and (not slots or (
+                    self.ts[slots[-1]] == scans[known - 1][0]
+                    and self._names["prodType"][self.prod_type[slots[0]]] == (row.get("prodType") or "")
+                ))
+                if appended:
+                    self._append_scans(rowid, row.get("prodType"), scans[known:])
+                else:
+                    self._drop_row(rowid)
+                    self._append_scans(rowid, row.get("prodType"), scans)
+            self._version += 1
+            self._cache = {}
+            # Compact once more than half the slots belong to deleted or rewritten rows
+            if self._dead > len(self.ts) // 2:
+                self._compact()
+
+    def _compact(self):
+        columns = (self.ts, self.hour, self.workstation, self.prod_type, self.dwell, self.rowid, self.alive)
+        new_columns = tuple(array(column.typecode) for column in columns)
+        self.ts, self.hour, self.workstation, self.prod_type, self.dwell, self.rowid, self.alive = new_columns
+        # The aggregates only count live slots, so they carry over; just the slot numbers move
+        hours = {}
+        for hour_index, aggregates in self._hours.items():
+            if aggregates.scans:
+                aggregates.slots = []
+                hours[hour_index] = aggregates
+        self._hours = hours
+        for rowid, slots in self._rows.items():
+            for i, slot in enumerate(slots):
+                slots[i] = len(self.ts)
+                for column, values in zip(new_columns, columns):
+                    column.append(values[slot])
+                self._hour_of(slots[i]).slots.append(slots[i])
+        self._dead = 0
+
+    def _partial_hour(self, aggregates, since):
+        """The aggregates of an hour restricted to scans at or after `since`, from its slots."""
+        partial = _Aggregates(aggregates.label)
+        for slot in aggregates.slots:
+            if not self.alive[slot] or self.ts[slot] < since:
+                continue
+            partial.scans[self.workstation[slot]] += 1
+            d = self.dwell[slot]
+            if d == d:
+                for key in (("ws", self.workstation[slot]), ("pt", self.prod_type[slot]), ("hour", self.hour[slot])):
+                    partial.dwell[key][d] += 1
+            slots = self._rows[self.rowid[slot]]
+            if slots[0] == slot and len(slots) > 1:
+                partial.cycle[self.prod_type[slot]][self.ts[slots[-1]] - self.ts[slot]] += 1
+        return partial
+
+    def stats(self, since=None):
+        """
+        Dwell percentiles by workstation, prodType and hour of day; cycle time (first to last scan)
+        by prodType; and scans per hour per workstation. `since` (epoch seconds) limits the stats
+        to scans at or after it.
+        """
+        # The hourly aggregates are merged under the lock; the percentiles are worked out
+        # from the merged histograms outside it, so the tracking worker's apply() is not held up
+        with self._lock:
+            key = (self._version, since)
+            if key in self._cache:
+                return self._cache[key]
+            ws_names, pt_names = list(self._names["workstation"]), list(self._names["prodType"])
+            items = len(self._rows)
+
+            if since is None:
+                hours = list(self._hours.values())
+                totals = self._total
+            else:
+                cutoff_hour = int(since // 3600)
+                hours = [aggregates for hour_index, aggregates in self._hours.items() if hour_index > cutoff_hour]
+                if cutoff_hour in self._hours:
+                    hours.append(self._partial_hour(self._hours[cutoff_hour], since))
+                totals = None
+
+            throughput = defaultdict(dict)
+            for aggregates in hours:
+                for code, n in aggregates.scans.items():
+                    throughput[ws_names[code]][aggregates.label] = n
+            dwell, cycle = defaultdict(Counter), defaultdict(Counter)
+            for aggregates in ([totals] if totals is not None else hours):
+                for group, histogram in aggregates.dwell.items():
+                    dwell[group].update(histogram)
+                for code, histogram in aggregates.cycle.items():
+                    cycle[code].update(histogram)
+
+        by_ws, by_pt, by_hour = {}, {}, {}
+        for (group, code), histogram in dwell.items():
+            if not histogram:
+                continue
+            if group == "ws":
+                by_ws[ws_names[code]] = histogram
+            elif group == "pt":
+                by_pt[pt_names[code]] = histogram
+            else:
+                by_hour[code] = histogram
+        by_cycle = {pt_names[code]: histogram for code, histogram in cycle.items() if histogram}
+
+        result = {
+            "generated": time.time(),
+            "since": since,
+            "scans": sum(sum(counts.values()) for counts in throughput.values()),
+            "items": items,
+            "dwellByWorkstation": {name: summarise(h) for name, h in sorted(by_ws.items())},
+            "dwellByProdType": {name: summarise(h) for name, h in sorted(by_pt.items())},
+            "dwellByHour": {hour: summarise(h) for hour, h in sorted(by_hour.items())},
+            "cycleTimeByProdType": {name: summarise(h) for name, h in sorted(by_cycle.items())},
+            "throughputByHour": {name: dict(sorted(counts.items())) for name, counts in sorted(throughput.items())}
+        }
+        with self._lock:
+            # Cached under the version it was computed from; apply() clears the cache anyway
+            if key[0] == self._version:
+                if len(self._cache) >= 16:
+                    self._cache = {}
+                self._cache[key] = result
+        return result
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+# Record kinds that come from scanners and can double-fire
+SCAN_KINDS = ("orderTrack", "moveContainer")
+
+# An identical scan of the same barcode at the same workstation by the same employee within
+# this many seconds of the last accepted one is a double-fire and is dropped
+DUPLICATE_SCAN_WINDOW = 5.0
+
+# Idempotency keys are remembered this long, and at most this many at once
+IDEMPOTENCY_TTL = 24 * 3600
+IDEMPOTENCY_MAX_KEYS = 100000
+
+
+def scan_key(record):
+    """(kind, barcode, workstation, employee) for a scan record, or None for other kinds."""
+    if record.get("kind") not in SCAN_KINDS:
+        return None
+    barcode = record.get("isoBarcode") or record.get("leadBarcode") or record.get("orderNumber")
+    if not barcode:
+        return None
+    return (record["kind"], barcode, record.get("workstation"), record.get("employeeName"))
+
+
+class ScanDeduper:
+    """
+    Drops repeated tracking requests before they are journalled or queued: requests whose
+    idempotency key has already been accepted, and exact repeats of a scan within
+    DUPLICATE_SCAN_WINDOW. Keys are claimed before the record is queued and forgotten again
+    if the queue refuses it, so concurrent repeats cannot both get through.
+    """
+
+    def __init__(self, window=DUPLICATE_SCAN_WINDOW, ttl=IDEMPOTENCY_TTL, max_keys=IDEMPOTENCY_MAX_KEYS):
+        self.window = window
+        self.ttl = ttl
+        self.max_keys = max_keys
+        self._lock = Lock()
+        self._keys = OrderedDict()
+        self._scans = OrderedDict()
+        self.accepted = 0
+        self.dropped_duplicates = 0
+        self.dropped_idempotent = 0
+
+    def _prune(self, now):
+        while self._scans and now - next(iter(self._scans.values()))[0] >= self.window:
+            self._scans.popitem(last=False)
+        while self._keys and (now - next(iter(self._keys.values())) >= self.ttl or len(self._keys) > self.max_keys):
+            self._keys.popitem(last=False)
+
+    def claim(self, record, idempotency_key=None):
+        """
+        None if the record should be queued, else why it was dropped ('idempotent' or
+        'duplicate'). A successful claim must be followed by forget() if the record is not queued.
+        """
+        now = time.monotonic()
+        params = tuple(sorted((k, v) for k, v in record.items() if k not in ("timestamp", "lane", "segment")))
+        key = scan_key(record)
+        with self._lock:
+            self._prune(now)
+            if idempotency_key is not None and idempotency_key in self._keys:
+                self.dropped_idempotent += 1
+                return "idempotent"
+            last = self._scans.get(key) if key else None
+            if last is not None and last[1] == params:
+                self.dropped_duplicates += 1
+                return "duplicate"
+            if idempotency_key is not None:
+                self._keys[idempotency_key] = now
+            if key:
+                self._scans.pop(key, None)
+                self._scans[key] = (now, params)
+            self.accepted += 1
+            return None
+
+    def forget(self, record, idempotency_key=None):
+        """Undo a claim for a record that was not queued, so a retry is not taken for a repeat."""
+        key = scan_key(record)
+        with self._lock:
+            if idempotency_key is not None:
+                self._keys.pop(idempotency_key, None)
+            if key:
+                self._scans.pop(key, None)
+            self.accepted -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "accepted": self.accepted,
+                "droppedDuplicates": self.dropped_duplicates,
+                "droppedIdempotent": self.dropped_idempotent,
+                "windowSeconds": self.window,
+                "trackedScans": len(self._scans),
+                "idempotencyKeys": len(self._keys)
+            }
@@ -1,54 +1,49 @@
+import os
 import sqlite3
-from datetime import datetime, timedelta
+import time
+from retentionEngine import init_last_activity, purge_expired, DEFAULT_RETENTION_DAYS
+from trackingArchive import archive_rows
+from trackingPartitions import PartitionLayout
 
 # === CONFIGURATION ===
 DB_PATH = "trackingData.db"     # <-- Change this to your SQLite file path
-TABLE_NAME = "tracking_data"   # <-- Change this to your table name
-HISTORY_COLUMN = "history"       # <-- Change this to your history column name
+TRACKING_PARTITIONS = 1         # <-- Keep in step with TRACKING_PARTITIONS in serverb.py
+
+# The server purges expired rows itself (see retention_step in serverb.py); this script is
+# for running a purge while the server is down. Each batch is its own short transaction and
+# uses the last_activity index, so it no longer locks the database for a full scan.
+# Purged rows are moved to the archive (trackingArchive.py) where the history endpoints
+# can still find them.
 
 # === MAIN SCRIPT ===
-def main():
-    conn = sqlite3.connect(DB_PATH, isolation_level="EXCLUSIVE")  # Lock DB for this session
+def purge_file(db_file):
+    conn = sqlite3.connect(db_file, timeout=30)
     c = conn.cursor()
 
-    # Start an exclusive transaction
-    c.execute("BEGIN EXCLUSIVE TRANSACTION;")
-
-    # Fetch all rows (adjust columns if needed)
-    c.execute(f"SELECT rowid, {HISTORY_COLUMN} FROM {TABLE_NAME}")
-    rows = c.fetchall()
+    init_last_activity(c)
+    conn.commit()
 
     deleted_count = 0
-    now = datetime.utcnow()
-    cutoff = now - timedelta(days=3)
-
-    for rowid, history in rows:
-        if not history or not isinstance(history, str):
-            continue
-
-        # Split into non-empty lines
-        lines = [line.strip() for line in history.splitlines() if line.strip()]
-        if not lines:
-            continue
+    finished = False
+    while not finished:
+        deleted, finished = purge_expired(c, archive=archive_rows)
+        conn.commit()
+        deleted_count += deleted
+        time.sleep(0.01)
 
-        last_line = lines[-1]
-        # Extract timestamp from the start of the last line
-        timestamp_str = last_line.split(" | ", 1)[0].strip()
+    conn.close()
+    return deleted_count
 
-        try:
-            timestamp = datetime.fromisoformat(timestamp_str)
-        except ValueError:
-            # Skip lines that don't start with valid timestamps
+def main():
+    # With partitioning on, the rows live in one file per partition (see trackingPartitions.py)
+    deleted_count = 0
+    for db_file in PartitionLayout(DB_PATH, TRACKING_PARTITIONS).files:
+        if not os.path.exists(db_file):
+            print(f"⚠️ {db_file} not found, skipped.")
             continue
+        deleted_count += purge_file(db_file)
 
-        if timestamp < cutoff:
-            c.execute(f"DELETE FROM {TABLE_NAME} WHERE rowid = ?", (rowid,))
-            deleted_count += 1
-
-    conn.commit()
-    conn.close()
-
-    print(f"✅ Deleted {deleted_count} rows with last activity older than 3 days.")
+    print(f"✅ Archived {deleted_count} rows with last activity older than {DEFAULT_RETENTION_DAYS} days.")
 
 if __name__ == "__main__":
     main()
@@ -4,9 +4,30 @@ import json
 import sqlite3
 from threading import Lock, Thread
 from datetime import datetime
-from queue import Queue
+from collections import Counter
 import time
 import traceback
+from changeFeed import ChangeFeed
+from cutOptimizer import optimise_cut_list, DEFAULT_STOCK_LENGTHS, DEFAULT_KERF
+from retentionEngine import init_last_activity, purge_expired
+import trackingArchive
+from locationIndex import init_current_location, apply_location_writes, where_is, LOOKUP_KEYS
+from wipCounters import WipCounters, init_wip_table, location_deltas, persist_deltas
+from scanAnalytics import ScanAnalytics
+from stuckItems import StuckDetector
+from historyAppend import register_history_functions, append_to_lead, append_to_container
+from trackingExport import iter_events, format_ndjson, format_csv, ChunkedWriter
+from etaEstimator import EtaModel, init_eta_table
+from orderStatus import init_order_status, apply_status_writes, get_statuses, merge_statuses, KEY_TYPES as ORDER_KEY_TYPES
+from barcodeIndex import BarcodeIndex, SqlRowLookup, StaleIndex
+from historyLookup import lookup_rows, add_archived_rows, normalise_keys, ROW_COLUMNS
+from rowCache import RowCache
+from singleFlight import SingleFlight
+from trackingQueue import TrackingQueue, INTERACTIVE, BULK
+from trackingJournal import TrackingJournal
+from scanDedup import ScanDeduper
+from trackingPartitions import PartitionLayout, PartitionRouter, merge_counts, split_tracking_file
+from productionRollup import init_rollup_table, backfill as backfill_rollup, rollup_deltas, persist_rollup, query_rollup, GROUP_COLUMNS
 
 HOST = "0.0.0.0"
 PORT = 8080
@@ -15,11 +36,97 @@ PORT = 8080
 MAIN_DB_FILE = "prodigiAllyDatabase.db"
 TRACKING_DB_FILE = "trackingData.db"
 
+# Tracking rows can be split over TRACKING_PARTITIONS files (trackingData.p0.db, ...), items
+# hashed into them by order number, each file with its own writer thread and queue; 1 keeps
+# the single trackingData.db. Every read goes over all partitions (tracking_layout.read_all).
+# On the first start with more than one, the rows of trackingData.db are split into the new
+# files (split_tracking_file); going back to 1 is not automatic.
+TRACKING_PARTITIONS = 1
+tracking_layout = PartitionLayout(TRACKING_DB_FILE, TRACKING_PARTITIONS)
+partition_router = PartitionRouter(tracking_layout)
+
 # Locks for main DB
 db_lock_main = Lock()
 
-# Queue for tracking DB write requests
-tracking_queue = Queue()
+# Bounded queue per tracking partition for write requests: station scans go in the interactive
+# lane, print-station ingestion in the bulk lane; refused jobs are answered 503 + Retry-After
+tracking_queues = [TrackingQueue() for _partition in range(TRACKING_PARTITIONS)]
+
+# A batch the tracking worker fails to commit (e.g. database locked by serverJanitor) goes back
+# on its queue and is retried after this many seconds
+COMMIT_RETRY_DELAY = 1
+
+# A record whose batch has failed this many times with it at fault (the record being processed
+# when the error was raised, or every record of a batch whose commit failed) is moved to the
+# journal's dead-letter file instead of being retried again
+MAX_RECORD_ATTEMPTS = 10
+
+# Every queued record is journalled (fsync'd) before it is acknowledged and released once the
+# worker has committed it; whatever a crash leaves behind is replayed at startup
+tracking_journal = TrackingJournal()
+
+# Double-fired scans and retried requests are dropped before they are journalled or queued
+scan_deduper = ScanDeduper()
+
+# Sequenced log of every write (served by /api/changes, long-polled by stations for their tasks).
+# Clients further behind than CHANGE_FEED_MAX_ENTRIES changes are told to resync.
+CHANGE_FEED_MAX_ENTRIES = 20000
+change_feed = ChangeFeed(max_entries=CHANGE_FEED_MAX_ENTRIES)
+
+# Longest a long-poll request on the change feed may be held open (seconds)
+CHANGES_MAX_WAIT = 30
+
+# Largest page /api/changes returns in one response
+CHANGES_MAX_LIMIT = 1000
+
+# Retention: the tracking worker purges expired rows (see retentionEngine.py for the
+# per-prodType retention settings) in small batches whenever its queue is idle
+RETENTION_INTERVAL = 60
+retention_stats = {
+    "sweeps": 0,
+    "batches": 0,
+    "deleted": 0,
+    "lastSweepStarted": None,
+    "lastSweepFinished": None,
+    "lastSweepDeleted": 0,
+    "lastBatchSeconds": 0.0,
+    "inProgress": False
+}
+
+# Items at each workstation per prodType; the tracking worker keeps these current and
+# reconciles them against tracking_data every WIP_RECONCILE_INTERVAL seconds
+WIP_RECONCILE_INTERVAL = 600
+wip_counters = WipCounters()
+wip_stats = {
+    "reconciles": 0,
+    "lastReconciled": None,
+    "lastDrift": 0,
+    "totalDrift": 0
+}
+
+# Dwell / cycle-time / throughput stats, loaded once at startup and then kept current by the tracking worker
+scan_analytics = ScanAnalytics()
+
+# iso / lead / order -> rowid lookups for each partition's tracking worker; built at startup,
+# then kept exact by the worker itself from each job's writes
+barcode_indexes = [BarcodeIndex() for _partition in range(TRACKING_PARTITIONS)]
+
+# Read endpoints every station hits at once at shift start; concurrent identical requests
+# (same path and query string) share one query and one encoded response
+COALESCED_READS = ("/api/employees", "/api/facilityWorkstations", "/api/employeesTasks")
+read_flight = SingleFlight()
+
+# Recently touched tracking rows (history included) by isoBarcode / orderNumber for the read
+# endpoints; written through by the tracking worker after each commit
+row_cache = RowCache()
+
+# Time-to-packed quantiles per prodType and stage, relearnt every ETA_REFRESH_INTERVAL seconds
+ETA_REFRESH_INTERVAL = 900
+eta_model = EtaModel()
+
+# Items idle beyond their workstation's threshold, re-evaluated every STUCK_EVAL_INTERVAL seconds
+STUCK_EVAL_INTERVAL = 60
+stuck_detector = StuckDetector()
 
 # Debug flag - set to True for verbose logging
 DEBUG = True
@@ -28,6 +135,51 @@ def debug_log(message):
     if DEBUG:
         print(f"[DEBUG {datetime.now().strftime('%H:%M:%S.%f')[:-3]}] {message}")
 
+# Row snapshots published on the change feed, shaped like the matching GET endpoints
+def employee_change_row(cursor, employee_name):
+    cursor.execute("""
+        SELECT id, employeeName, password, hourlyRate, start_time, end_time, loggedIn
+        FROM employee_info WHERE employeeName = ?
+    """, (employee_name,))
+    r = cursor.fetchone()
+    if not r:
+        return None
+    return {"id": r[0], "employeeName": r[1], "password": r[2], "hourlyRate": r[3],
+            "start_time": r[4], "end_time": r[5], "loggedIn": bool(r[6])}
+
+def workstation_change_row(workstation, available_stations, eligible_list):
+    return {
+        "workstation": workstation,
+        "availableStations": available_stations if available_stations is not None else "",
+        "eligibleList": eligible_list
+    }
+
+TRACKING_COLUMNS = ("containerID", "orderNumber", "leadBarcode", "isoBarcode", "prodType", "size", "itemNum", "history")
+
+def parse_prod_date(value):
+    """
+    Turn a 'DD-MM-YY' date, or a size string carrying one as its prefix
+    ('DD-MM-YY/38mm/16x20"'), into 'YYYY-MM-DD'. ISO dates pass through.
+    Returns None if there is no date.
+    """
+    if not value:
+        return None
+    head = value.split("/", 1)[0].strip()
+    for fmt in ("%d-%m-%y", "%Y-%m-%d"):
+        try:
+            return datetime.strptime(head, fmt).strftime("%Y-%m-%d")
+        except ValueError:
+            continue
+    return None
+
+def add_missing_columns(cursor, table, columns):
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, definition in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+            debug_log(f"[INIT] Added column '{name}' to {table}")
+
 # Initialize databases
 def init_main_db():
     with sqlite3.connect(MAIN_DB_FILE) as conn:
@@ -82,6 +234,11 @@ def init_main_db():
             )
         """)
 
+        # Indexes for the filtered /api/employeesTasks queries and the isobarcode lookup in /api/updateEmployeeTask
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_employeesTasks_employee ON EmployeesTasks (employeeName)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_employeesTasks_status ON EmployeesTasks (status)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_employeesTasks_isobarcode ON EmployeesTasks (isobarcode)")
+
         # ---- Manual Tasks ----
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS manualTasks (
@@ -92,8 +249,8 @@ def init_main_db():
         conn.commit()
 
 
-def init_tracking_db():
-    with sqlite3.connect(TRACKING_DB_FILE) as conn:
+def init_tracking_db(db_file=TRACKING_DB_FILE, partition=0):
+    with sqlite3.connect(db_file) as conn:
         cursor = conn.cursor()
 
         # Create table if it doesn't exist (including new columns)
@@ -106,44 +263,810 @@ def init_tracking_db():
                 history TEXT,
                 itemNum INTEGER,
                 prodType TEXT,
-                size TEXT
+                size TEXT,
+                prodDate TEXT
             )
         """)
 
+        # Older databases predate some columns - add any that are missing
+        add_missing_columns(cursor, "tracking_data", [
+            ("itemNum", "INTEGER"),
+            ("prodType", "TEXT DEFAULT NULL"),
+            ("size", "TEXT"),
+            ("prodDate", "TEXT")
+        ])
+
+        # prodDate (YYYY-MM-DD) is the production date the print station prefixes onto size
+        # (dd-mm-yy/38mm/16x20"); backfill it for rows written before the column existed
+        cursor.execute("""
+            UPDATE tracking_data
+            SET prodDate = '20' || substr(size, 7, 2) || '-' || substr(size, 4, 2) || '-' || substr(size, 1, 2)
+            WHERE prodDate IS NULL AND size GLOB '[0-9][0-9]-[0-9][0-9]-[0-9][0-9]/*'
+        """)
+        if cursor.rowcount:
+            debug_log(f"[INIT] Backfilled prodDate for {cursor.rowcount} rows")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracking_prodDate ON tracking_data (prodDate)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tracking_containerID ON tracking_data (containerID)")
+        # receivePrintData finds rows with no container / no ISO yet in the barcode index, and in
+        # SQL (whole order on idx_tracking_orderNumber) only when that is stale, so the partial
+        # indexes it used to need would only slow down every write
+        cursor.execute("DROP INDEX IF EXISTS idx_tracking_no_container")
+        cursor.execute("DROP INDEX IF EXISTS idx_tracking_no_iso")
+
+        backfilled = init_last_activity(cursor)
+        if backfilled:
+            debug_log(f"[INIT] Backfilled last_activity for {backfilled} rows")
+
+        rebuilt = init_current_location(cursor)
+        if rebuilt:
+            debug_log(f"[INIT] Built current_location for {rebuilt} rows")
+
+        built = init_order_status(cursor)
+        if built:
+            debug_log(f"[INIT] Built order_status for {built} orders / lead barcodes")
+
+        init_eta_table(cursor)
+        # saveEtaQuantiles is always routed to the first partition
+        if partition == 0:
+            eta_model.load(cursor)
+
+        init_rollup_table(cursor)
+        cursor.execute("SELECT 1 FROM hourly_rollup LIMIT 1")
+        if cursor.fetchone() is None:
+            # Each archived scan is counted in one partition only, as productionReport sums them
+            counted = backfill_rollup(cursor, owns=lambda row: tracking_layout.owns(partition, row))
+            if counted:
+                debug_log(f"[INIT] Backfilled hourly rollups from {counted} scans")
+
+        init_wip_table(cursor)
+        drift = wip_counters.reconcile(cursor, partition)
+        if drift:
+            debug_log(f"[INIT] Rebuilt WIP counts ({drift} drifted)")
+
         conn.commit()
 
 init_main_db()
-init_tracking_db()
+split = split_tracking_file(TRACKING_DB_FILE, tracking_layout)
+if split:
+    debug_log(f"[INIT] Split {sum(split)} rows of {TRACKING_DB_FILE} into {TRACKING_PARTITIONS} partitions {split}")
+for partition, db_file in enumerate(tracking_layout.files):
+    init_tracking_db(db_file, partition)
+
+def load_partition(cursor, partition):
+    indexed = barcode_indexes[partition].load(cursor)
+    if TRACKING_PARTITIONS > 1:
+        partition_router.load(partition, cursor)
+    cursor.execute("SELECT rowid, prodType, history FROM tracking_data ORDER BY rowid")
+    # Analytics rows are keyed by global rowid, like every other in-memory view
+    return indexed, [(tracking_layout.global_rowid(r[0], partition), r[1], r[2]) for r in cursor.fetchall()]
+
+loaded = tracking_layout.read_all(load_partition)
+debug_log(f"[INIT] Loaded {scan_analytics.load_rows([r for _indexed, rows in loaded for r in rows])} scans for analytics")
+debug_log(f"[INIT] Indexed {sum(indexed for indexed, _rows in loaded)} tracking rows by barcode over {TRACKING_PARTITIONS} partition(s)")
+del loaded
+
+# Every row the tracking worker inserts, updates or deletes is noted in a TEMP table by these
+# connection-local triggers, so derived data can be maintained without touching each job.
+def install_tracking_triggers(cursor):
+    cursor.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS touched_rows (
+            rid INTEGER, op TEXT, old_history TEXT,
+            containerID INTEGER, orderNumber TEXT, leadBarcode TEXT, isoBarcode TEXT, prodType TEXT
+        )
+    """)
+    cursor.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS tracking_data_inserted AFTER INSERT ON main.tracking_data
+        BEGIN
+            INSERT INTO touched_rows (rid, op) VALUES (NEW.rowid, 'insert');
+        END
+    """)
+    cursor.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS tracking_data_updated AFTER UPDATE ON main.tracking_data
+        BEGIN
+            INSERT INTO touched_rows (rid, op, old_history, containerID, orderNumber, leadBarcode, isoBarcode, prodType)
+            VALUES (NEW.rowid, 'update', OLD.history, OLD.containerID, OLD.orderNumber, OLD.leadBarcode, OLD.isoBarcode, OLD.prodType);
+        END
+    """)
+    cursor.execute("""
+        CREATE TEMP TRIGGER IF NOT EXISTS tracking_data_deleted AFTER DELETE ON main.tracking_data
+        BEGIN
+            INSERT INTO touched_rows (rid, op, old_history, containerID, orderNumber, leadBarcode, isoBarcode, prodType)
+            VALUES (OLD.rowid, 'delete', OLD.history, OLD.containerID, OLD.orderNumber, OLD.leadBarcode, OLD.isoBarcode, OLD.prodType);
+        END
+    """)
+
+def collect_tracking_writes(cursor):
+    """
+    Drain touched_rows and return one dict per affected row: rowid, op, old_history, the
+    row's current columns (the deleted values for deletes) and old_row, its key columns
+    before the job (None for inserts). Several writes to the same row in one job collapse
+    into a single entry holding the first old_history / old_row.
+    """
+    cursor.execute(f"""
+        SELECT t.rid, t.op, t.old_history,
+               {', '.join(f'd.{c}' for c in TRACKING_COLUMNS)},
+               t.containerID, t.orderNumber, t.leadBarcode, t.isoBarcode, t.prodType
+        FROM touched_rows t
+        LEFT JOIN main.tracking_data d ON d.rowid = t.rid
+        ORDER BY t.rowid ASC
+    """)
+    rows = cursor.fetchall()
+    if not rows:
+        return []
+    cursor.execute("DELETE FROM touched_rows")
+
+    writes = {}
+    for r in rows:
+        rid, op, old_history = r[0], r[1], r[2]
+        old_row = dict(zip(("containerID", "orderNumber", "leadBarcode", "isoBarcode", "prodType"), r[-5:])) if op != "insert" else None
+        if op == "delete":
+            row = old_row
+        else:
+            row = dict(zip(TRACKING_COLUMNS, r[3:3 + len(TRACKING_COLUMNS)]))
+        if rid in writes:
+            # Keep the op / old history from the first write, the latest row values
+            first = writes[rid]
+            first["row"] = row
+            if op == "delete":
+                first["op"] = "delete" if first["op"] == "update" else None
+        else:
+            writes[rid] = {"rowid": rid, "op": op, "old_history": old_history, "row": row, "old_row": old_row}
+    return [w for w in writes.values() if w["op"]]
+
+def publish_tracking_writes(writes):
+    for write in writes:
+        change_feed.record("tracking_data", write["op"], write["rowid"], write["row"])
+
+def tracking_lookup_rows(lookups, include_archive=True):
+    """
+    lookup_rows across every tracking partition (in parallel), merged: rowids are made
+    global, and the archive is only consulted for keys no partition has.
+    """
+    def read(cursor, partition):
+        return lookup_rows(cursor, lookups, include_archive=False)
+
+    rows, matches = {}, {}
+    for partition, (found, found_matches) in enumerate(tracking_layout.read_all(read)):
+        for row in found.values():
+            row["rowid"] = tracking_layout.global_rowid(row["rowid"], partition)
+            rows.setdefault(row["rowid"], row)
+        for key_type, by_key in found_matches.items():
+            merged = matches.setdefault(key_type, {})
+            for key, rowids in by_key.items():
+                merged.setdefault(key, []).extend(tracking_layout.global_rowid(rowid, partition) for rowid in rowids)
+    for by_key in matches.values():
+        for rowids in by_key.values():
+            rowids.sort()
+    if include_archive:
+        add_archived_rows(rows, matches)
+    return rows, matches
+
+def tracking_where_is(lookups, limit=None):
+    """where_is across every tracking partition, with global trackingRowids."""
+    def read(cursor, partition):
+        items = where_is(cursor, lookups, limit)
+        for item in items:
+            item["trackingRowid"] = tracking_layout.global_rowid(item["trackingRowid"], partition)
+        return items
+
+    items = sorted((item for items in tracking_layout.read_all(read) for item in items), key=lambda item: item["trackingRowid"])
+    return items[:limit] if limit else items
+
+def tracking_statuses(lookups):
+    """get_statuses across every tracking partition, one merged status per key."""
+    return merge_statuses(tracking_layout.read_all(lambda cursor, _partition: get_statuses(cursor, lookups)))
+
+def tracking_cut_counts(date_from, date_to):
+    """[(prodType, size without its 'DD-MM-YY/' prefix, items)] for a production date range, over every partition."""
+    def read(cursor, _partition):
+        # Everything after the first '/', whatever the length of the date prefix
+        cursor.execute("""
+            SELECT prodType, substr(size, instr(size, '/') + 1) AS baseSize, COUNT(*)
+            FROM tracking_data
+            WHERE prodDate BETWEEN ? AND ?
+            GROUP BY prodType, baseSize
+        """, (date_from, date_to))
+        return cursor.fetchall()
+
+    return merge_counts(tracking_layout.read_all(read))
+
+def tracking_events(date_from, date_to):
+    """iter_events over each tracking partition in turn, with global rowids."""
+    for partition, db_file in enumerate(tracking_layout.files):
+        conn = sqlite3.connect(db_file)
+        try:
+            for event in iter_events(conn.cursor(), date_from, date_to):
+                event["rowid"] = tracking_layout.global_rowid(event["rowid"], partition)
+                yield event
+        finally:
+            conn.close()
+
+def cached_lookup_rows(lookups):
+    """
+    lookup_rows for the read endpoints: isoBarcode / orderNumber keys are answered from
+    row_cache where possible, the rest in one tracking_lookup_rows call whose hot rows are then cached.
+    """
+    generation = row_cache.generation
+    rows, missing = {}, {}
+    matches = {key_type: dict.fromkeys(keys) for key_type, keys in lookups.items()}
+    for key_type, keys in lookups.items():
+        for key in keys:
+            cached = None
+            if key_type == "isoBarcode":
+                row = row_cache.get_iso(key)
+                cached = [row] if row else None
+            elif key_type == "orderNumber":
+                cached = row_cache.get_order(key)
+            if cached is None:
+                missing.setdefault(key_type, []).append(key)
+                continue
+            for row in cached:
+                rows.setdefault(row["rowid"], row)
+            matches[key_type][key] = [row["rowid"] for row in cached]
+
+    if missing:
+        found, found_matches = tracking_lookup_rows(missing)
+        for ref, row in found.items():
+            rows.setdefault(ref, row)
+        for key_type, by_key in found_matches.items():
+            matches[key_type].update(by_key)
+            for key, refs in by_key.items():
+                # Archived rows (string refs) stay out of the cache
+                if not refs or not isinstance(refs[0], int):
+                    continue
+                if key_type == "orderNumber":
+                    row_cache.put_order(key, [found[ref] for ref in refs], generation)
+                elif key_type == "isoBarcode":
+                    row_cache.put_rows([found[ref] for ref in refs], generation)
+    return rows, matches
+
+def retention_step(partition=0):
+    """
+    Run one time-bounded purge batch on a partition; returns True once its current sweep is
+    finished. With several partitions the stats are shared, so they sum over partitions.
+    """
+    started = time.time()
+    if not retention_stats["inProgress"]:
+        retention_stats.update(inProgress=True, lastSweepStarted=started, lastSweepDeleted=0)
+
+    conn = sqlite3.connect(tracking_layout.files[partition])
+    cursor = conn.cursor()
+    install_tracking_triggers(cursor)
+    # Rows are written to the cold archive before they are deleted from the hot table
+    deleted, finished = purge_expired(cursor, archive=trackingArchive.archive_rows)
+    writes = collect_tracking_writes(cursor)
+    deltas = location_deltas(*apply_location_writes(cursor, writes))
+    persist_deltas(cursor, deltas)
+    apply_status_writes(cursor, writes)
+    conn.commit()
+    conn.close()
+    barcode_indexes[partition].apply(writes)
+    partition_router.apply(partition, writes)
+    writes = tracking_layout.globalise_writes(writes, partition)
+    row_cache.apply(writes)
+    wip_counters.apply(deltas, partition)
+    scan_analytics.apply(writes)
+    stuck_detector.touch(writes)
+    publish_tracking_writes(writes)
+
+    retention_stats["batches"] += 1
+    retention_stats["deleted"] += deleted
+    retention_stats["lastSweepDeleted"] += deleted
+    retention_stats["lastBatchSeconds"] = round(time.time() - started, 4)
+    if finished:
+        retention_stats.update(inProgress=False, lastSweepFinished=time.time())
+        retention_stats["sweeps"] += 1
+    if deleted:
+        debug_log(f"[RETENTION] Archived {deleted} expired rows, finished={finished}")
+    return finished
+
+def reconcile_wip(partition=0):
+    """Correct any drift between a partition's WIP counters and its tracking_data."""
+    conn = sqlite3.connect(tracking_layout.files[partition])
+    cursor = conn.cursor()
+    drift = wip_counters.reconcile(cursor, partition)
+    conn.commit()
+    conn.close()
+    wip_stats["reconciles"] += 1
+    wip_stats["lastReconciled"] = time.time()
+    wip_stats["lastDrift"] = drift
+    wip_stats["totalDrift"] += drift
+    if drift:
+        debug_log(f"[WIP] Reconciled {drift} drifted counts")
 
 # Worker thread for processing tracking DB queue
-def tracking_worker():
+# Tracking writes are queued and journalled as plain records (see submit_tracking_record) and
+# applied by these functions on the tracking worker's cursor, one per record kind, with that
+# partition's barcode index. The history line is stamped with the time the request was
+# received, so a replayed record keeps it.
+def order_track_job(cursor, record, index):
+    containerID = record["containerID"]
+    orderNumber = record["orderNumber"]
+    isoBarcode = record["isoBarcode"]
+    leadBarcode = record["leadBarcode"]
+    workstation = record["workstation"]
+    employeeName = record["employeeName"]
+    itemNum = record["itemNum"]
+    prodType = record["prodType"]
+
+    # Normalize containerID to int
+    if containerID is not None:
+        try:
+            containerID = int(containerID)
+        except ValueError:
+            containerID = None
+
+    # Create history entry
+    new_history_entry = f"{record['timestamp']} | {workstation} | {employeeName}"
+
+    # Rows are found in the barcode index; SQLite is only touched for the write itself, which
+    # appends the history line (FloatCanv rule on) via the append_history SQL function
+
+    # --- ISO barcode branch ---
+    if isoBarcode:
+        debug_log(f"[ISO] Processing isoBarcode={isoBarcode}")
+        rowid = index.iso_rowid(isoBarcode)
+
+        if rowid is not None:
+            # Exact isoBarcode match
+            debug_log(f"[ISO] Found existing row for isoBarcode={isoBarcode}")
+            cursor.execute("""
+                UPDATE tracking_data
+                SET history = append_history(history, ?, 1),
+                    containerID = COALESCE(?, containerID),
+                    orderNumber = COALESCE(NULLIF(?, ''), orderNumber),
+                    leadBarcode = COALESCE(NULLIF(?, ''), leadBarcode),
+                    prodType = ?
+                WHERE rowid = ?
+            """, (new_history_entry, containerID, orderNumber, leadBarcode, prodType, rowid))
+            if cursor.rowcount == 0:
+                raise StaleIndex(rowid)
+            debug_log(f"[ISO] Updated row for isoBarcode={isoBarcode}")
+
+        else:
+            # No isoBarcode match → try orderNumber match
+            debug_log(f"[ISO] No existing row for isoBarcode={isoBarcode}, trying orderNumber match")
+            rows = [(rid, row) for rid, row in index.order_rows(orderNumber) if row["isoBarcode"] is None]
+
+            # Step 1: Find row with matching prodType
+            matching_row = next((r for r in rows if r[1]["prodType"] == prodType), None)
+
+            if matching_row:
+                rowid = matching_row[0]
+                debug_log(f"[ISO] Found row with matching prodType for orderNumber={orderNumber}")
+
+            else:
+                # Step 2: Fallback to row where prodType is NULL
+                null_prod_row = next((r for r in rows if r[1]["prodType"] is None), None)
+                if null_prod_row:
+                    rowid = null_prod_row[0]
+                    debug_log(f"[ISO] Using row with NULL prodType for orderNumber={orderNumber}")
+                else:
+                    # Step 3: No suitable row → insert new
+                    rowid = None
+                    debug_log(f"[ISO] No matching or NULL prodType row, inserting new for orderNumber={orderNumber}")
+
+            if rowid:
+                # Update the chosen row
+                cursor.execute("""
+                    UPDATE tracking_data
+                    SET containerID = COALESCE(?, containerID),
+                        leadBarcode = COALESCE(NULLIF(?, ''), leadBarcode),
+                        isoBarcode = ?,
+                        history = append_history(history, ?, 1),
+                        prodType = ?
+                    WHERE rowid = ?
+                """, (containerID, leadBarcode, isoBarcode, new_history_entry, prodType, rowid))
+                if cursor.rowcount == 0:
+                    raise StaleIndex(rowid)
+                debug_log(f"[ISO] Updated row for isoBarcode={isoBarcode}")
+            else:
+                # Insert new row
+                cursor.execute("""
+                    INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, history, prodType)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, (containerID, orderNumber, leadBarcode, isoBarcode, new_history_entry, prodType))
+                debug_log(f"[ISO] Inserted new row for isoBarcode={isoBarcode}")
+
+
+    # --- Lead barcode branch ---
+    if leadBarcode:
+        debug_log(f"[Lead] Processing leadBarcode={leadBarcode}")
+        # One set-based UPDATE for the whole lead instead of a round trip per ISO
+        updated = append_to_lead(cursor, leadBarcode, new_history_entry, containerID, orderNumber)
+        debug_log(f"[Lead] Updated {updated} rows for leadBarcode={leadBarcode}")
+
+    # --- Order-number-only branch ---
+    if not isoBarcode and not leadBarcode and containerID:
+        debug_log(f"[OrderOnly] Processing orderNumber={orderNumber}")
+
+        # --- Step 0: Normalize prodType ---
+        try:
+            with sqlite3.connect(MAIN_DB_FILE, uri=True, timeout=5, check_same_thread=False) as conn_readonly:
+                conn_readonly.execute("PRAGMA query_only = 1")  # Read-only mode
+                cursor_readonly = conn_readonly.cursor()
+                cursor_readonly.execute("""
+                    SELECT worksheetRef
+                    FROM product_codes
+                    WHERE prod_type = ?
+                    LIMIT 1
+                """, (prodType,))
+                result = cursor_readonly.fetchone()
+                if result and result[0] is not None:
+                    old_prodType = prodType
+                    prodType = result[0]  # Replace with worksheetRef
+                    debug_log(f"[OrderOnly] Normalized prodType '{old_prodType}' -> '{prodType}'")
+                else:
+                    # --- Step 0b: Log missing prodType before setting to None ---
+                    if prodType:
+                        try:
+                            existing_lines = set()
+                            try:
+                                with open("missing_prodTypes.txt", "r", encoding="utf-8") as f:
+                                    existing_lines = set(line.strip() for line in f if line.strip())
+                            except FileNotFoundError:
+                                pass  # file doesn't exist yet
+
+                            if prodType not in existing_lines:
+                                with open("missing_prodTypes.txt", "a", encoding="utf-8") as f:
+                                    f.write(prodType + "\n")
+                                debug_log(f"[OrderOnly] Logged missing prodType: '{prodType}'")
+                        except Exception as e:
+                            debug_log(f"[OrderOnly] Failed to log missing prodType '{prodType}': {e}")
+
+                    prodType = None
+                    debug_log(f"[OrderOnly] prodType not found in product_codes, set to None")
+        except Exception as e:
+            debug_log(f"[OrderOnly] Failed to normalize prodType '{prodType}': {e}")
+            prodType = None
+
+        # --- Step 1: Find rows with orderNumber and itemNum IS NULL ---
+        rows = [(rid, row) for rid, row in index.order_rows(orderNumber) if row["itemNum"] is None]
+
+        if rows:
+            # Step 2: Prefer a row with matching prodType, else (step 3) the first row with a differing one
+            matching_row = next((r for r in rows if r[1]["prodType"] == prodType), None)
+            rowid = (matching_row or rows[0])[0]
+            # prodType is only overwritten when it normalised to a known worksheetRef
+            cursor.execute("""
+                UPDATE tracking_data
+                SET containerID = ?, itemNum = ?, history = append_history(history, ?, 1), prodType = COALESCE(?, prodType)
+                WHERE rowid = ?
+            """, (containerID, itemNum, new_history_entry, prodType, rowid))
+            if cursor.rowcount == 0:
+                raise StaleIndex(rowid)
+            if matching_row:
+                debug_log(f"[OrderOnly] Updated row with matching prodType for orderNumber={orderNumber}")
+            else:
+                debug_log(f"[OrderOnly] Updated row with differing prodType for orderNumber={orderNumber}")
+        else:
+            # Step 4: Insert new row
+            if prodType is not None:
+                cursor.execute("""
+                    INSERT INTO tracking_data (containerID, orderNumber, itemNum, prodType, history)
+                    VALUES (?, ?, ?, ?, ?)
+                """, (containerID, orderNumber, itemNum, prodType, new_history_entry))
+            else:
+                cursor.execute("""
+                    INSERT INTO tracking_data (containerID, orderNumber, itemNum, history)
+                    VALUES (?, ?, ?, ?)
+                """, (containerID, orderNumber, itemNum, new_history_entry))
+            debug_log(f"[OrderOnly] Inserted new row for orderNumber={orderNumber}")
+
+
+def receive_print_data_job(cursor, record, index):
+    containerID = record["containerID"]
+    orderNumber = record["orderNumber"]
+    leadBarcode = record["leadBarcode"]
+    isoBarcode = record["isoBarcode"]
+    workstation = record["workstation"]
+    employeeName = record["employeeName"]
+    prodType = record["prodType"]
+    size = record["size"]
+    itemNum = record["itemNum"]
+
+    # Create history entry
+    new_history_entry = f"{record['timestamp']} | {workstation} | {employeeName}"
+
+    # ---------------------------------------------------------
+    # 1) Normal CONTAINER branch
+    # ---------------------------------------------------------
+    if containerID is not None and orderNumber is not None:
+        # Attach to the oldest row of the order without a container
+        rowid = next((rid for rid, row in index.order_rows(orderNumber) if row["containerID"] is None), None)
+        if rowid is not None:
+            cursor.execute(
+                """
+                UPDATE tracking_data
+                SET containerID = ?, itemNum = ?, history = append_history(history, ?, 0)
+                WHERE rowid = ?
+                """,
+                (containerID, itemNum, new_history_entry, rowid)
+            )
+            if cursor.rowcount == 0:
+                raise StaleIndex(rowid)
+            debug_log(f"[RECEIVE] Attached containerID={containerID} and itemNum={itemNum} to existing order={orderNumber}.")
+            return
+
+        cursor.execute(
+            """
+            INSERT INTO tracking_data (containerID, orderNumber, itemNum, history)
+            VALUES (?, ?, ?, ?)
+            """,
+            (containerID, orderNumber, itemNum, new_history_entry)
+        )
+        debug_log(f"[RECEIVE] Created new row for orderNumber={orderNumber} with containerID={containerID} and itemNum={itemNum}.")
+        return
+
+    # ---------------------------------------------------------
+    # 2) ISO BRANCH
+    # ---------------------------------------------------------
+    if isoBarcode:
+        prod_date = parse_prod_date(size)
+
+        # An unknown ISO is merged into the oldest row of its order that has no ISO yet
+        merge_rowid = None
+        if index.iso_rowid(isoBarcode) is None and orderNumber:
+            merge_rowid = next((rid for rid, row in index.order_rows(orderNumber) if row["isoBarcode"] is None), None)
+
+        if merge_rowid is not None:
+            cursor.execute("""
+                UPDATE tracking_data
+                SET isoBarcode = ?, leadBarcode = ?, prodType = ?, size = ?, prodDate = ?, history = append_history(history, ?, 0)
+                WHERE rowid = ?
+            """, (isoBarcode, leadBarcode, prodType, size, prod_date, new_history_entry, merge_rowid))
+            if cursor.rowcount == 0:
+                raise StaleIndex(merge_rowid)
+            debug_log(f"[RECEIVE] Merged new ISO into existing order row {orderNumber}.")
+            return
+
+        # Otherwise one upsert: an existing ISO row is updated in place (given values win,
+        # blanks keep what is stored) and an unknown ISO is inserted
+        cursor.execute(
+            """
+            INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, prodType, size, prodDate, history)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (isoBarcode) DO UPDATE SET
+                history = append_history(history, excluded.history, 0),
+                containerID = COALESCE(excluded.containerID, containerID),
+                orderNumber = COALESCE(NULLIF(excluded.orderNumber, ''), orderNumber),
+                leadBarcode = COALESCE(NULLIF(excluded.leadBarcode, ''), leadBarcode),
+                prodType = COALESCE(excluded.prodType, prodType),
+                size = COALESCE(excluded.size, size),
+                prodDate = CASE WHEN excluded.size IS NOT NULL THEN excluded.prodDate ELSE prodDate END
+            """,
+            (containerID, orderNumber, leadBarcode, isoBarcode, prodType, size, prod_date, new_history_entry)
+        )
+        debug_log(f"[RECEIVE] Upserted ISO row {isoBarcode}.")
+        return
+
+
+def move_container_job(cursor, record, index):
+    isoBarcode = record["isoBarcode"]
+    leadBarcode = record["leadBarcode"]
+    workstation = record["workstation"]
+    employeeName = record["employeeName"]
+    new_history_entry = f"{record['timestamp']} | {workstation} | {employeeName}"
+
+    containerID = None
+    if isoBarcode:
+        row = index.get(index.iso_rowid(isoBarcode))
+        if row:
+            containerID = row["containerID"]
+    if not containerID and leadBarcode:
+        rows = index.lead_rows(leadBarcode)
+        if rows:
+            containerID = rows[0][1]["containerID"]
+    if not containerID:
+        # The container's rows in other partitions: the router resolved it up front
+        containerID = record.get("containerID")
+
+    if containerID:
+        # One set-based UPDATE for the whole container instead of a round trip per ISO
+        append_to_container(cursor, containerID, new_history_entry)
+
+def save_eta_quantiles_job(cursor, record, index):
+    eta_model.persist(cursor)
+
+TRACKING_JOBS = {
+    "orderTrack": order_track_job,
+    "receivePrintData": receive_print_data_job,
+    "moveContainer": move_container_job,
+    "saveEtaQuantiles": save_eta_quantiles_job
+}
+
+def submit_tracking_record(record, lane=INTERACTIVE):
+    """
+    Stamp, journal and queue a tracking record on each partition it touches (see
+    PartitionRouter.route); False if a queue refused it.
+    """
+    targets = partition_router.route(record)
+    if not all(tracking_queues[partition].admits(lane) for partition, _target in targets):
+        return False
+    timestamp = datetime.now().replace(second=0, microsecond=0).isoformat()
+    for i, (partition, target) in enumerate(targets):
+        target.update(timestamp=timestamp, lane=lane, partition=partition, partitions=TRACKING_PARTITIONS)
+        # Durable before it is queued, so the worker can never release a record not yet journalled
+        tracking_journal.append(target)
+        # Once one copy is queued the record is accepted, so the others skip admission
+        if tracking_queues[partition].put(target, lane, force=i > 0):
+            continue
+        tracking_journal.release([target])
+        return False
+    return True
+
+def tracking_retry_after():
+    return max(queue.retry_after() for queue in tracking_queues)
+
+def tracking_queue_size():
+    return sum(queue.qsize() for queue in tracking_queues)
+
+def tracking_queue_stats():
+    """Queue stats for /api/metrics and /api/health, with a per-partition breakdown when partitioned."""
+    stats = [queue.stats() for queue in tracking_queues]
+    if len(stats) == 1:
+        return stats[0]
+    return {
+        "size": sum(s["size"] for s in stats),
+        "pressure": max(s["pressure"] for s in stats),
+        "shedding": any(s["shedding"] for s in stats),
+        "partitions": stats
+    }
+
+def tracking_worker(partition=0):
+    tracking_queue = tracking_queues[partition]
+    barcode_index = barcode_indexes[partition]
+    next_retention = time.time()
+    next_reconcile = time.time() + WIP_RECONCILE_INTERVAL
+    # Set when a failed batch left the in-memory index ahead of the database, or a job found
+    # an indexed row deleted behind the writer's back
+    index_stale = False
     while True:
         if tracking_queue.empty():
+            if time.time() >= next_reconcile:
+                try:
+                    reconcile_wip(partition)
+                except Exception as e:
+                    debug_log(f"[WIP] Error reconciling counts: {e}")
+                next_reconcile = time.time() + WIP_RECONCILE_INTERVAL
+                continue
+            # Purge between batches only, one small batch at a time, so scans are never held up for long
+            if time.time() >= next_retention:
+                try:
+                    if retention_step(partition):
+                        next_retention = time.time() + RETENTION_INTERVAL
+                except Exception as e:
+                    debug_log(f"[RETENTION] Error purging expired rows: {e}")
+                    next_retention = time.time() + RETENTION_INTERVAL
+                continue
             time.sleep(0.1)
             continue
-        batch = []
-        while not tracking_queue.empty():
-            batch.append(tracking_queue.get())
+        batch = tracking_queue.get_batch()
         batch_start = datetime.now()
         debug_log(f"[QUEUE] Processing batch of {len(batch)} items")
-        conn = sqlite3.connect(TRACKING_DB_FILE)
+        conn = sqlite3.connect(tracking_layout.files[partition])
+        register_history_functions(conn)
         cursor = conn.cursor()
-        for job in batch:
-            start_time = datetime.now()
-            try:
-                job(cursor)
-            except Exception as e:
-                debug_log(f"[QUEUE] Error processing job: {e}")
-            end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
-            debug_log(f"[QUEUE] Finished job {job.__name__}, duration={duration:.4f}s")
-        conn.commit()
+        install_tracking_triggers(cursor)
+        writes = []
+        batch_deltas = Counter()
+        # The record being processed, so a failure can be charged to it
+        current = None
+        try:
+            if index_stale:
+                barcode_index.load(cursor)
+                if TRACKING_PARTITIONS > 1:
+                    partition_router.load(partition, cursor)
+                index_stale = False
+            for record in batch:
+                current = record
+                start_time = datetime.now()
+                job = TRACKING_JOBS[record["kind"]]
+                try:
+                    try:
+                        job(cursor, record, barcode_index)
+                    except StaleIndex as e:
+                        # Jobs raise it before writing anything: redo this one on SQL lookups and
+                        # rebuild the index before the next batch
+                        debug_log(f"[QUEUE] Tracking row {e} is gone from the database, index is stale")
+                        index_stale = True
+                        job(cursor, record, SqlRowLookup(cursor))
+                except sqlite3.OperationalError:
+                    # Locked / busy / I/O: the database, not the record, is at fault - retry the batch
+                    raise
+                except Exception as e:
+                    debug_log(f"[QUEUE] Error processing {record.get('kind')} record: {e}")
+                job_writes = collect_tracking_writes(cursor)
+                # Later jobs in the batch look their rows up in the index, so it follows every job
+                barcode_index.apply(job_writes)
+                # current_location, wip_counts, hourly_rollup and order_status are updated in the same transaction as the tracking rows they mirror
+                deltas = location_deltas(*apply_location_writes(cursor, job_writes))
+                persist_deltas(cursor, deltas)
+                batch_deltas.update(deltas)
+                persist_rollup(cursor, rollup_deltas(job_writes))
+                apply_status_writes(cursor, job_writes)
+                writes.extend(job_writes)
+                end_time = datetime.now()
+                duration = (end_time - start_time).total_seconds()
+                debug_log(f"[QUEUE] Finished {record['kind']} record, duration={duration:.4f}s")
+            current = None
+            conn.commit()
+        except sqlite3.Error as e:
+            # Nothing from the batch was stored; retry it (after rebuilding the index from what
+            # is) - its records were acknowledged, so they stay journalled until committed or,
+            # once they have failed MAX_RECORD_ATTEMPTS times, dead-lettered
+            conn.rollback()
+            conn.close()
+            index_stale = True
+            for record in ([current] if current is not None else batch):
+                record["attempts"] = record.get("attempts", 0) + 1
+            dead = [record for record in batch if record.get("attempts", 0) >= MAX_RECORD_ATTEMPTS]
+            if dead:
+                tracking_journal.dead_letter(dead, str(e))
+                debug_log(f"[QUEUE] Gave up on {len(dead)} records after {MAX_RECORD_ATTEMPTS} failed attempts: {e}")
+                batch = [record for record in batch if record.get("attempts", 0) < MAX_RECORD_ATTEMPTS]
+            tracking_queue.requeue(batch, lambda record: record.get("lane", INTERACTIVE))
+            debug_log(f"[QUEUE] Error writing batch, rolled back and requeued {len(batch)} records: {e}")
+            time.sleep(COMMIT_RETRY_DELAY)
+            continue
         conn.close()
+        # Committed, so the records no longer need replaying
+        tracking_journal.release(batch)
+        partition_router.apply(partition, writes)
+        writes = tracking_layout.globalise_writes(writes, partition)
+        row_cache.apply(writes)
+        wip_counters.apply(batch_deltas, partition)
+        scan_analytics.apply(writes)
+        stuck_detector.touch(writes)
+        publish_tracking_writes(writes)
         batch_end = datetime.now()
         batch_duration = (batch_end - batch_start).total_seconds()
+        tracking_queue.record_drain(len(batch), batch_duration)
         debug_log(f"[QUEUE] Finished batch, duration={batch_duration:.4f}s")
 
-Thread(target=tracking_worker, daemon=True).start()
+recovered = tracking_journal.recover()
+for record in recovered:
+    # Records journalled under another partition count are routed afresh
+    if record.get("partitions") == TRACKING_PARTITIONS:
+        targets = [(record["partition"], record)]
+    else:
+        targets = partition_router.route(record)
+    for partition, target in targets:
+        # Already acknowledged, so admitted regardless of queue pressure
+        target.update(partition=partition, partitions=TRACKING_PARTITIONS)
+        tracking_queues[partition].put(target, target.get("lane", INTERACTIVE), force=True)
+if recovered:
+    debug_log(f"[INIT] Replaying {len(recovered)} journalled tracking records")
+
+for partition in range(TRACKING_PARTITIONS):
+    Thread(target=tracking_worker, args=(partition,), daemon=True).start()
+
+# Background thread keeping the stuck-item cache current; reads only, on its own connections
+def stuck_evaluator():
+    while True:
+        try:
+            examined = stuck_detector.evaluate(tracking_layout)
+            debug_log(f"[STUCK] Examined {examined} rows, {len(stuck_detector.snapshot())} items stuck")
+        except Exception as e:
+            debug_log(f"[STUCK] Error evaluating stuck items: {e}")
+        time.sleep(STUCK_EVAL_INTERVAL)
+
+Thread(target=stuck_evaluator, daemon=True).start()
+
+# Relearns the ETA quantile tables off the request path; the tracking worker saves them
+def eta_refresher():
+    while True:
+        try:
+            size = eta_model.refresh(tracking_layout)
+
+            # Skipped while the queue is shedding load; the next refresh saves them instead
+            submit_tracking_record({"kind": "saveEtaQuantiles"}, BULK)
+            debug_log(f"[ETA] Refreshed {size} quantile rows")
+        except Exception as e:
+            debug_log(f"[ETA] Error refreshing quantiles: {e}")
+        time.sleep(ETA_REFRESH_INTERVAL)
+
+Thread(target=eta_refresher, daemon=True).start()
 
 class SimpleHandler(BaseHTTPRequestHandler):
     def log_message(self, format, *args):
@@ -153,7 +1076,7 @@ class SimpleHandler(BaseHTTPRequestHandler):
         """Send CORS headers to allow cross-origin requests"""
         self.send_header("Access-Control-Allow-Origin", "https://pro.oneflowcloud.com")
         self.send_header("Access-Control-Allow-Methods", "GET, POST, OPTIONS")
-        self.send_header("Access-Control-Allow-Headers", "Content-Type, Accept")
+        self.send_header("Access-Control-Allow-Headers", "Content-Type, Accept, Idempotency-Key")
         self.send_header("Access-Control-Max-Age", "86400")
 
     def do_OPTIONS(self):
@@ -162,23 +1085,48 @@ class SimpleHandler(BaseHTTPRequestHandler):
         self.send_cors_headers()
         self.end_headers()
 
-    def enqueue_tracking_job(self, job_func):
-        tracking_queue.put(job_func)
-        debug_log(f"[QUEUE] Enqueued job {job_func.__name__}, queue size={tracking_queue.qsize()}")
+    def enqueue_tracking_job(self, record, lane=INTERACTIVE):
+        # An idempotency key may come as a header or as ?idempotencyKey=
+        idempotency_key = self.headers.get("Idempotency-Key") or \
+            urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query).get("idempotencyKey", [None])[0]
+        dropped = scan_deduper.claim(record, idempotency_key)
+        if dropped:
+            debug_log(f"[QUEUE] Dropped {dropped} {record['kind']} record")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_cors_headers()
+            self.end_headers()
+            # A repeated idempotency key was queued the first time; a double-fired scan never is
+            self.wfile.write(json.dumps({"status": "success", "queued": dropped == "idempotent", "duplicate": True}).encode("utf-8"))
+            return
+        if not submit_tracking_record(record, lane):
+            scan_deduper.forget(record, idempotency_key)
+            retry_after = tracking_retry_after()
+            debug_log(f"[QUEUE] Refused {lane} {record['kind']} record, queue size={tracking_queue_size()}, retry after {retry_after}s")
+            self.send_response(503)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Retry-After", str(retry_after))
+            self.send_cors_headers()
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                "status": "error",
+                "message": "Tracking queue is full, retry later",
+                "queued": False,
+                "retryAfter": retry_after
+            }).encode("utf-8"))
+            return
+        debug_log(f"[QUEUE] Enqueued {lane} {record['kind']} record, queue size={tracking_queue_size()}")
         self.send_response(200)
         self.send_header("Content-Type", "application/json")
         self.send_cors_headers()
         self.end_headers()
         self.wfile.write(json.dumps({"status": "success", "queued": True}).encode("utf-8"))
 
-    def do_GET(self):
-        parsed_path = urllib.parse.urlparse(self.path)
-        query = urllib.parse.parse_qs(parsed_path.query)
-        
-        debug_log(f"[GET] Path: '{parsed_path.path}', Query: {query}")
-
-        if parsed_path.path == "/api/employees":
+    def build_shared_read(self, path, query):
+        """Encoded body for a COALESCED_READS endpoint; built once per flight of identical requests."""
+        if path == "/api/employees":
             debug_log("[GET] Fetching employees")
+            seq = change_feed.seq
             with db_lock_main:
                 conn = sqlite3.connect(MAIN_DB_FILE)
                 cursor = conn.cursor()
@@ -187,11 +1135,128 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 conn.close()
             response = {
                 "status": "success",
-                "employees": [{"id": r[0], "employeeName": r[1], "password": r[2], "hourlyRate": r[3]} for r in rows]
+                "employees": [{"id": r[0], "employeeName": r[1], "password": r[2], "hourlyRate": r[3]} for r in rows],
+                "seq": seq,
+                "epoch": change_feed.epoch
             }
             debug_log(f"[GET] Returning {len(rows)} employees")
 
-        elif parsed_path.path == "/api/getOrdersByBarcode":
+        elif path == "/api/employeesTasks":
+            debug_log("[GET] Fetching employees tasks")
+            try:
+                # Read the change cursor first so anything committed during the query is replayed, not lost
+                seq = change_feed.seq
+
+                # Optional filters - each may be repeated; tasks assigned to a workstation use its name as employeeName
+                names = query.get("employeeName", []) + query.get("workstation", [])
+                statuses = query.get("status", [])
+                isobarcodes = query.get("isobarcode", [])
+
+                # Keyset pagination on rowid
+                after = int(query.get("after", ["0"])[0])
+                limit = int(query.get("limit", ["0"])[0])
+
+                conditions, params = ["rowid > ?"], [after]
+                for column, values in (("employeeName", names), ("status", statuses), ("isobarcode", isobarcodes)):
+                    if values:
+                        conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                        params.extend(values)
+
+                sql = f"""
+                    SELECT rowid, employeeName, liveTask, status, isobarcode
+                    FROM EmployeesTasks
+                    WHERE {' AND '.join(conditions)}
+                    ORDER BY rowid ASC
+                """
+                if limit > 0:
+                    sql += " LIMIT ?"
+                    params.append(limit)
+
+                conn = sqlite3.connect(MAIN_DB_FILE)
+                cursor = conn.cursor()
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+                conn.close()
+
+                # Convert to 2D list format - now includes isobarcode
+                tasks_list = [[r[1], r[2], r[3], r[4]] for r in rows]
+
+                response = {
+                    "status": "success",
+                    "tasks": tasks_list,
+                    "rowids": [r[0] for r in rows],
+                    # Pass back as ?after= for the next page; None once the last page has been returned
+                    "nextAfter": rows[-1][0] if limit > 0 and len(rows) == limit else None,
+                    "seq": seq,
+                    "epoch": change_feed.epoch
+                }
+                debug_log(f"[GET] Returning {len(tasks_list)} employee tasks")
+
+            except Exception as e:
+                debug_log(f"[GET] Error fetching employees tasks: {e}")
+                response = {
+                    "status": "error",
+                    "message": str(e)
+                }
+
+        elif path == "/api/facilityWorkstations":
+            debug_log("[GET] Fetching facility workstations")
+            seq = change_feed.seq
+            with db_lock_main:
+                conn = sqlite3.connect(MAIN_DB_FILE)
+                cursor = conn.cursor()
+                cursor.execute("SELECT workstation, availableStations, eligibleList FROM facility_workstations")
+                rows = cursor.fetchall()
+                conn.close()
+
+            workstations, availableStations, eligibleList = [], [], []
+
+            for r in rows:
+                ws_name = r[0] if r[0] is not None else ""
+                workstations.append(ws_name)
+                available = r[1] if r[1] is not None else ""
+                availableStations.append(available)
+                try:
+                    eligible = json.loads(r[2]) if r[2] else []
+                except (json.JSONDecodeError, TypeError):
+                    eligible = []
+                if not isinstance(eligible, (list, tuple)):
+                    eligible = []
+                eligibleList.append(eligible)
+
+            response = {
+                "status": "success",
+                "workstations": workstations,
+                "availableStations": availableStations,
+                "eligibleList": eligibleList,
+                "seq": seq,
+                "epoch": change_feed.epoch
+            }
+            debug_log(f"[GET] Returning {len(workstations)} workstations")
+
+        return json.dumps(response).encode("utf-8")
+
+    def do_GET(self):
+        parsed_path = urllib.parse.urlparse(self.path)
+        query = urllib.parse.parse_qs(parsed_path.query)
+        
+        debug_log(f"[GET] Path: '{parsed_path.path}', Query: {query}")
+
+        # Identical concurrent reads (e.g. every station logging in at shift start) share one
+        # query and one encoded response. The change feed position is part of the key: every
+        # write advances it once committed, so a read never joins a flight that started before
+        # a write it has already seen acknowledged
+        if parsed_path.path in COALESCED_READS:
+            flight_key = (self.path, change_feed.seq)
+            body = read_flight.do(flight_key, lambda: self.build_shared_read(parsed_path.path, query), label=parsed_path.path)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_cors_headers()
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        if parsed_path.path == "/api/getOrdersByBarcode":
             debug_log("[GET] Fetching orders by barcode")
 
             barcode = query.get("Barcode", [None])[0]
@@ -204,20 +1269,12 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 return
 
             try:
-                conn = sqlite3.connect(TRACKING_DB_FILE)
-                cursor = conn.cursor()
+                # Step 1: Find containerID by matching isoBarcode or leadBarcode - one indexed
+                # lookup per column rather than an OR that forces a table scan
+                found, _matches = tracking_lookup_rows({"isoBarcode": barcode, "leadBarcode": barcode}, include_archive=False)
+                row = found[min(found)] if found else None
 
-                # Step 1: Find containerID by matching isoBarcode or leadBarcode
-                cursor.execute("""
-                    SELECT containerID
-                    FROM tracking_data
-                    WHERE isoBarcode = ? OR leadBarcode = ?
-                    LIMIT 1
-                """, (barcode, barcode))
-                row = cursor.fetchone()
-
-                if not row or row[0] is None:
-                    conn.close()
+                if not row or row["containerID"] is None:
                     self.send_response(200)
                     self.send_header("Content-Type", "application/json")
                     self.send_cors_headers()
@@ -230,16 +1287,18 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     }).encode("utf-8"))
                     return
 
-                container_id = row[0]
+                container_id = row["containerID"]
 
-                # Step 2: Fetch *all* rows for that containerID
-                cursor.execute("""
-                    SELECT orderNumber
-                    FROM tracking_data
-                    WHERE containerID = ?
-                """, (container_id,))
-                rows = cursor.fetchall()
-                conn.close()
+                # Step 2: Fetch *all* rows for that containerID, from every partition
+                def read_container(cursor, partition):
+                    cursor.execute("""
+                        SELECT orderNumber
+                        FROM tracking_data
+                        WHERE containerID = ?
+                    """, (container_id,))
+                    return cursor.fetchall()
+
+                rows = [r for partition_rows in tracking_layout.read_all(read_container) for r in partition_rows]
 
                 row_count = len(rows)
                 unique_orders = list({r[0] for r in rows if r[0] is not None})
@@ -281,28 +1340,50 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     }).encode("utf-8"))
                     return
 
-                # READ-ONLY SQLite connection (parallel-safe)
-                conn = sqlite3.connect(f"file:{TRACKING_DB_FILE}?mode=ro", uri=True, check_same_thread=False)
-                cursor = conn.cursor()
+                # Optional inclusive end date for a range, and aggregate=1 for per-(prodType, size) counts
+                date_to_str = query.get("dateTo", [None])[0]
+                aggregate = query.get("aggregate", ["0"])[0].lower() in ("1", "true", "yes")
 
-                cursor.execute("""
-                    SELECT prodType, size, orderNumber
-                    FROM tracking_data
-                    WHERE size LIKE ? || '%'
-                """, (date_str,))
-                rows = cursor.fetchall()
-                conn.close()
+                date_from = parse_prod_date(date_str)
+                date_to = parse_prod_date(date_to_str) if date_to_str else date_from
+                if not date_from or not date_to:
+                    self.send_response(400)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_cors_headers()
+                    self.end_headers()
+                    self.wfile.write(json.dumps({
+                        "status": "error",
+                        "message": "Invalid 'date'/'dateTo' (expected format DD-MM-YY)"
+                    }).encode("utf-8"))
+                    return
+
+                if aggregate:
+                    # Grouped on the size without its 'DD-MM-YY/' prefix so a range folds into one row per size
+                    rows = tracking_cut_counts(date_from, date_to)
+                    cut_list = [[r[0] or "", r[1] or "", r[2]] for r in rows]
+                    count = sum(r[2] for r in rows)
+                else:
+                    def read(cursor, _partition):
+                        cursor.execute("""
+                            SELECT prodType, size, orderNumber
+                            FROM tracking_data
+                            WHERE prodDate BETWEEN ? AND ?
+                        """, (date_from, date_to))
+                        return cursor.fetchall()
 
-                cut_list = [[r[0] or "", r[1] or "", r[2] or ""] for r in rows]
+                    cut_list = [[r[0] or "", r[1] or "", r[2] or ""] for rows in tracking_layout.read_all(read) for r in rows]
+                    count = len(cut_list)
 
                 response = {
                     "status": "success",
                     "date": date_str,
-                    "count": len(cut_list),
+                    "dateTo": date_to_str or date_str,
+                    "aggregate": aggregate,
+                    "count": count,
                     "cutList": cut_list
                 }
 
-                debug_log(f"[GET] Returning {len(cut_list)} results for date={date_str}")
+                debug_log(f"[GET] Returning {len(cut_list)} results for date={date_from}..{date_to} (aggregate={aggregate})")
 
                 body = json.dumps(response).encode("utf-8")
 
@@ -313,64 +1394,406 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 self.end_headers()
                 self.wfile.write(body)
 
-            except Exception as e:
-                debug_log(f"[GET] Error in cutListByDate: {e}")
-                error_body = json.dumps({
-                    "status": "error",
-                    "message": str(e)
-                }).encode("utf-8")
-                self.send_response(500)
+            except Exception as e:
+                debug_log(f"[GET] Error in cutListByDate: {e}")
+                error_body = json.dumps({
+                    "status": "error",
+                    "message": str(e)
+                }).encode("utf-8")
+                self.send_response(500)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(error_body)))
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(error_body)
+
+        elif parsed_path.path == "/api/cutPlan":
+            debug_log("[GET] Building cut plan")
+            try:
+                date_str = query.get("date", [None])[0]
+                date_to_str = query.get("dateTo", [None])[0]
+                date_from = parse_prod_date(date_str)
+                date_to = parse_prod_date(date_to_str) if date_to_str else date_from
+                try:
+                    stock_param = query.get("stock", [None])[0]
+                    stock_lengths = [float(v) for v in stock_param.split(",") if v.strip()] if stock_param else list(DEFAULT_STOCK_LENGTHS)
+                    kerf = float(query.get("kerf", [str(DEFAULT_KERF)])[0])
+                    allowance = float(query.get("allowance", ["0"])[0])
+                except ValueError:
+                    stock_lengths = None
+
+                if not date_from or not date_to or not stock_lengths or min(stock_lengths) <= 0 or kerf < 0 or allowance < 0:
+                    self.send_response(400)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_cors_headers()
+                    self.end_headers()
+                    self.wfile.write(json.dumps({
+                        "status": "error",
+                        "message": "Expected date (DD-MM-YY), optional dateTo, stock (comma-separated inches), non-negative kerf and allowance"
+                    }).encode("utf-8"))
+                    return
+
+                items = tracking_cut_counts(date_from, date_to)
+                plan = optimise_cut_list(items, stock_lengths, kerf, allowance)
+                response = {"status": "success", "date": date_str, "dateTo": date_to_str or date_str}
+                response.update(plan)
+                debug_log(f"[GET] Cut plan: {plan['totalBars']} bars, waste={plan['totalWaste']}")
+
+            except Exception as e:
+                debug_log(f"[GET] Error in cutPlan: {e}")
+                response = {"status": "error", "message": str(e)}
+
+        elif parsed_path.path == "/api/manualTasks":
+            debug_log("[GET] Fetching manual tasks")
+            try:
+                # No db_lock needed; simple read
+                seq = change_feed.seq
+                conn = sqlite3.connect(MAIN_DB_FILE, uri=True, timeout=5, check_same_thread=False)
+                cursor = conn.cursor()
+                cursor.execute("SELECT task_names FROM manualTasks")
+                rows = cursor.fetchall()
+                conn.close()
+
+                # Extract task names as strings
+                tasks = [r[0] for r in rows if r[0] is not None]
+
+                response = {
+                    "status": "success",
+                    "tasks": tasks,
+                    "seq": seq,
+                    "epoch": change_feed.epoch
+                }
+                debug_log(f"[GET] Returning {len(tasks)} manual tasks")
+            except Exception as e:
+                debug_log(f"[GET] Error fetching manual tasks: {e}")
+                response = {
+                    "status": "error",
+                    "message": str(e)
+                }
+
+        elif parsed_path.path == "/api/employeesTasksChanges":
+            debug_log("[GET] Long-poll for employees task changes")
+            try:
+                since = int(query.get("since", ["0"])[0])
+                timeout = float(query.get("timeout", [str(CHANGES_MAX_WAIT)])[0])
+            except ValueError:
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "error", "message": "since and timeout must be numeric"}).encode("utf-8"))
+                return
+
+            epoch = query.get("epoch", [None])[0]
+            timeout = max(0.0, min(timeout, CHANGES_MAX_WAIT))
+
+            # Subscribe by employee and/or workstation name (tasks assigned to a workstation use its name as employeeName)
+            names = set(query.get("employeeName", [])) | set(query.get("workstation", []))
+
+            def match(entry):
+                if entry["table"] == "manualTasks":
+                    return True
+                if entry["table"] != "EmployeesTasks":
+                    return False
+                return not names or entry["row"][0] in names or entry["previous"] in names
+
+            changes, next_seq, resync = change_feed.wait(since, timeout, match=match, epoch=epoch)
+
+            response = {
+                "status": "success",
+                "epoch": change_feed.epoch,
+                "seq": next_seq,
+                "resync": resync,
+                "changes": [
+                    {"seq": c["seq"], "table": c["table"], "op": c["op"], "key": c["key"], "row": c["row"]}
+                    for c in changes
+                ]
+            }
+            debug_log(f"[GET] Returning {len(changes)} task changes (seq={next_seq}, resync={resync})")
+
+        elif parsed_path.path == "/api/changes":
+            debug_log("[GET] Change feed request")
+            try:
+                since = int(query.get("since", ["0"])[0])
+                limit = int(query.get("limit", [str(CHANGES_MAX_LIMIT)])[0])
+                timeout = float(query.get("timeout", ["0"])[0])
+            except ValueError:
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "error", "message": "since, limit and timeout must be numeric"}).encode("utf-8"))
+                return
+
+            epoch = query.get("epoch", [None])[0]
+            limit = max(1, min(limit, CHANGES_MAX_LIMIT))
+            timeout = max(0.0, min(timeout, CHANGES_MAX_WAIT))
+
+            # Optional comma-separated table filter, e.g. tables=employee_info,facility_workstations
+            tables = set(filter(None, ",".join(query.get("tables", [])).split(",")))
+            match = (lambda entry: entry["table"] in tables) if tables else None
+
+            if timeout:
+                changes, next_seq, resync = change_feed.wait(since, timeout, limit=limit, match=match, epoch=epoch)
+            else:
+                changes, next_seq, resync = change_feed.since(since, limit=limit, match=match, epoch=epoch)
+
+            # resync=True: the client's cursor is from another server run or older than the retained
+            # log, so it must reload its snapshot and continue from "seq"
+            response = {
+                "status": "success",
+                "epoch": change_feed.epoch,
+                "seq": next_seq,
+                "latest": change_feed.seq,
+                "resync": resync,
+                "changes": [
+                    {"seq": c["seq"], "table": c["table"], "op": c["op"], "key": c["key"], "row": c["row"], "ts": c["ts"]}
+                    for c in changes
+                ]
+            }
+            debug_log(f"[GET] Returning {len(changes)} changes (seq={next_seq}, resync={resync})")
+
+        elif parsed_path.path == "/api/metrics":
+            debug_log("[GET] Fetching server metrics")
+            response = {
+                "status": "success",
+                "retention": dict(retention_stats),
+                "wip": dict(wip_stats),
+                "stuck": {
+                    "items": len(stuck_detector.snapshot()),
+                    "lastRunSeconds": stuck_detector.last_run_seconds,
+                    "rowsExamined": stuck_detector.rows_examined
+                },
+                "rowCache": row_cache.stats(),
+                "coalescedReads": read_flight.stats(),
+                "barcodeIndex": {
+                    "rows": sum(len(index) for index in barcode_indexes),
+                    "loads": sum(index.loads for index in barcode_indexes)
+                },
+                "trackingQueueSize": tracking_queue_size(),
+                "trackingQueue": tracking_queue_stats(),
+                "partitions": partition_router.stats(),
+                "journal": tracking_journal.stats(),
+                "dedup": scan_deduper.stats()
+            }
+
+        elif parsed_path.path == "/api/health":
+            # Queue pressure for load balancers and station clients; 503 while bulk work is being shed
+            queue_stats = tracking_queue_stats()
+            healthy = not queue_stats["shedding"]
+            self.send_response(200 if healthy else 503)
+            self.send_header("Content-Type", "application/json")
+            if not healthy:
+                self.send_header("Retry-After", str(tracking_retry_after()))
+            self.send_cors_headers()
+            self.end_headers()
+            self.wfile.write(json.dumps({
+                "status": "ok" if healthy else "shedding",
+                "trackingQueue": queue_stats
+            }).encode("utf-8"))
+            return
+
+        elif parsed_path.path == "/api/wip":
+            debug_log("[GET] Fetching WIP counts")
+            workstations = wip_counters.snapshot()
+            response = {
+                "status": "success",
+                "workstations": workstations,
+                "total": sum(w["total"] for w in workstations.values())
+            }
+
+        elif parsed_path.path == "/api/orderStatus":
+            debug_log("[GET] Order status lookup")
+            try:
+                # Each key may be repeated or comma-separated: ?orderNumber=a&orderNumber=b or ?orderNumber=a,b
+                lookups = {
+                    key_type: [v for value in query.get(key_type, []) for v in value.split(",") if v]
+                    for key_type in ORDER_KEY_TYPES
+                }
+                orders = tracking_statuses(lookups)
+                response = {
+                    "status": "success",
+                    "orders": orders
+                }
+                debug_log(f"[GET] Returning {len(orders)} order statuses")
+            except Exception as e:
+                debug_log(f"[GET] Error in orderStatus: {e}")
+                response = {
+                    "status": "error",
+                    "message": str(e)
+                }
+
+        elif parsed_path.path == "/api/exportEvents":
+            debug_log("[GET] Streaming tracking event export")
+            date_from = parse_prod_date(query.get("dateFrom", [None])[0])
+            date_to = parse_prod_date(query.get("dateTo", [None])[0]) or date_from
+            export_format = query.get("format", ["ndjson"])[0]
+
+            if not date_from or export_format not in ("ndjson", "csv"):
+                self.send_response(400)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({
+                    "status": "error",
+                    "message": "dateFrom (YYYY-MM-DD) is required and format must be ndjson or csv"
+                }).encode("utf-8"))
+                return
+
+            # gzip when asked for with ?gzip=1 or when the client accepts it
+            compress = query.get("gzip", ["0"])[0] == "1" or "gzip" in (self.headers.get("Accept-Encoding") or "")
+
+            # Chunked transfer encoding needs an HTTP/1.1 status line; the connection is closed afterwards
+            self.protocol_version = "HTTP/1.1"
+            self.close_connection = True
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson" if export_format == "ndjson" else "text/csv")
+            self.send_header("Transfer-Encoding", "chunked")
+            if compress:
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Disposition", f'attachment; filename="tracking-{date_from}-{date_to}.{"ndjson" if export_format == "ndjson" else "csv"}"')
+            self.send_header("Connection", "close")
+            self.send_cors_headers()
+            self.end_headers()
+
+            started = time.time()
+            writer = ChunkedWriter(self.wfile, compress)
+            events = tracking_events(date_from, date_to)
+            try:
+                for text in (format_ndjson if export_format == "ndjson" else format_csv)(events):
+                    writer.write(text)
+                writer.close()
+                debug_log(f"[GET] Exported {date_from}..{date_to} as {export_format}, {writer.bytes_sent} bytes in {time.time() - started:.2f}s")
+            except (BrokenPipeError, ConnectionResetError):
+                debug_log("[GET] Export client disconnected")
+            except Exception as e:
+                # Headers are already sent; cutting the stream short without the final chunk tells the client it failed
+                debug_log(f"[GET] Error during export: {e}")
+            finally:
+                events.close()
+            return
+
+        elif parsed_path.path == "/api/orderEta":
+            debug_log("[GET] Order ETA lookup")
+            try:
+                # orderNumber / leadBarcode may be repeated or comma-separated
+                lookups = {
+                    key_type: [v for value in query.get(key_type, []) for v in value.split(",") if v]
+                    for key_type in ORDER_KEY_TYPES
+                }
+                orders = []
+                for key_type, keys in lookups.items():
+                    if not keys:
+                        continue
+                    items_by_key = {key: [] for key in keys}
+                    for item in tracking_where_is({key_type: keys}):
+                        items_by_key.setdefault(item[key_type], []).append(item)
+                    for key, items in items_by_key.items():
+                        estimate = eta_model.estimate(items)
+                        orders.append(dict(keyType=key_type, key=key, **estimate))
+                response = {
+                    "status": "success",
+                    "orders": orders,
+                    "modelRefreshed": eta_model.refreshed
+                }
+            except Exception as e:
+                debug_log(f"[GET] Error in orderEta: {e}")
+                response = {
+                    "status": "error",
+                    "message": str(e)
+                }
+
+        elif parsed_path.path == "/api/stuckItems":
+            debug_log("[GET] Fetching stuck items")
+            try:
+                min_idle = int(query.get("minIdle", ["0"])[0])
+            except ValueError:
+                min_idle = 0
+            items = stuck_detector.snapshot(set(query.get("workstation", [])), min_idle)
+            response = {
+                "status": "success",
+                "items": items,
+                "count": len(items)
+            }
+
+        elif parsed_path.path == "/api/productionReport":
+            debug_log("[GET] Production report")
+            date_from = parse_prod_date(query.get("dateFrom", [None])[0])
+            date_to = parse_prod_date(query.get("dateTo", [None])[0]) or date_from
+            granularity = query.get("granularity", ["day"])[0]
+            # groupBy is a comma-separated subset of workstation,employee,prodType; all three by default
+            group_by = [c for c in query.get("groupBy", [",".join(GROUP_COLUMNS)])[0].split(",") if c]
+
+            if not date_from or granularity not in ("hour", "day", "total") or not set(group_by) <= set(GROUP_COLUMNS):
+                self.send_response(400)
                 self.send_header("Content-Type", "application/json")
-                self.send_header("Content-Length", str(len(error_body)))
                 self.send_cors_headers()
                 self.end_headers()
-                self.wfile.write(error_body)
+                self.wfile.write(json.dumps({
+                    "status": "error",
+                    "message": "dateFrom (YYYY-MM-DD) is required; granularity is hour, day or total; groupBy is from workstation, employee, prodType"
+                }).encode("utf-8"))
+                return
 
-        elif parsed_path.path == "/api/manualTasks":
-            debug_log("[GET] Fetching manual tasks")
             try:
-                # No db_lock needed; simple read
-                conn = sqlite3.connect(MAIN_DB_FILE, uri=True, timeout=5, check_same_thread=False)
-                cursor = conn.cursor()
-                cursor.execute("SELECT task_names FROM manualTasks")
-                rows = cursor.fetchall()
-                conn.close()
+                filters = {column: query.get(column, []) for column in GROUP_COLUMNS}
+                keys = (["period"] if granularity != "total" else []) + group_by
 
-                # Extract task names as strings
-                tasks = [r[0] for r in rows if r[0] is not None]
+                def read(cursor, _partition):
+                    rows = query_rollup(cursor, date_from, date_to, group_by, granularity, filters)
+                    return [tuple(r[key] for key in keys) + (r["count"],) for r in rows]
 
+                # Each partition holds the rollups of its own scans; equal groups are summed
+                rows = [dict(zip(keys + ["count"], r)) for r in merge_counts(tracking_layout.read_all(read))]
                 response = {
                     "status": "success",
-                    "tasks": tasks
+                    "dateFrom": date_from,
+                    "dateTo": date_to,
+                    "granularity": granularity,
+                    "groupBy": group_by,
+                    "rows": rows,
+                    "total": sum(r["count"] for r in rows)
                 }
-                debug_log(f"[GET] Returning {len(tasks)} manual tasks")
+                debug_log(f"[GET] Returning {len(rows)} production report rows")
             except Exception as e:
-                debug_log(f"[GET] Error fetching manual tasks: {e}")
+                debug_log(f"[GET] Error in productionReport: {e}")
                 response = {
                     "status": "error",
                     "message": str(e)
                 }
 
-        elif parsed_path.path == "/api/employeesTasks":
-            debug_log("[GET] Fetching employees tasks")
+        elif parsed_path.path == "/api/analytics":
+            debug_log("[GET] Fetching scan analytics")
             try:
-                conn = sqlite3.connect(MAIN_DB_FILE)
-                cursor = conn.cursor()
-                cursor.execute("SELECT employeeName, liveTask, status, isobarcode FROM EmployeesTasks")
-                rows = cursor.fetchall()
-                conn.close()
-
-                # Convert to 2D list format - now includes isobarcode
-                tasks_list = [[r[0], r[1], r[2], r[3]] for r in rows]
+                # Optional look-back window in hours; all retained history by default
+                hours = float(query.get("hours", ["0"])[0])
+                # Rounded to the minute so repeated requests hit the cached result
+                since = (int(time.time() // 60) * 60 - hours * 3600) if hours > 0 else None
+                response = {"status": "success"}
+                response.update(scan_analytics.stats(since))
+            except ValueError:
+                response = {
+                    "status": "error",
+                    "message": "hours must be numeric"
+                }
 
+        elif parsed_path.path == "/api/whereIs":
+            debug_log("[GET] Where-is lookup")
+            try:
+                # Each key may be repeated or comma-separated: ?isoBarcode=a&isoBarcode=b or ?isoBarcode=a,b
+                lookups = {
+                    key: [v for value in query.get(key, []) for v in value.split(",") if v]
+                    for key in LOOKUP_KEYS
+                }
+                limit = int(query.get("limit", ["0"])[0])
+                items = tracking_where_is(lookups, limit)
                 response = {
                     "status": "success",
-                    "tasks": tasks_list
+                    "items": items
                 }
-                debug_log(f"[GET] Returning {len(tasks_list)} employee tasks")
-
+                debug_log(f"[GET] Returning {len(items)} locations")
             except Exception as e:
-                debug_log(f"[GET] Error fetching employees tasks: {e}")
+                debug_log(f"[GET] Error in whereIs: {e}")
                 response = {
                     "status": "error",
                     "message": str(e)
@@ -423,61 +1846,15 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     "message": str(e)
                 }
 
-        elif parsed_path.path == "/api/facilityWorkstations":
-            debug_log("[GET] Fetching facility workstations")
-            with db_lock_main:
-                conn = sqlite3.connect(MAIN_DB_FILE)
-                cursor = conn.cursor()
-                cursor.execute("SELECT workstation, availableStations, eligibleList FROM facility_workstations")
-                rows = cursor.fetchall()
-                conn.close()
-
-            workstations, availableStations, eligibleList = [], [], []
-
-            for r in rows:
-                ws_name = r[0] if r[0] is not None else ""
-                workstations.append(ws_name)
-                available = r[1] if r[1] is not None else ""
-                availableStations.append(available)
-                try:
-                    eligible = json.loads(r[2]) if r[2] else []
-                except (json.JSONDecodeError, TypeError):
-                    eligible = []
-                if not isinstance(eligible, (list, tuple)):
-                    eligible = []
-                eligibleList.append(eligible)
-
-            response = {
-                "status": "success",
-                "workstations": workstations,
-                "availableStations": availableStations,
-                "eligibleList": eligibleList
-            }
-            debug_log(f"[GET] Returning {len(workstations)} workstations")
-
         elif parsed_path.path == "/api/nextContainerID":
             debug_log("[GET] Getting next container ID")
-            conn = sqlite3.connect(TRACKING_DB_FILE)
-            cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM tracking_data")
-            total = cursor.fetchone()[0]
-            if total == 0:
-                next_id = 1
-            else:
-                cursor.execute("""
-                    SELECT MIN(t1.containerID + 1) AS nextID
-                    FROM tracking_data t1
-                    LEFT JOIN tracking_data t2
-                      ON t2.containerID = t1.containerID + 1
-                    WHERE t2.containerID IS NULL
-                """)
-                row = cursor.fetchone()
-                next_id = row[0] if row[0] else None
-                if next_id is None:
-                    cursor.execute("SELECT MAX(containerID) FROM tracking_data")
-                    max_id = cursor.fetchone()[0]
-                    next_id = (max_id or 0) + 1
-            conn.close()
+            def read(cursor, _partition):
+                cursor.execute("SELECT DISTINCT CAST(containerID AS INTEGER) FROM tracking_data WHERE containerID IS NOT NULL")
+                return {r[0] for r in cursor.fetchall()}
+
+            # The lowest unused ID above one in use, over every partition
+            used = set().union(*tracking_layout.read_all(read))
+            next_id = min((c + 1 for c in used if c + 1 not in used), default=0) or max(used, default=0) + 1
             response = {"status": "success", "nextContainerID": next_id}
             debug_log(f"[GET] Next container ID: {next_id}")
 
@@ -501,244 +1878,17 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 itemNum = None
                 prodType = None
 
-            def job(cursor):
-                nonlocal containerID, orderNumber, isoBarcode, leadBarcode, workstation, employeeName, itemNum, prodType
-
-                # Normalize containerID to int
-                if containerID is not None:
-                    try:
-                        containerID = int(containerID)
-                    except ValueError:
-                        containerID = None
-
-                # Create history entry
-                new_history_entry = f"{datetime.now().replace(second=0, microsecond=0).isoformat()} | {workstation} | {employeeName}"
-
-                def append_history(existing_history, new_line):
-                    if not existing_history or existing_history.strip() == "":
-                        # Apply FloatCanv rule even on first entry
-                        if "FloatCanv" in new_line:
-                            new_line = new_line.replace("FloatCanv", "FloatCanv & FloatStretch")
-                        return new_line
-
-                    lines = existing_history.strip().split("\n")
-
-                    def strip_timestamp(line):
-                        parts = line.split(" | ", 1)
-                        return parts[1] if len(parts) > 1 else line
-
-                    last_line = lines[-1]
-
-                    # --- Special FloatCanv rule ---
-                    if "FloatCanv" in new_line and "CanvMach" not in last_line:
-                        new_line = new_line.replace("FloatCanv", "FloatCanv & FloatStretch")
-
-                    # --- Normal duplicate-prevention logic ---
-                    if strip_timestamp(last_line) != strip_timestamp(new_line):
-                        lines.append(new_line)
-
-                    return "\n".join(lines)
-
-
-                # --- ISO barcode branch ---
-                if isoBarcode:
-                    debug_log(f"[ISO] Processing isoBarcode={isoBarcode}")
-                    cursor.execute(
-                        "SELECT containerID, orderNumber, leadBarcode, history FROM tracking_data WHERE isoBarcode = ?",
-                        (isoBarcode,)
-                    )
-                    row = cursor.fetchone()
-
-                    if row:
-                        # Exact isoBarcode match
-                        debug_log(f"[ISO] Found existing row for isoBarcode={isoBarcode}")
-                        container_existing, orderNumber_existing, lead_existing, history_existing = row
-                        container_to_use = containerID if containerID is not None else container_existing
-                        order_to_use = orderNumber if orderNumber else orderNumber_existing
-                        lead_to_use = leadBarcode if leadBarcode else lead_existing
-                        updated_history = append_history(history_existing, new_history_entry)
-
-                        cursor.execute("""
-                            UPDATE tracking_data
-                            SET history = ?, containerID = ?, orderNumber = ?, leadBarcode = ?, prodType = ?
-                            WHERE isoBarcode = ?
-                        """, (updated_history, container_to_use, order_to_use, lead_to_use, prodType, isoBarcode))
-                        debug_log(f"[ISO] Updated row for isoBarcode={isoBarcode}")
-
-                    else:
-                        # No isoBarcode match → try orderNumber match
-                        debug_log(f"[ISO] No existing row for isoBarcode={isoBarcode}, trying orderNumber match")
-                        cursor.execute("""
-                            SELECT rowid, prodType, containerID, leadBarcode, history
-                            FROM tracking_data
-                            WHERE orderNumber = ? AND isoBarcode IS NULL
-                        """, (orderNumber,))
-                        rows = cursor.fetchall()
-
-                        # Step 1: Find row with matching prodType
-                        matching_row = next((r for r in rows if r[1] == prodType), None)
-
-                        if matching_row:
-                            rowid, _, container_existing, lead_existing, history_existing = matching_row
-                            debug_log(f"[ISO] Found row with matching prodType for orderNumber={orderNumber}")
-
-                        else:
-                            # Step 2: Fallback to row where prodType is NULL
-                            null_prod_row = next((r for r in rows if r[1] is None), None)
-                            if null_prod_row:
-                                rowid, _, container_existing, lead_existing, history_existing = null_prod_row
-                                debug_log(f"[ISO] Using row with NULL prodType for orderNumber={orderNumber}")
-                            else:
-                                # Step 3: No suitable row → insert new
-                                rowid = None
-                                debug_log(f"[ISO] No matching or NULL prodType row, inserting new for orderNumber={orderNumber}")
-
-                        if rowid:
-                            # Update the chosen row
-                            container_to_use = containerID if containerID is not None else container_existing
-                            lead_to_use = leadBarcode if leadBarcode else lead_existing
-                            updated_history = append_history(history_existing, new_history_entry)
-
-                            cursor.execute("""
-                                UPDATE tracking_data
-                                SET containerID = ?, leadBarcode = ?, isoBarcode = ?, history = ?, prodType = ?
-                                WHERE rowid = ?
-                            """, (container_to_use, lead_to_use, isoBarcode, updated_history, prodType, rowid))
-                            debug_log(f"[ISO] Updated row for isoBarcode={isoBarcode}")
-                        else:
-                            # Insert new row
-                            cursor.execute("""
-                                INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, history, prodType)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            """, (containerID, orderNumber, leadBarcode, isoBarcode, new_history_entry, prodType))
-                            debug_log(f"[ISO] Inserted new row for isoBarcode={isoBarcode}")
-
-            
-                # --- Lead barcode branch ---
-                if leadBarcode:
-                    debug_log(f"[Lead] Processing leadBarcode={leadBarcode}")
-                    cursor.execute(
-                        "SELECT isoBarcode, containerID, orderNumber, history FROM tracking_data WHERE leadBarcode = ?",
-                        (leadBarcode,)
-                    )
-                    rows = cursor.fetchall()
-                    for iso, container_existing, order_existing, history_existing in rows:
-                        container_to_use = containerID if containerID is not None else container_existing
-                        order_to_use = orderNumber if orderNumber else order_existing
-                        updated_history = append_history(history_existing, new_history_entry)
-                        cursor.execute(
-                            "UPDATE tracking_data SET history = ?, containerID = ?, orderNumber = ? WHERE isoBarcode = ?",
-                            (updated_history, container_to_use, order_to_use, iso)
-                        )
-                        debug_log(f"[Lead] Updated row for isoBarcode={iso}")
-
-                # --- Order-number-only branch ---
-                if not isoBarcode and not leadBarcode and containerID:
-                    debug_log(f"[OrderOnly] Processing orderNumber={orderNumber}")
-
-                    # --- Step 0: Normalize prodType ---
-                    try:
-                        with sqlite3.connect(MAIN_DB_FILE, uri=True, timeout=5, check_same_thread=False) as conn_readonly:
-                            conn_readonly.execute("PRAGMA query_only = 1")  # Read-only mode
-                            cursor_readonly = conn_readonly.cursor()
-                            cursor_readonly.execute("""
-                                SELECT worksheetRef
-                                FROM product_codes
-                                WHERE prod_type = ?
-                                LIMIT 1
-                            """, (prodType,))
-                            result = cursor_readonly.fetchone()
-                            if result and result[0] is not None:
-                                old_prodType = prodType
-                                prodType = result[0]  # Replace with worksheetRef
-                                debug_log(f"[OrderOnly] Normalized prodType '{old_prodType}' -> '{prodType}'")
-                            else:
-                                # --- Step 0b: Log missing prodType before setting to None ---
-                                if prodType:
-                                    try:
-                                        existing_lines = set()
-                                        try:
-                                            with open("missing_prodTypes.txt", "r", encoding="utf-8") as f:
-                                                existing_lines = set(line.strip() for line in f if line.strip())
-                                        except FileNotFoundError:
-                                            pass  # file doesn't exist yet
-
-                                        if prodType not in existing_lines:
-                                            with open("missing_prodTypes.txt", "a", encoding="utf-8") as f:
-                                                f.write(prodType + "\n")
-                                            debug_log(f"[OrderOnly] Logged missing prodType: '{prodType}'")
-                                    except Exception as e:
-                                        debug_log(f"[OrderOnly] Failed to log missing prodType '{prodType}': {e}")
-
-                                prodType = None
-                                debug_log(f"[OrderOnly] prodType not found in product_codes, set to None")
-                    except Exception as e:
-                        debug_log(f"[OrderOnly] Failed to normalize prodType '{prodType}': {e}")
-                        prodType = None
-
-                    # --- Step 1: Find rows with orderNumber and itemNum IS NULL ---
-                    cursor.execute("""
-                        SELECT rowid, prodType, history
-                        FROM tracking_data
-                        WHERE orderNumber = ? AND itemNum IS NULL
-                    """, (orderNumber,))
-                    rows = cursor.fetchall()
-
-                    if rows:
-                        # Step 2: Check for a row with matching prodType
-                        matching_row = next((r for r in rows if r[1] == prodType), None)
-                        if matching_row:
-                            rowid, _, history_existing = matching_row
-                            updated_history = append_history(history_existing, new_history_entry)
-                            if prodType is not None:
-                                cursor.execute("""
-                                    UPDATE tracking_data
-                                    SET containerID = ?, itemNum = ?, history = ?, prodType = ?
-                                    WHERE rowid = ?
-                                """, (containerID, itemNum, updated_history, prodType, rowid))
-                            else:
-                                cursor.execute("""
-                                    UPDATE tracking_data
-                                    SET containerID = ?, itemNum = ?, history = ?
-                                    WHERE rowid = ?
-                                """, (containerID, itemNum, updated_history, rowid))
-                            cursor.connection.commit()
-                            debug_log(f"[OrderOnly] Updated row with matching prodType for orderNumber={orderNumber}")
-                        else:
-                            # Step 3: Update first row with differing prodType
-                            differing_row = rows[0]
-                            rowid, _, history_existing = differing_row
-                            updated_history = append_history(history_existing, new_history_entry)
-                            if prodType is not None:
-                                cursor.execute("""
-                                    UPDATE tracking_data
-                                    SET containerID = ?, itemNum = ?, history = ?, prodType = ?
-                                    WHERE rowid = ?
-                                """, (containerID, itemNum, updated_history, prodType, rowid))
-                            else:
-                                cursor.execute("""
-                                    UPDATE tracking_data
-                                    SET containerID = ?, itemNum = ?, history = ?
-                                    WHERE rowid = ?
-                                """, (containerID, itemNum, updated_history, rowid))
-                            cursor.connection.commit()
-                            debug_log(f"[OrderOnly] Updated row with differing prodType for orderNumber={orderNumber}")
-                    else:
-                        # Step 4: Insert new row
-                        if prodType is not None:
-                            cursor.execute("""
-                                INSERT INTO tracking_data (containerID, orderNumber, itemNum, prodType, history)
-                                VALUES (?, ?, ?, ?, ?)
-                            """, (containerID, orderNumber, itemNum, prodType, new_history_entry))
-                        else:
-                            cursor.execute("""
-                                INSERT INTO tracking_data (containerID, orderNumber, itemNum, history)
-                                VALUES (?, ?, ?, ?)
-                            """, (containerID, orderNumber, itemNum, new_history_entry))
-                        cursor.connection.commit()
-                        debug_log(f"[OrderOnly] Inserted new row for orderNumber={orderNumber}")
-
-            self.enqueue_tracking_job(job)
+            self.enqueue_tracking_job({
+                "kind": "orderTrack",
+                "containerID": containerID,
+                "orderNumber": orderNumber,
+                "isoBarcode": isoBarcode,
+                "leadBarcode": leadBarcode,
+                "workstation": workstation,
+                "employeeName": employeeName,
+                "itemNum": itemNum,
+                "prodType": prodType
+            })
             return
 
         elif parsed_path.path == "/api/receivePrintData":
@@ -757,139 +1907,18 @@ class SimpleHandler(BaseHTTPRequestHandler):
 
             debug_log(f"[RECEIVE] containerID={containerID}, orderNumber={orderNumber}, leadBarcode={leadBarcode}, isoBarcode={isoBarcode}, prodType={prodType}, size={size}, itemNum={itemNum}")
 
-            def job(cursor):
-                nonlocal isoBarcode, workstation, employeeName, containerID, orderNumber, leadBarcode, prodType, size, itemNum
-
-                # Create history entry
-                new_history_entry = f"{datetime.now().replace(second=0, microsecond=0).isoformat()} | {workstation} | {employeeName}"
-
-                def append_history(existing_history, new_line):
-                    if not existing_history or existing_history.strip() == "":
-                        return new_line
-                    lines = existing_history.strip().split("\n")
-
-                    def strip_timestamp(line):
-                        parts = line.split(" | ", 1)
-                        return parts[1] if len(parts) > 1 else line
-
-                    if strip_timestamp(lines[-1]) != strip_timestamp(new_line):
-                        lines.append(new_line)
-                    return "\n".join(lines)
-
-                # ---------------------------------------------------------
-                # 1) Normal CONTAINER branch
-                # ---------------------------------------------------------
-                if containerID is not None and orderNumber is not None:
-                    cursor.execute(
-                        """
-                        SELECT rowid, history FROM tracking_data
-                        WHERE orderNumber = ? AND containerID IS NULL
-                        ORDER BY rowid ASC LIMIT 1
-                        """,
-                        (orderNumber,)
-                    )
-                    row = cursor.fetchone()
-
-                    if row:
-                        rowid, history_existing = row
-                        updated_history = append_history(history_existing, new_history_entry)
-
-                        cursor.execute(
-                            """
-                            UPDATE tracking_data
-                            SET containerID = ?, itemNum = ?, history = ?
-                            WHERE rowid = ?
-                            """,
-                            (containerID, itemNum, updated_history, rowid)
-                        )
-                        debug_log(f"[RECEIVE] Attached containerID={containerID} and itemNum={itemNum} to existing order={orderNumber}.")
-                        return
-                    else:
-                        cursor.execute(
-                            """
-                            INSERT INTO tracking_data (containerID, orderNumber, itemNum, history)
-                            VALUES (?, ?, ?, ?)
-                            """,
-                            (containerID, orderNumber, itemNum, new_history_entry)
-                        )
-                        debug_log(f"[RECEIVE] Created new row for orderNumber={orderNumber} with containerID={containerID} and itemNum={itemNum}.")
-                        return
-
-                # ---------------------------------------------------------
-                # 2) ISO BRANCH
-                # ---------------------------------------------------------
-                if isoBarcode:
-
-                    # First check if ISO already exists
-                    cursor.execute("""
-                        SELECT containerID, orderNumber, leadBarcode, prodType, size, history
-                        FROM tracking_data
-                        WHERE isoBarcode = ?
-                    """, (isoBarcode,))
-                    existing = cursor.fetchone()
-
-                    if existing:
-                        # Existing ISO row → update it
-                        container_existing, order_existing, lead_existing, prod_existing, size_existing, history_existing = existing
-                        updated_history = append_history(history_existing, new_history_entry)
-
-                        container_to_use = containerID if containerID is not None else container_existing
-                        order_to_use = orderNumber if orderNumber else order_existing
-                        lead_to_use = leadBarcode if leadBarcode else lead_existing
-                        prod_to_use = prodType if prodType else prod_existing
-                        size_to_use = size if size else size_existing
-
-                        cursor.execute(
-                            """
-                            UPDATE tracking_data
-                            SET history = ?, containerID = ?, orderNumber = ?, leadBarcode = ?, prodType = ?, size = ?
-                            WHERE isoBarcode = ?
-                            """,
-                            (updated_history, container_to_use, order_to_use, lead_to_use, prod_to_use, size_to_use, isoBarcode)
-                        )
-                        debug_log(f"[RECEIVE] Updated existing ISO row {isoBarcode}.")
-                        return
-
-                    # ---------------------------------------------------------
-                    # NEW FUNCTIONALITY:
-                    # Try to merge with existing orderNumber rows that have no ISO yet
-                    # ---------------------------------------------------------
-                    if orderNumber:
-                        cursor.execute("""
-                            SELECT rowid, history
-                            FROM tracking_data
-                            WHERE orderNumber = ? AND isoBarcode IS NULL
-                            ORDER BY rowid ASC LIMIT 1
-                        """, (orderNumber,))
-                        row = cursor.fetchone()
-
-                        if row:
-                            rowid, history_existing = row
-                            updated_history = append_history(history_existing, new_history_entry)
-
-                            cursor.execute("""
-                                UPDATE tracking_data
-                                SET isoBarcode = ?, leadBarcode = ?, prodType = ?, size = ?, history = ?
-                                WHERE rowid = ?
-                            """, (isoBarcode, leadBarcode, prodType, size, updated_history, rowid))
-
-                            debug_log(f"[RECEIVE] Merged new ISO into existing order row {orderNumber} (rowid={rowid}).")
-                            return
-
-                    # ---------------------------------------------------------
-                    # If no ISO match AND no orderNumber-without-ISO → Insert new row
-                    # ---------------------------------------------------------
-                    cursor.execute(
-                        """
-                        INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, prodType, size, history)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (containerID, orderNumber, leadBarcode, isoBarcode, prodType, size, new_history_entry)
-                    )
-                    debug_log(f"[RECEIVE] Inserted brand new ISO row for {isoBarcode}.")
-                    return
-
-            self.enqueue_tracking_job(job)
+            self.enqueue_tracking_job({
+                "kind": "receivePrintData",
+                "containerID": containerID,
+                "orderNumber": orderNumber,
+                "leadBarcode": leadBarcode,
+                "isoBarcode": isoBarcode,
+                "workstation": workstation,
+                "employeeName": employeeName,
+                "prodType": prodType,
+                "size": size,
+                "itemNum": itemNum
+            }, BULK)
             return
 
 
@@ -906,39 +1935,35 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 return
 
             try:
-                conn = sqlite3.connect(TRACKING_DB_FILE)
-                cursor = conn.cursor()
+                # Orders polled repeatedly are served from the row cache
+                generation = row_cache.generation
+                results = row_cache.get_order(orderNumber)
 
-                cursor.execute(
-                    """
-                    SELECT rowid, containerID, orderNumber, leadBarcode, isoBarcode,
-                        prodType, size, itemNum, history
-                    FROM tracking_data
-                    WHERE orderNumber = ?
-                    ORDER BY rowid ASC
-                    """,
-                    (orderNumber,)
-                )
+                if results is None:
+                    def read_order(cursor, partition):
+                        cursor.execute(
+                            f"""
+                            SELECT {', '.join(ROW_COLUMNS)}
+                            FROM tracking_data
+                            WHERE orderNumber = ?
+                            ORDER BY rowid ASC
+                            """,
+                            (orderNumber,)
+                        )
+                        return [dict(zip(ROW_COLUMNS, (tracking_layout.global_rowid(r[0], partition),) + r[1:])) for r in cursor.fetchall()]
 
-                rows = cursor.fetchall()
-                conn.close()
+                    # An order's rows are normally all in one partition, but ISO-first rows may not be
+                    results = sorted((row for rows in tracking_layout.read_all(read_order) for row in rows), key=lambda row: row["rowid"])
+                    row_cache.put_order(orderNumber, results, generation)
 
-                results = []
-                for r in rows:
-                    (rowid, containerID, orderNum, leadBC, isoBC,
-                    prodType, size, itemNum, history) = r
-
-                    results.append({
-                        "rowid": rowid,
-                        "containerID": containerID,
-                        "orderNumber": orderNum,
-                        "leadBarcode": leadBC,
-                        "isoBarcode": isoBC,
-                        "prodType": prodType,
-                        "size": size,
-                        "itemNum": itemNum,
-                        "history": history,
-                    })
+                # Orders purged from the hot table are served from the archive
+                archived = False
+                if not results:
+                    results = [
+                        {column: r.get(column) for column in ROW_COLUMNS}
+                        for r in sorted(trackingArchive.lookup("orderNumber", orderNumber), key=lambda r: r["rowid"] or 0)
+                    ]
+                    archived = bool(results)
 
                 # Send response using your server's actual pattern
                 self.send_response(200)
@@ -947,7 +1972,8 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 self.end_headers()
                 self.wfile.write(json.dumps({
                     "orderNumber": orderNumber,
-                    "records": results
+                    "records": results,
+                    "archived": archived
                 }).encode("utf-8"))
 
             except Exception as e:
@@ -969,44 +1995,19 @@ class SimpleHandler(BaseHTTPRequestHandler):
             workstation = query.get("workstation", [None])[0] or ""
             employeeName = query.get("employeeName", [None])[0] or ""
 
-            def job(cursor):
-                new_history_entry = f"{datetime.now().replace(second=0, microsecond=0).isoformat()} | {workstation} | {employeeName}"
-                def append_history(existing_history, new_line):
-                    if not existing_history or existing_history.strip() == "":
-                        return new_line
-                    lines = existing_history.strip().split("\n")
-                    def strip_timestamp(line):
-                        parts = line.split(" | ", 1)
-                        return parts[1] if len(parts) > 1 else line
-                    if strip_timestamp(lines[-1]) != strip_timestamp(new_line):
-                        lines.append(new_line)
-                    return "\n".join(lines)
-
-                containerID = None
-                if isoBarcode:
-                    cursor.execute("SELECT containerID FROM tracking_data WHERE isoBarcode = ?", (isoBarcode,))
-                    row = cursor.fetchone()
-                    if row:
-                        containerID = row[0]
-                if not containerID and leadBarcode:
-                    cursor.execute("SELECT containerID FROM tracking_data WHERE leadBarcode = ?", (leadBarcode,))
-                    row = cursor.fetchone()
-                    if row:
-                        containerID = row[0]
-
-                if containerID:
-                    cursor.execute("SELECT isoBarcode, history FROM tracking_data WHERE containerID = ?", (containerID,))
-                    rows = cursor.fetchall()
-                    for iso, history_existing in rows:
-                        updated_history = append_history(history_existing, new_history_entry)
-                        cursor.execute("UPDATE tracking_data SET history = ? WHERE isoBarcode = ?", (updated_history, iso))
-
-            self.enqueue_tracking_job(job)
+            self.enqueue_tracking_job({
+                "kind": "moveContainer",
+                "isoBarcode": isoBarcode,
+                "leadBarcode": leadBarcode,
+                "workstation": workstation,
+                "employeeName": employeeName
+            })
             return
 
         elif parsed_path.path == "/api/fetchProdCodes":
             debug_log("[GET] Fetching product codes")
             try:
+                seq = change_feed.seq
                 with db_lock_main:
                     conn = sqlite3.connect(MAIN_DB_FILE)
                     cursor = conn.cursor()
@@ -1015,7 +2016,7 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     conn.close()
 
                 prod_codes = [r[0] for r in rows]
-                response = {"status": "success", "prodCodes": prod_codes}
+                response = {"status": "success", "prodCodes": prod_codes, "seq": seq, "epoch": change_feed.epoch}
 
                 debug_log(f"[GET] Returning {len(prod_codes)} product codes")
 
@@ -1089,6 +2090,9 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 return
 
             try:
+                # (table, op, key, row) - published once the transaction commits
+                changes = []
+
                 with db_lock_main:
                     conn = sqlite3.connect(MAIN_DB_FILE)
                     cursor = conn.cursor()
@@ -1108,16 +2112,18 @@ class SimpleHandler(BaseHTTPRequestHandler):
                             sql = f"UPDATE employee_info SET {', '.join(update_fields)} WHERE employeeName = ?"
                             params.append(employee_name)
                             cursor.execute(sql, tuple(params))
+                            changes.append(("employee_info", "update", employee_name, employee_change_row(cursor, employee_name)))
                     else:
                         cursor.execute(
                             "INSERT INTO employee_info (employeeName, password, hourlyRate) VALUES (?, ?, ?)",
                             (employee_name, password, hourly_rate)
                         )
+                        changes.append(("employee_info", "insert", employee_name, employee_change_row(cursor, employee_name)))
 
                     if workstation_list:
-                        cursor.execute("SELECT id, workstation, eligibleList FROM facility_workstations")
+                        cursor.execute("SELECT id, workstation, eligibleList, availableStations FROM facility_workstations")
                         rows = cursor.fetchall()
-                        for row_id, workstation_name, eligible_json in rows:
+                        for row_id, workstation_name, eligible_json, available in rows:
                             if workstation_name in workstation_list:
                                 try:
                                     eligible_list = json.loads(eligible_json) if eligible_json else []
@@ -1129,10 +2135,15 @@ class SimpleHandler(BaseHTTPRequestHandler):
                                         "UPDATE facility_workstations SET eligibleList = ? WHERE id = ?",
                                         (json.dumps(eligible_list), row_id)
                                     )
+                                    changes.append(("facility_workstations", "update", workstation_name,
+                                                    workstation_change_row(workstation_name, available, eligible_list)))
 
                     conn.commit()
                     conn.close()
 
+                for table, op, key, change_row in changes:
+                    change_feed.record(table, op, key, change_row)
+
                 self.send_response(200)
                 self.send_header("Content-Type", "application/json")
                 self.send_cors_headers()
@@ -1170,6 +2181,9 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 return
 
             try:
+                # (op, rowid, row, previous employeeName) - published once the transaction commits
+                changes = []
+
                 with db_lock_main:
                     conn = sqlite3.connect(MAIN_DB_FILE)
                     cursor = conn.cursor()
@@ -1178,39 +2192,50 @@ class SimpleHandler(BaseHTTPRequestHandler):
                         if live_task:
                             # Delete ONLY the first matching task for this employee
                             cursor.execute("""
-                                DELETE FROM EmployeesTasks 
-                                WHERE rowid = (
-                                    SELECT rowid FROM EmployeesTasks 
-                                    WHERE employeeName = ? AND liveTask = ? 
-                                    LIMIT 1
-                                )
+                                SELECT rowid, employeeName, liveTask, status, isobarcode FROM EmployeesTasks 
+                                WHERE employeeName = ? AND liveTask = ? 
+                                LIMIT 1
                             """, (employee_name, live_task))
+                            doomed = cursor.fetchall()
+                            for r in doomed:
+                                cursor.execute("DELETE FROM EmployeesTasks WHERE rowid = ?", (r[0],))
+                                changes.append(("delete", r[0], list(r[1:]), r[1]))
                             debug_log(f"[POST] Deleted one task for employee '{employee_name}': {live_task}")
                             message = f"Task deleted for employee '{employee_name}'"
                         else:
                             # Delete ALL tasks for this employee (if no liveTask specified)
+                            cursor.execute(
+                                "SELECT rowid, employeeName, liveTask, status, isobarcode FROM EmployeesTasks WHERE employeeName = ?",
+                                (employee_name,)
+                            )
+                            doomed = cursor.fetchall()
                             cursor.execute(
                                 "DELETE FROM EmployeesTasks WHERE employeeName = ?",
                                 (employee_name,)
                             )
+                            changes.extend(("delete", r[0], list(r[1:]), r[1]) for r in doomed)
                             debug_log(f"[POST] Deleted all tasks for employee '{employee_name}'")
                             message = f"All tasks deleted for employee '{employee_name}'"
                     else:
                         # Check if task exists with matching isobarcode
                         if isobarcode:
                             cursor.execute("""
-                                SELECT rowid FROM EmployeesTasks 
+                                SELECT rowid, employeeName FROM EmployeesTasks 
                                 WHERE isobarcode = ?
                             """, (isobarcode,))
-                            existing_row = cursor.fetchone()
+                            existing_rows = cursor.fetchall()
                             
-                            if existing_row:
+                            if existing_rows:
                                 # UPDATE existing task (regardless of employee)
                                 cursor.execute("""
                                     UPDATE EmployeesTasks 
                                     SET employeeName = ?, liveTask = ?, status = ?
                                     WHERE isobarcode = ?
                                 """, (employee_name, live_task, status, isobarcode))
+                                changes.extend(
+                                    ("update", r[0], [employee_name, live_task, status, isobarcode], r[1])
+                                    for r in existing_rows
+                                )
                                 debug_log(f"[POST] Updated task with barcode {isobarcode}: employee={employee_name}, task={live_task}, status={status}")
                                 message = f"Task updated for barcode {isobarcode}"
                             else:
@@ -1219,6 +2244,7 @@ class SimpleHandler(BaseHTTPRequestHandler):
                                     "INSERT INTO EmployeesTasks (employeeName, liveTask, status, isobarcode) VALUES (?, ?, ?, ?)",
                                     (employee_name, live_task, status, isobarcode)
                                 )
+                                changes.append(("insert", cursor.lastrowid, [employee_name, live_task, status, isobarcode], None))
                                 debug_log(f"[POST] Inserted new task for employee '{employee_name}': {live_task} | Barcode: {isobarcode}")
                                 message = f"Task created for employee '{employee_name}'"
 
@@ -1228,12 +2254,16 @@ class SimpleHandler(BaseHTTPRequestHandler):
                                 "INSERT INTO EmployeesTasks (employeeName, liveTask, status, isobarcode) VALUES (?, ?, ?, ?)",
                                 (employee_name, live_task, status, isobarcode)
                             )
+                            changes.append(("insert", cursor.lastrowid, [employee_name, live_task, status, isobarcode], None))
                             debug_log(f"[POST] Inserted new task for employee '{employee_name}': {live_task}")
                             message = f"Task created for employee '{employee_name}'"
 
                     conn.commit()
                     conn.close()
 
+                for op, rowid, row, previous in changes:
+                    change_feed.record("EmployeesTasks", op, rowid, row, previous)
+
                 self.send_response(200)
                 self.send_header("Content-Type", "application/json")
                 self.send_cors_headers()
@@ -1304,8 +2334,10 @@ class SimpleHandler(BaseHTTPRequestHandler):
                         "UPDATE employee_info SET loggedIn = 1 WHERE employeeName = ?",
                         (employee_name,)
                     )
+                    change_row = employee_change_row(cursor, employee_name)
                     conn.commit()
                     conn.close()
+                    change_feed.record("employee_info", "update", employee_name, change_row)
                     
                     debug_log(f"[POST] Successfully logged in '{employee_name}'")
 
@@ -1354,20 +2386,27 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     conn = sqlite3.connect(MAIN_DB_FILE)
                     cursor = conn.cursor()
 
+                    change_op = None
                     if edit_flag:  # Add task if not exists
                         cursor.execute("SELECT 1 FROM manualTasks WHERE task_names = ?", (task_name,))
                         if not cursor.fetchone():
                             cursor.execute("INSERT INTO manualTasks (task_names) VALUES (?)", (task_name,))
+                            change_op = "insert"
                             debug_log(f"[POST] Added new task: {task_name}")
                         else:
                             debug_log(f"[POST] Task '{task_name}' already exists, skipping insert")
                     else:  # Delete task if exists
                         cursor.execute("DELETE FROM manualTasks WHERE task_names = ?", (task_name,))
+                        if cursor.rowcount:
+                            change_op = "delete"
                         debug_log(f"[POST] Deleted task: {task_name}")
 
                     conn.commit()
                     conn.close()
 
+                if change_op:
+                    change_feed.record("manualTasks", change_op, task_name, task_name)
+
                 self.send_response(200)
                 self.send_header("Content-Type", "application/json")
                 self.send_cors_headers()
@@ -1422,8 +2461,10 @@ class SimpleHandler(BaseHTTPRequestHandler):
                             "UPDATE employee_info SET loggedIn = 0 WHERE employeeName = ?",
                             (employee_name,)
                         )
+                        change_row = employee_change_row(cursor, employee_name)
                         conn.commit()
                         conn.close()
+                        change_feed.record("employee_info", "update", employee_name, change_row)
                         response = {"status": "success", "message": f"Employee '{employee_name}' logged out successfully"}
                         debug_log(f"[POST] Successfully logged out '{employee_name}'")
 
@@ -1593,7 +2634,9 @@ class SimpleHandler(BaseHTTPRequestHandler):
                             "UPDATE employee_info SET start_time = ?, end_time = ? WHERE employeeName = ?",
                             (start_time_str, end_time_str, employee_name)
                         )
+                        change_row = employee_change_row(cursor, employee_name)
                         conn.commit()
+                        change_feed.record("employee_info", "update", employee_name, change_row)
                         response = {"status": "success", "message": f"Updated '{employee_name}' start and end times"}
                     else:
                         response = {"status": "error", "message": f"Employee '{employee_name}' not found"}
@@ -1636,12 +2679,12 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     cursor = conn.cursor()
 
                     cursor.execute(
-                        "SELECT id, eligibleList FROM facility_workstations WHERE workstation = ?",
+                        "SELECT id, eligibleList, availableStations FROM facility_workstations WHERE workstation = ?",
                         (workstation_name,)
                     )
                     row = cursor.fetchone()
                     if row:
-                        row_id, eligible_json = row
+                        row_id, eligible_json, available = row
                         try:
                             eligible_list = json.loads(eligible_json) if eligible_json else []
                         except json.JSONDecodeError:
@@ -1654,6 +2697,8 @@ class SimpleHandler(BaseHTTPRequestHandler):
                                 (json.dumps(eligible_list), row_id)
                             )
                             conn.commit()
+                            change_feed.record("facility_workstations", "update", workstation_name,
+                                               workstation_change_row(workstation_name, available, eligible_list))
                             response = {
                                 "status": "success",
                                 "message": f"Employee '{employee_name}' removed from '{workstation_name}'"
@@ -1707,11 +2752,14 @@ class SimpleHandler(BaseHTTPRequestHandler):
                     conn = sqlite3.connect(MAIN_DB_FILE)
                     cursor = conn.cursor()
 
+                    changes = []
                     cursor.execute("DELETE FROM employee_info WHERE employeeName = ?", (employee_name,))
+                    if cursor.rowcount:
+                        changes.append(("employee_info", "delete", employee_name, None))
 
-                    cursor.execute("SELECT id, eligibleList FROM facility_workstations")
+                    cursor.execute("SELECT id, workstation, eligibleList, availableStations FROM facility_workstations")
                     rows = cursor.fetchall()
-                    for row_id, eligible_json in rows:
+                    for row_id, workstation_name, eligible_json, available in rows:
                         if eligible_json:
                             try:
                                 eligible_list = json.loads(eligible_json)
@@ -1723,10 +2771,15 @@ class SimpleHandler(BaseHTTPRequestHandler):
                                     "UPDATE facility_workstations SET eligibleList = ? WHERE id = ?",
                                     (json.dumps(eligible_list), row_id)
                                 )
+                                changes.append(("facility_workstations", "update", workstation_name,
+                                                workstation_change_row(workstation_name, available, eligible_list)))
 
                     conn.commit()
                     conn.close()
 
+                for table, op, key, change_row in changes:
+                    change_feed.record(table, op, key, change_row)
+
                 self.send_response(200)
                 self.send_header("Content-Type", "application/json")
                 self.send_cors_headers()
@@ -1812,14 +2865,65 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 }).encode("utf-8"))
                 return
 
+        elif parsed_path.path == "/api/orderStatus":
+            debug_log("[POST] Matched: /api/orderStatus")
+
+            # Bulk form of GET /api/orderStatus: {"orderNumber": [...], "leadBarcode": [...]}
+            try:
+                lookups = {
+                    key_type: data.get(key_type) if isinstance(data.get(key_type), list) else [data.get(key_type)]
+                    for key_type in ORDER_KEY_TYPES if data.get(key_type) is not None
+                }
+                orders = tracking_statuses(lookups)
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "success", "orders": orders}).encode("utf-8"))
+
+            except Exception as e:
+                debug_log(f"[POST] ERROR in orderStatus: {e}")
+                self.send_response(500)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "error", "message": str(e)}).encode("utf-8"))
+            return
+
+        elif parsed_path.path == "/api/whereIs":
+            debug_log("[POST] Matched: /api/whereIs")
+
+            # Bulk form of GET /api/whereIs: {"isoBarcode": [...], "containerID": [...], ...}
+            try:
+                lookups = {
+                    key: data.get(key) if isinstance(data.get(key), list) else [data.get(key)]
+                    for key in LOOKUP_KEYS if data.get(key) is not None
+                }
+                items = tracking_where_is(lookups, int(data.get("limit") or 0))
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "success", "items": items}).encode("utf-8"))
+
+            except Exception as e:
+                debug_log(f"[POST] ERROR in whereIs: {e}")
+                self.send_response(500)
+                self.send_header("Content-Type", "application/json")
+                self.send_cors_headers()
+                self.end_headers()
+                self.wfile.write(json.dumps({"status": "error", "message": str(e)}).encode("utf-8"))
+            return
+
         elif parsed_path.path == "/api/getTrackingHistory":
             debug_log("[POST] Matched: /api/getTrackingHistory")
 
-            order_number = data.get("orderNumber")
-            lead_barcode = data.get("leadBarcode")
-            iso_barcode = data.get("isoBarcode")
+            # Each key may be a single value or a list; everything is resolved in one pass
+            lookups = normalise_keys(data)
 
-            if not (order_number or lead_barcode or iso_barcode):
+            if not lookups:
                 self.send_response(400)
                 self.send_header("Content-Type", "application/json")
                 self.send_cors_headers()
@@ -1831,36 +2935,19 @@ class SimpleHandler(BaseHTTPRequestHandler):
                 return
 
             try:
-                conn = sqlite3.connect(TRACKING_DB_FILE)
-                cursor = conn.cursor()
-
-                history_rows = []
-
-                if iso_barcode:
-                    cursor.execute("SELECT containerID, isoBarcode, history FROM tracking_data WHERE isoBarcode = ?", (iso_barcode,))
-                    row = cursor.fetchone()
-                    if row and row[2]:
-                        # row[0] = containerID, row[1] = iso, row[2] = history
-                        history_rows.append([row[0], row[1]] + row[2].strip().split("\n"))
+                rows, matches = cached_lookup_rows(lookups)
 
-                if lead_barcode:
-                    cursor.execute("SELECT containerID, isoBarcode, history FROM tracking_data WHERE leadBarcode = ?", (lead_barcode,))
-                    for row in cursor.fetchall():
-                        if row[2]:
-                            history_rows.append([row[0], row[1]] + row[2].strip().split("\n"))
-
-                if order_number:
-                    cursor.execute("SELECT containerID, isoBarcode, history FROM tracking_data WHERE orderNumber = ?", (order_number,))
-                    for row in cursor.fetchall():
-                        if row[2]:
-                            history_rows.append([row[0], row[1]] + row[2].strip().split("\n"))
-
-
-                conn.close()
+                # Legacy shape: [containerID, isoBarcode, *history lines] once per matched row
+                history_rows = [
+                    [row["containerID"], row["isoBarcode"]] + row["history"].strip().split("\n")
+                    for row in rows.values() if row["history"]
+                ]
 
                 response = {
                     "status": "success",
-                    "history": history_rows
+                    "history": history_rows,
+                    "rows": [dict(row, ref=ref) for ref, row in rows.items()],
+                    "matches": matches
                 }
 
                 self.send_response(200)
@@ -0,0 +1,69 @@
+from collections import Counter
+from threading import Event, Lock
+
+
+class _Flight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key into one: the first caller runs compute(),
+    callers arriving while it runs wait and get the same result (or the same exception).
+    Nothing is cached - a call after the flight has landed computes afresh. A flight may
+    have started before a write the caller depends on; callers that must see their writes
+    put a write generation (e.g. the change feed seq) in the key.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._flights = {}
+        self._calls = Counter()
+        self._executions = Counter()
+
+    def do(self, key, compute, label=None):
+        """Return compute()'s result, shared with every concurrent call for key. label groups the stats."""
+        with self._lock:
+            self._calls[label] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self._executions[label] += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = compute()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def stats(self):
+        def summary(calls, executions):
+            return {
+                "calls": calls,
+                "executions": executions,
+                "coalesced": calls - executions,
+                "coalesceRatio": round((calls - executions) / calls, 4) if calls else None
+            }
+
+        with self._lock:
+            result = summary(sum(self._calls.values()), sum(self._executions.values()))
+            result["inFlight"] = len(self._flights)
+            result["byLabel"] = {label: summary(self._calls[label], self._executions[label]) for label in self._calls}
+        return result
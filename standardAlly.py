@@ -4,10 +4,10 @@ import sys
 import threading
 import time
 from multiprocessing import Process, Queue
-from tkinter import Tk, Canvas, StringVar, Toplevel, Label, IntVar, Button
+from tkinter import Tk, Canvas, StringVar, Toplevel, Label, IntVar, Button, TclError
 from tkinter.ttk import Combobox, Entry, Style, Button as TtkButton, Treeview, Scrollbar
 from PIL import Image, ImageTk, ImageFilter
-from clientCalls import fetch_facility_workstations, send_tracking_data, move_container, fetch_employee_start_time, log_employee_time, loggedOut, fetch_employees_tasks, update_employee_task
+from clientCalls import fetch_facility_workstations, send_tracking_data, move_container, fetch_employee_start_time, log_employee_time, loggedOut, fetch_employees_tasks_snapshot, fetch_employees_tasks_changes, update_employee_task
 import Barcode_Scanning as barcode_listener
 import tkinter.font as tkFont
 from datetime import datetime, timedelta
@@ -329,6 +329,7 @@ def create_standard_window(employee):
                 p.terminate()
         except Exception as e:
             print(f"[STANDARD] Error terminating process: {e}")
+        task_sync["running"] = False
         print("[STANDARD] Destroying window...")
         root.destroy()
 
@@ -535,8 +536,7 @@ def create_standard_window(employee):
                     
                     if response.get("status") == "success":
                         print(f"[STANDARD] Successfully started task: {task_name}")
-                        # Refresh the tasks table to show updated status
-                        fetch_tasks_thread()
+                        # The updated status arrives through the task subscription
                     else:
                         print(f"[STANDARD] Failed to start task: {response.get('message')}")
                         show_custom_popup("Error", message=response.get("message", "Failed to start task"))
@@ -578,8 +578,7 @@ def create_standard_window(employee):
                     
                     if response.get("status") == "success":
                         print(f"[STANDARD] Successfully signed off task: {task_name}")
-                        # Refresh the tasks table to show updated status
-                        fetch_tasks_thread()
+                        # The updated status arrives through the task subscription
                     else:
                         print(f"[STANDARD] Failed to sign off task: {response.get('message')}")
                         show_custom_popup("Error", message=response.get("message", "Failed to sign off task"))
@@ -609,6 +608,7 @@ def create_standard_window(employee):
         finally:
             window_result = True  # Return to login screen
             print("[STANDARD] Setting window_result to True (return to login)")
+            task_sync["running"] = False
             root.destroy()
 
     # ---------------- Buttons ----------------
@@ -769,21 +769,48 @@ def create_standard_window(employee):
 
         root.after(0, update_combo_and_show_popup)
 
+    # Live task subscription state: change cursor, server epoch and the names subscribed to
+    task_sync = {"seq": 0, "epoch": None, "names": set(), "running": False}
+
+    def wrap_text(text, limit=40):
+        words = text.split(' ')
+        lines, current = [], ''
+        for word in words:
+            if len(current + ' ' + word) <= limit:
+                current += (' ' if current else '') + word
+            else:
+                lines.append(current)
+                current = word
+        if current:
+            lines.append(current)
+        return '\n'.join(lines)
+
+    def show_task(rowid, task):
+        # task format: [name, task, status, isobarcode]
+        iid = str(rowid)
+        # Use wrapping for display only, not values
+        wrapped_text = wrap_text(f"{task[1]} - {task[2]}")
+        if tasks_tree.exists(iid):
+            tasks_tree.item(iid, text=wrapped_text, values=(task[3],))
+        else:
+            tasks_tree.insert('', 'end', iid=iid, text=wrapped_text, values=(task[3],))
+
     def fetch_tasks_thread():
         print("[STANDARD] Fetching manual tasks...")
         try:
-            all_tasks = fetch_employees_tasks()
-            print(f"[STANDARD] Fetched tasks: {all_tasks}")
-            
             # Get selected workstation
             selected_workstation = combo1.get().strip()
-            
-            # Filter tasks for current employee OR matching workstation name
-            employee_tasks = [
-                task for task in all_tasks 
-                if task[0] == employee.employeeName or task[0] == selected_workstation
-            ]
-            print(f"[STANDARD] Filtered tasks for {employee.employeeName} or workstation '{selected_workstation}': {employee_tasks}")
+            names = {employee.employeeName}
+            if selected_workstation:
+                names.add(selected_workstation)
+
+            # Server only returns tasks for current employee OR matching workstation name
+            snapshot = fetch_employees_tasks_snapshot(names)
+            if snapshot is None:
+                return
+            tasks, rowids, seq, epoch = snapshot
+            employee_tasks = list(zip(rowids, tasks))
+            print(f"[STANDARD] Fetched tasks for {employee.employeeName} or workstation '{selected_workstation}': {employee_tasks}")
             
             def update_tasks_table():
                 # Clear existing items
@@ -791,33 +818,61 @@ def create_standard_window(employee):
                     tasks_tree.delete(item)
                 
                 # Add filtered tasks - store full task data in item values
-                for task in employee_tasks:
-                    # task format: [name, task, status, isobarcode]
-                    task_text = f"{task[1]} - {task[2]}"
-                    # Wrap long text lines at 40 characters
-                    def wrap_text(text, limit=40):
-                        words = text.split(' ')
-                        lines, current = [], ''
-                        for word in words:
-                            if len(current + ' ' + word) <= limit:
-                                current += (' ' if current else '') + word
-                            else:
-                                lines.append(current)
-                                current = word
-                        if current:
-                            lines.append(current)
-                        return '\n'.join(lines)
-
-                    # Use wrapping for display only, not values
-                    wrapped_text = wrap_text(task_text)
-                    tasks_tree.insert('', 'end', text=wrapped_text, values=(task[3],))
+                for rowid, task in employee_tasks:
+                    show_task(rowid, task)
+
+                task_sync.update(seq=seq, epoch=epoch, names=names)
+                if not task_sync["running"]:
+                    task_sync["running"] = True
+                    threading.Thread(target=follow_tasks_thread, daemon=True).start()
 
-            
             root.after(0, update_tasks_table)
             
         except Exception as e:
             print(f"[STANDARD] Error fetching tasks: {e}")
 
+    def apply_task_changes(changes, names):
+        # Ignore results from a subscription that was replaced while the request was in flight
+        if names is not task_sync["names"]:
+            return
+        for change in changes:
+            if change["table"] != "EmployeesTasks":
+                continue
+            iid = str(change["key"])
+            task = change["row"]
+            if change["op"] == "delete" or task[0] not in names:
+                if tasks_tree.exists(iid):
+                    tasks_tree.delete(iid)
+            else:
+                show_task(change["key"], task)
+
+    def follow_tasks_thread():
+        print("[STANDARD] Following task changes...")
+        while task_sync["running"]:
+            names = task_sync["names"]
+            result = fetch_employees_tasks_changes(task_sync["seq"], task_sync["epoch"], names)
+            if result is None:
+                time.sleep(5)
+            elif result.get("resync"):
+                print("[STANDARD] Task subscription out of date, reloading tasks")
+                fetch_tasks_thread()
+                time.sleep(1)
+            elif names is task_sync["names"]:
+                task_sync["seq"] = result["seq"]
+                if result.get("changes"):
+                    try:
+                        root.after(0, lambda c=result["changes"], n=names: apply_task_changes(c, n))
+                    except (RuntimeError, TclError):
+                        # Window has been destroyed
+                        break
+        print("[STANDARD] Stopped following task changes")
+
+    def on_workstation_selected(event=None):
+        # A different workstation changes which tasks the station shows
+        threading.Thread(target=fetch_tasks_thread, daemon=True).start()
+
+    combo1.bind('<<ComboboxSelected>>', on_workstation_selected)
+
     threading.Thread(target=fetch_workstations_thread, daemon=True).start()
 
     # Function to clear table selection
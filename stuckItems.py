@@ -0,0 +1,138 @@
+import time
+from threading import Lock
+
+from orderStatus import is_packing
+
+# Seconds an item may sit at a workstation without a scan before it is reported as stuck.
+# Overrides are keyed by workstation name; None means items there are never stuck (e.g. dispatched).
+# Packing stations (orderStatus.is_packing) are the last stop and never have a threshold: packed
+# items wait for collection, not for another scan.
+DEFAULT_STUCK_THRESHOLD = 4 * 3600
+STUCK_THRESHOLDS = {}
+
+ITEM_COLUMNS = ("rowid", "isoBarcode", "leadBarcode", "orderNumber", "containerID", "prodType",
+                "workstation", "employee", "lastActivity")
+
+# tracking_data is walked on its last_activity index; current_location supplies the workstation
+ITEM_SELECT = """
+    SELECT t.rowid, t.isoBarcode, t.leadBarcode, t.orderNumber, t.containerID, t.prodType,
+           l.workstation, l.employee, t.last_activity
+    FROM tracking_data t
+    LEFT JOIN current_location l ON l.trackingRowid = t.rowid
+"""
+
+
+class StuckDetector:
+    """
+    Cached set of items idle beyond their workstation's threshold.
+
+    The first evaluate() is one range scan over the last_activity index. After that each run
+    only looks at rows that crossed a threshold since the previous run (a narrow range scan
+    per distinct threshold) and at rows the tracking worker touched in between (by rowid).
+    """
+
+    def __init__(self, default_threshold=DEFAULT_STUCK_THRESHOLD, thresholds=None):
+        self.default_threshold = default_threshold
+        self.thresholds = STUCK_THRESHOLDS if thresholds is None else thresholds
+        self._lock = Lock()
+        self._stuck = {}
+        self._touched = set()
+        self._last_run = None
+        self.last_run_seconds = None
+        self.rows_examined = 0
+
+    def threshold_for(self, workstation):
+        if is_packing(workstation):
+            return None
+        return self.thresholds.get(workstation, self.default_threshold)
+
+    def touch(self, writes):
+        """Note rows changed by committed tracking writes so the next run re-examines them."""
+        with self._lock:
+            self._touched.update(write["rowid"] for write in writes)
+
+    def _judge(self, row, now):
+        item = dict(zip(ITEM_COLUMNS, row))
+        threshold = self.threshold_for(item["workstation"])
+        if threshold is None or item["lastActivity"] is None or now - item["lastActivity"] < threshold:
+            return None
+        item["threshold"] = threshold
+        return item
+
+    def evaluate(self, layout, now=None):
+        """
+        Bring the stuck set up to date from every partition of `layout` (a PartitionLayout),
+        read in parallel; items are keyed by global rowid. Returns the number of rows examined.
+        """
+        now = int(now if now is not None else time.time())
+        started = time.monotonic()
+        with self._lock:
+            touched, self._touched = self._touched, set()
+            previous = self._last_run
+
+        distinct = {t for t in [self.default_threshold, *self.thresholds.values()] if t is not None}
+
+        def read(cursor, partition):
+            rows, rechecked = [], []
+            if previous is None:
+                # Full pass: everything idle longer than the shortest threshold
+                if distinct:
+                    cursor.execute(ITEM_SELECT + " WHERE t.last_activity < ?", (now - min(distinct),))
+                    rows += cursor.fetchall()
+            else:
+                # Rows whose idle time crossed threshold t since the last run
+                for t in distinct:
+                    cursor.execute(ITEM_SELECT + " WHERE t.last_activity >= ? AND t.last_activity < ?",
+                                   (previous - t, now - t))
+                    rows += cursor.fetchall()
+
+                # Rows written since the last run may have moved on, changed workstation or been deleted
+                local = [rowid for rowid, p in map(layout.split_rowid, touched) if p == partition]
+                for start in range(0, len(local), 500):
+                    chunk = local[start:start + 500]
+                    cursor.execute(ITEM_SELECT + f" WHERE t.rowid IN ({', '.join('?' * len(chunk))})", chunk)
+                    rechecked += cursor.fetchall()
+            return [[(layout.global_rowid(row[0], partition),) + row[1:] for row in found] for found in (rows, rechecked)]
+
+        found, rechecked, examined = {}, {}, 0
+        for rows, recheck_rows in layout.read_all(read):
+            examined += len(rows) + len(recheck_rows)
+            for row in rows:
+                item = self._judge(row, now)
+                if item:
+                    found[item["rowid"]] = item
+            for row in recheck_rows:
+                rechecked[row[0]] = self._judge(row, now)
+
+        if previous is None:
+            stuck = found
+        else:
+            with self._lock:
+                stuck = dict(self._stuck)
+            for rowid in touched:
+                stuck.pop(rowid, None)
+            stuck.update(found)
+            stuck.update({rowid: item for rowid, item in rechecked.items() if item})
+
+        with self._lock:
+            self._stuck = stuck
+            self._last_run = now
+            self.last_run_seconds = round(time.monotonic() - started, 4)
+            self.rows_examined = examined
+        return examined
+
+    def snapshot(self, workstation=None, min_idle=None, now=None):
+        """Stuck items, longest idle first, with idleSeconds as of `now`."""
+        now = now if now is not None else time.time()
+        with self._lock:
+            items = list(self._stuck.values())
+        result = []
+        for item in items:
+            if workstation and item["workstation"] not in workstation:
+                continue
+            idle = int(now - item["lastActivity"])
+            if min_idle and idle < min_idle:
+                continue
+            result.append(dict(item, idleSeconds=idle))
+        result.sort(key=lambda item: -item["idleSeconds"])
+        return result
@@ -0,0 +1,19 @@
+import importlib
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture(scope="session")
+def serverb(tmp_path_factory):
+    """
+    The serverb module, imported inside a temporary directory. Importing it creates its
+    databases, journal and archive in the working directory and starts background threads
+    that open them by relative path, so the session stays in that directory to the end.
+    """
+    os.chdir(tmp_path_factory.mktemp("server"))
+    return importlib.import_module("serverb")
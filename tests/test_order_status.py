@@ -0,0 +1,43 @@
+import sqlite3
+
+from orderStatus import init_order_status, apply_status_writes, get_statuses
+
+
+def scan(timestamp, workstation):
+    return f"{timestamp} | {workstation} | Harry Howford"
+
+
+def test_writes_are_applied_as_deltas_of_old_and_new_history():
+    conn = sqlite3.connect(":memory:")
+    cursor = conn.cursor()
+    cursor.execute("CREATE TABLE tracking_data (orderNumber TEXT, leadBarcode TEXT, history TEXT)")
+    init_order_status(cursor)
+    first = scan("2025-10-10T14:56:00", "Printer Station")
+    second = scan("2025-10-10T15:10:00", "CanvCut")
+    apply_status_writes(cursor, [
+        {"rowid": 1, "op": "insert", "old_history": None, "old_row": None,
+         "row": {"orderNumber": "1001", "leadBarcode": "L-1", "history": first}},
+        {"rowid": 2, "op": "insert", "old_history": None, "old_row": None,
+         "row": {"orderNumber": "1001", "leadBarcode": None, "history": second}}
+    ])
+    # The item is packed and moves from L-1 to L-2; nothing is read back from tracking_data
+    packed = first + "\n" + scan("2025-10-10T15:30:00", "CanvPack")
+    apply_status_writes(cursor, [
+        {"rowid": 1, "op": "update", "old_history": first, "old_row": {"orderNumber": "1001", "leadBarcode": "L-1"},
+         "row": {"orderNumber": "1001", "leadBarcode": "L-2", "history": packed}}
+    ])
+
+    [order, lead] = get_statuses(cursor, {"orderNumber": ["1001"], "leadBarcode": ["L-1", "L-2"]})
+    assert (order["expectedItems"], order["packedItems"], order["complete"]) == (2, 1, False)
+    assert order["stageCounts"] == {"Printer Station": 1, "CanvPack": 1, "CanvCut": 1}
+    assert (order["lastScan"], order["lastStage"]) == ("2025-10-10T15:30:00", "CanvPack")
+    assert (lead["key"], lead["expectedItems"], lead["packedItems"], lead["complete"]) == ("L-2", 1, 1, True)
+
+    apply_status_writes(cursor, [
+        {"rowid": 2, "op": "delete", "old_history": second, "old_row": {"orderNumber": "1001", "leadBarcode": None},
+         "row": {"orderNumber": "1001", "leadBarcode": None}}
+    ])
+
+    [order] = get_statuses(cursor, {"orderNumber": ["1001"]})
+    assert (order["expectedItems"], order["packedItems"], order["complete"]) == (1, 1, True)
+    assert order["stageCounts"] == {"Printer Station": 1, "CanvPack": 1}
@@ -0,0 +1,37 @@
+import sqlite3
+import time
+
+from productionRollup import init_rollup_table, backfill, query_rollup
+from trackingArchive import archive_rows
+from trackingPartitions import PartitionLayout, merge_counts
+
+
+def test_archived_scans_are_backfilled_into_one_partition_only(tmp_path):
+    archive_dir = str(tmp_path / "archive")
+    archive_rows([
+        {"rowid": 1, "orderNumber": "1001", "isoBarcode": "ISO-1", "prodType": "Canvas",
+         "history": "2025-10-10T14:56:00 | CanvPack | Harry Howford", "last_activity": int(time.time())},
+        {"rowid": 2, "leadBarcode": "L-2", "isoBarcode": "ISO-2", "prodType": "Framed",
+         "history": "2025-10-10T15:10:00 | CanvPack | Harry Howford\n2025-10-10T15:20:00 | RBPack | Harry Howford",
+         "last_activity": int(time.time())}
+    ], archive_dir)
+
+    layout = PartitionLayout(str(tmp_path / "trackingData.db"), 3)
+    counted = 0
+    for partition, db_file in enumerate(layout.files):
+        conn = sqlite3.connect(db_file)
+        cursor = conn.cursor()
+        cursor.execute("CREATE TABLE tracking_data (orderNumber TEXT, prodType TEXT, history TEXT)")
+        init_rollup_table(cursor)
+        counted += backfill(cursor, archive_dir, owns=lambda row: layout.owns(partition, row))
+        conn.commit()
+        conn.close()
+
+    assert counted == 3
+
+    # As /api/productionReport sums the partitions
+    def read(cursor, _partition):
+        rows = query_rollup(cursor, "2025-10-10", "2025-10-10", ["workstation"], "total")
+        return [(r["workstation"], r["count"]) for r in rows]
+
+    assert merge_counts(layout.read_all(read)) == [("CanvPack", 2), ("RBPack", 1)]
@@ -0,0 +1,150 @@
+import sqlite3
+
+import pytest
+
+from barcodeIndex import BarcodeIndex, SqlRowLookup, StaleIndex
+from historyAppend import register_history_functions
+
+TIMESTAMP = "2025-10-10T14:56:00"
+
+
+@pytest.fixture
+def db(serverb, tmp_path):
+    """A connection to a fresh tracking database file with the server's schema."""
+    db_file = str(tmp_path / "trackingData.db")
+    serverb.init_tracking_db(db_file, partition=1)
+    conn = sqlite3.connect(db_file)
+    register_history_functions(conn)
+    yield conn
+    conn.close()
+
+
+def run_job(serverb, conn, index=None, **fields):
+    """Run receive_print_data_job on a record as the endpoint builds it, by default on a freshly loaded index."""
+    record = {
+        "kind": "receivePrintData",
+        "containerID": None,
+        "orderNumber": None,
+        "leadBarcode": None,
+        "isoBarcode": None,
+        "workstation": "Printer Station",
+        "employeeName": "Harry Howford",
+        "prodType": None,
+        "size": None,
+        "itemNum": None,
+        "timestamp": TIMESTAMP
+    }
+    record.update(fields)
+    cursor = conn.cursor()
+    if index is None:
+        index = BarcodeIndex()
+        index.load(cursor)
+    serverb.receive_print_data_job(cursor, record, index)
+    conn.commit()
+
+
+def rows(conn):
+    cursor = conn.execute("""
+        SELECT rowid, containerID, orderNumber, leadBarcode, isoBarcode, itemNum, prodType, size, prodDate, history
+        FROM tracking_data ORDER BY rowid
+    """)
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, r)) for r in cursor.fetchall()]
+
+
+def test_existing_iso_is_updated_keeping_stored_values_for_blanks(serverb, db):
+    run_job(serverb, db, isoBarcode="ISO-1", orderNumber="1001", leadBarcode="L-1",
+            prodType="Canvas", size="10-10-25/38mm/16x20")
+
+    run_job(serverb, db, isoBarcode="ISO-1", orderNumber="", prodType="Framed", workstation="Reprint")
+
+    [row] = rows(db)
+    assert row["prodType"] == "Framed"
+    assert row["orderNumber"] == "1001"
+    assert row["leadBarcode"] == "L-1"
+    assert row["size"] == "10-10-25/38mm/16x20"
+    assert row["prodDate"] == "2025-10-10"
+    assert row["history"].splitlines() == [
+        f"{TIMESTAMP} | Printer Station | Harry Howford",
+        f"{TIMESTAMP} | Reprint | Harry Howford"
+    ]
+
+
+def test_existing_iso_takes_a_new_size_and_its_date(serverb, db):
+    run_job(serverb, db, isoBarcode="ISO-1", orderNumber="1001", size="10-10-25/38mm/16x20")
+
+    run_job(serverb, db, isoBarcode="ISO-1", size="11-10-25/38mm/20x30")
+
+    [row] = rows(db)
+    assert row["size"] == "11-10-25/38mm/20x30"
+    assert row["prodDate"] == "2025-10-11"
+
+
+def test_unknown_iso_is_merged_into_oldest_row_of_its_order_without_one(serverb, db):
+    run_job(serverb, db, containerID=7, orderNumber="2002", itemNum=1)
+    run_job(serverb, db, containerID=8, orderNumber="2002", itemNum=2)
+
+    run_job(serverb, db, isoBarcode="ISO-2", orderNumber="2002", leadBarcode="L-2",
+            prodType="Canvas", size="10-10-25/38mm/16x20", workstation="Print Room")
+
+    first, second = rows(db)
+    assert (first["containerID"], first["isoBarcode"], first["leadBarcode"]) == (7, "ISO-2", "L-2")
+    assert (first["prodType"], first["prodDate"]) == ("Canvas", "2025-10-10")
+    assert len(first["history"].splitlines()) == 2
+    assert second["isoBarcode"] is None
+
+    run_job(serverb, db, isoBarcode="ISO-3", orderNumber="2002")
+
+    assert [row["isoBarcode"] for row in rows(db)] == ["ISO-2", "ISO-3"]
+
+
+def test_unknown_iso_is_inserted(serverb, db):
+    run_job(serverb, db, containerID=7, orderNumber="3003", itemNum=1)
+    run_job(serverb, db, isoBarcode="ISO-3", orderNumber="3003")
+
+    run_job(serverb, db, isoBarcode="ISO-4", orderNumber="3003", leadBarcode="L-4",
+            prodType="Framed", size="12-10-25/38mm/16x20")
+
+    assert len(rows(db)) == 2
+    row = rows(db)[1]
+    assert (row["containerID"], row["orderNumber"], row["leadBarcode"], row["isoBarcode"]) == (None, "3003", "L-4", "ISO-4")
+    assert (row["prodType"], row["size"], row["prodDate"]) == ("Framed", "12-10-25/38mm/16x20", "2025-10-12")
+    assert row["history"] == f"{TIMESTAMP} | Printer Station | Harry Howford"
+
+
+def test_container_attaches_to_existing_row_of_the_order(serverb, db):
+    run_job(serverb, db, isoBarcode="ISO-5", orderNumber="5005", size="10-10-25/38mm/16x20")
+
+    run_job(serverb, db, containerID=12, orderNumber="5005", itemNum=3, workstation="Container Station")
+
+    [row] = rows(db)
+    assert (row["containerID"], row["itemNum"], row["isoBarcode"]) == (12, 3, "ISO-5")
+    assert len(row["history"].splitlines()) == 2
+
+
+def test_container_inserts_a_row_once_the_order_has_none_free(serverb, db):
+    run_job(serverb, db, containerID=12, orderNumber="6006", itemNum=1)
+
+    run_job(serverb, db, containerID=13, orderNumber="6006", itemNum=2)
+
+    first, second = rows(db)
+    assert (first["containerID"], first["itemNum"]) == (12, 1)
+    assert (second["containerID"], second["orderNumber"], second["itemNum"]) == (13, "6006", 2)
+    assert second["isoBarcode"] is None
+
+
+def test_row_deleted_behind_the_index_raises_and_sql_lookup_recovers(serverb, db):
+    run_job(serverb, db, isoBarcode="ISO-8", orderNumber="8008")
+    run_job(serverb, db, isoBarcode="ISO-9", orderNumber="8008")
+    stale = BarcodeIndex()
+    stale.load(db.cursor())
+    # As serverJanitor.py would while the server is up
+    db.execute("DELETE FROM tracking_data WHERE isoBarcode = 'ISO-8'")
+    db.commit()
+
+    with pytest.raises(StaleIndex):
+        run_job(serverb, db, index=stale, containerID=21, orderNumber="8008", itemNum=1)
+    run_job(serverb, db, index=SqlRowLookup(db.cursor()), containerID=21, orderNumber="8008", itemNum=1)
+
+    [row] = rows(db)
+    assert (row["containerID"], row["itemNum"], row["isoBarcode"]) == (21, 1, "ISO-9")
@@ -0,0 +1,142 @@
+import gzip
+import json
+import os
+import sqlite3
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+
+# Expired tracking rows are moved here: one gzip JSON-lines file per day of last activity,
+# plus a small SQLite catalog mapping every order number / barcode to the partitions holding it
+ARCHIVE_DIR = "trackingArchive"
+CATALOG_FILE = "archiveIndex.db"
+
+ARCHIVE_COLUMNS = ("rowid", "containerID", "orderNumber", "leadBarcode", "isoBarcode", "history",
+                   "itemNum", "prodType", "size", "prodDate", "last_activity")
+
+archive_lock = Lock()
+
+
+def _catalog(archive_dir):
+    os.makedirs(archive_dir, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(archive_dir, CATALOG_FILE), timeout=10)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS archive_index (
+            key TEXT NOT NULL,
+            keyType TEXT NOT NULL,
+            partition TEXT NOT NULL,
+            UNIQUE (key, keyType, partition)
+        )
+    """)
+    return conn
+
+
+def partition_for(last_activity):
+    """Partition name (YYYY-MM-DD of last activity) for a row."""
+    if not last_activity:
+        return "undated"
+    return datetime.fromtimestamp(last_activity).strftime("%Y-%m-%d")
+
+
+def _partition_path(archive_dir, partition):
+    return os.path.join(archive_dir, f"tracking-{partition}.jsonl.gz")
+
+
+def archive_rows(rows, archive_dir=ARCHIVE_DIR):
+    """
+    Append row dicts (ARCHIVE_COLUMNS) to their day partitions and index their keys.
+    Everything is flushed to disk before returning, so the caller can then delete them.
+    """
+    if not rows:
+        return 0
+
+    by_partition = {}
+    for row in rows:
+        by_partition.setdefault(partition_for(row.get("last_activity")), []).append(row)
+
+    with archive_lock:
+        conn = _catalog(archive_dir)
+        try:
+            for partition, partition_rows in by_partition.items():
+                # Each append adds a gzip member; readers decompress concatenated members transparently
+                with gzip.open(_partition_path(archive_dir, partition), "at", encoding="utf-8") as f:
+                    for row in partition_rows:
+                        f.write(json.dumps(row) + "\n")
+                conn.executemany(
+                    "INSERT OR IGNORE INTO archive_index (key, keyType, partition) VALUES (?, ?, ?)",
+                    [(row[key_type], key_type, partition)
+                     for row in partition_rows
+                     for key_type in ("orderNumber", "leadBarcode", "isoBarcode")
+                     if row.get(key_type)]
+                )
+            conn.commit()
+        finally:
+            conn.close()
+    return len(rows)
+
+
+def _snapshot(path):
+    """(path, mtime, size) of a partition, or None if it does not exist; taken under archive_lock."""
+    if not os.path.exists(path):
+        return None
+    return path, os.path.getmtime(path), os.path.getsize(path)
+
+
+@lru_cache(maxsize=8)
+def _load_partition(path, mtime, size):
+    """
+    Rows of a partition as it was when snapshotted: only its first `size` bytes are read.
+    archive_rows writes whole gzip members under archive_lock, so that prefix is complete
+    even if more has been appended since, and this runs without the lock.
+    """
+    with open(path, "rb") as f:
+        data = gzip.decompress(f.read(size))
+    rows = {}
+    for line in data.decode("utf-8").splitlines():
+        if line.strip():
+            row = json.loads(line)
+            # A row archived twice (crash between archive and delete) is kept once
+            rows[(row.get("rowid"), row.get("last_activity"))] = row
+    return list(rows.values())
+
+
+def lookup(key_type, key, archive_dir=ARCHIVE_DIR):
+    """
+    Archived rows whose `key_type` ('orderNumber', 'leadBarcode' or 'isoBarcode') equals `key`.
+    The catalog narrows the search to the partitions that hold the key - normally just one.
+    """
+    if not key or not os.path.isdir(archive_dir):
+        return []
+
+    # Only the catalog query and the partition snapshots are taken under the lock; the
+    # decompression happens outside it so the tracking writer's archive_rows is not held up
+    with archive_lock:
+        conn = _catalog(archive_dir)
+        try:
+            partitions = [r[0] for r in conn.execute(
+                "SELECT partition FROM archive_index WHERE key = ? AND keyType = ? ORDER BY partition",
+                (key, key_type)
+            )]
+        finally:
+            conn.close()
+        snapshots = [_snapshot(_partition_path(archive_dir, partition)) for partition in partitions]
+
+    results = []
+    for snapshot in snapshots:
+        if snapshot:
+            results.extend(r for r in _load_partition(*snapshot) if r.get(key_type) == key)
+    return results
+
+
+def all_archived_rows(archive_dir=ARCHIVE_DIR, since=None):
+    """Every archived row, partition by partition; `since` (YYYY-MM-DD) skips older partitions."""
+    if not os.path.isdir(archive_dir):
+        return
+    for name in sorted(os.listdir(archive_dir)):
+        if name.startswith("tracking-") and name.endswith(".jsonl.gz"):
+            if since and name[len("tracking-"):-len(".jsonl.gz")] < since:
+                continue
+            with archive_lock:
+                snapshot = _snapshot(os.path.join(archive_dir, name))
+            if snapshot:
+                yield from _load_partition(*snapshot)
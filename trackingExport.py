@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+
+# One exported event per history line, with the item it belongs to
+EXPORT_COLUMNS = ("timestamp", "workstation", "employee", "rowid", "containerID", "orderNumber",
+                  "leadBarcode", "isoBarcode", "prodType", "size", "itemNum")
+
+# Tracking rows read per query, and bytes buffered before a chunk is sent
+EXPORT_ROWS_PER_QUERY = 500
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+
+def iter_events(cursor, date_from, date_to, rows_per_query=EXPORT_ROWS_PER_QUERY):
+    """
+    Yield event dicts for every history line dated within [date_from, date_to] (YYYY-MM-DD).
+    Rows are walked on the last_activity index in keyset-paged queries - a row's last activity
+    is never earlier than any of its scans, so rows last active before date_from are skipped -
+    and nothing beyond one page is held in memory.
+    """
+    start = int(datetime.strptime(date_from, "%Y-%m-%d").timestamp())
+    last_key = (start - 1, -1)
+    while True:
+        cursor.execute("""
+            SELECT last_activity, rowid, containerID, orderNumber, leadBarcode, isoBarcode, prodType, size, itemNum, history
+            FROM tracking_data
+            WHERE last_activity >= ? AND (last_activity, rowid) > (?, ?)
+            ORDER BY last_activity, rowid
+            LIMIT ?
+        """, (start, last_key[0], last_key[1], rows_per_query))
+        rows = cursor.fetchall()
+        if not rows:
+            return
+        for r in rows:
+            item = dict(zip(EXPORT_COLUMNS[3:], r[1:9]))
+            for line in (r[9] or "").splitlines():
+                parts = line.strip().split(" | ")
+                if len(parts) < 3 or not (date_from <= parts[0][:10] <= date_to):
+                    continue
+                event = {"timestamp": parts[0], "workstation": " | ".join(parts[1:-1]), "employee": parts[-1]}
+                event.update(item)
+                yield event
+        last_key = (rows[-1][0], rows[-1][1])
+
+
+def format_ndjson(events):
+    for event in events:
+        yield json.dumps(event) + "\n"
+
+
+def format_csv(events):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for event in events:
+        writer.writerow([event[c] for c in EXPORT_COLUMNS])
+        if buffer.tell() >= EXPORT_CHUNK_BYTES:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+class ChunkedWriter:
+    """Buffers output into HTTP/1.1 chunks (optionally gzip-compressed) on a response stream."""
+
+    def __init__(self, wfile, compress=False, chunk_bytes=EXPORT_CHUNK_BYTES):
+        self.wfile = wfile
+        self.chunk_bytes = chunk_bytes
+        self._buffer = bytearray()
+        # wbits=31 writes a gzip header and trailer
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+        self.bytes_sent = 0
+
+    def _send(self, data):
+        if data:
+            self.wfile.write(b"%x\r\n" % len(data) + data + b"\r\n")
+            self.bytes_sent += len(data)
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        if self._compressor:
+            data = self._compressor.compress(data)
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_bytes:
+            self._send(bytes(self._buffer))
+            self._buffer.clear()
+
+    def close(self):
+        if self._compressor:
+            self._buffer += self._compressor.flush()
+        self._send(bytes(self._buffer))
+        self._buffer.clear()
+        self.wfile.write(b"0\r\n\r\n")
+        self.wfile.flush()
@@ -0,0 +1,223 @@
+import json
+import os
+from collections import Counter, defaultdict
+from threading import Condition, Lock
+
+# Write-ahead journal of queued tracking records, so a crash or restart does not drop scans
+# that were already acknowledged. Local only - keep it out of git (see .gitignore).
+JOURNAL_DIR = "trackingJournal"
+
+# A segment is closed and a new one started past this size; a closed segment is deleted as
+# soon as every record in it has been committed
+SEGMENT_BYTES = 4 * 1024 * 1024
+
+# Key of the marker lines release() appends to a segment: the seqs of its records committed
+# since, which recover() must not replay
+RELEASED = "released"
+
+# Records the tracking worker gives up on are moved out of the segments into this file (JSON
+# lines, with the reason) for inspection and manual replay; recover() never reads it
+DEAD_LETTER_FILE = "dead-letters.log"
+
+
+def _segment_path(journal_dir, number):
+    return os.path.join(journal_dir, f"segment-{number:08d}.log")
+
+
+def _segment_numbers(journal_dir):
+    numbers = []
+    for name in os.listdir(journal_dir):
+        if name.startswith("segment-") and name.endswith(".log"):
+            try:
+                numbers.append(int(name[8:-4]))
+            except ValueError:
+                continue
+    return sorted(numbers)
+
+
+class TrackingJournal:
+    """
+    Append-only journal of tracking records (JSON lines), each numbered with a seq.
+    append() returns once the record is on disk; concurrent appends share fsyncs (group
+    commit), so an acknowledgement waits for at most one fsync. The tracking worker calls
+    release() after each SQLite commit: segments whose records are all committed are
+    truncated or deleted, and the others get a marker line naming the committed seqs.
+    recover() hands back exactly the records a previous run left uncommitted.
+    """
+
+    def __init__(self, journal_dir=JOURNAL_DIR, segment_bytes=SEGMENT_BYTES):
+        self.journal_dir = journal_dir
+        self.segment_bytes = segment_bytes
+        self._lock = Lock()
+        self._synced = Condition(self._lock)
+        self._segment = None
+        self._fd = None
+        self._size = 0
+        # Records appended but not yet released, per segment
+        self._pending = Counter()
+        self._seq = 0
+        self._written = 0
+        self._durable = 0
+        self._syncing = False
+        self.appends = 0
+        self.fsyncs = 0
+        self.recovered = 0
+        self.dead_lettered = 0
+
+    def _open_segment(self, number):
+        self._segment = number
+        self._fd = os.open(_segment_path(self.journal_dir, number), os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        # Make the new file's directory entry durable too
+        dir_fd = os.open(self.journal_dir, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def _write(self, record):
+        self._seq += 1
+        record["seq"] = self._seq
+        record["segment"] = self._segment
+        data = (json.dumps(record, separators=(",", ":")) + "\n").encode("utf-8")
+        os.write(self._fd, data)
+        self._size += len(data)
+        self._pending[self._segment] += 1
+        self._written += 1
+        return self._written
+
+    def _rotate(self):
+        # Called with the lock held and no fsync in flight
+        os.fsync(self._fd)
+        os.close(self._fd)
+        self._durable = self._written
+        previous = self._segment
+        self._open_segment(previous + 1)
+        if not self._pending.get(previous):
+            self._pending.pop(previous, None)
+            os.remove(_segment_path(self.journal_dir, previous))
+
+    def recover(self):
+        """
+        Records left by the previous run, oldest first. They are rewritten into a fresh
+        segment (and the old segments removed), so they are released like any other record.
+        """
+        os.makedirs(self.journal_dir, exist_ok=True)
+        old = _segment_numbers(self.journal_dir)
+        records = []
+        for number in old:
+            segment_records, released = [], set()
+            with open(_segment_path(self.journal_dir, number), "rb") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn final write from a crash; the request was never acknowledged
+                        break
+                    if RELEASED in entry:
+                        released.update(entry[RELEASED])
+                    else:
+                        segment_records.append(entry)
+            records.extend(r for r in segment_records if r.get("seq") not in released)
+
+        with self._lock:
+            self._open_segment((old[-1] + 1) if old else 1)
+            for record in records:
+                self._write(record)
+            os.fsync(self._fd)
+            self._durable = self._written
+        for number in old:
+            os.remove(_segment_path(self.journal_dir, number))
+        self.recovered = len(records)
+        return records
+
+    def append(self, record):
+        """Journal a record (a JSON-serialisable dict) and return once it is durable."""
+        with self._lock:
+            seq = self._write(record)
+            self.appends += 1
+            while self._durable < seq:
+                if self._syncing:
+                    self._synced.wait()
+                    continue
+                # Become the leader: one fsync covers every record written so far
+                self._syncing = True
+                target, fd = self._written, self._fd
+                self._lock.release()
+                try:
+                    os.fsync(fd)
+                finally:
+                    self._lock.acquire()
+                    self._syncing = False
+                    self._synced.notify_all()
+                self._durable = max(self._durable, target)
+                self.fsyncs += 1
+            if self._size >= self.segment_bytes and not self._syncing:
+                self._rotate()
+
+    def release(self, records):
+        """
+        Forget records whose writes are committed (or that were never queued). Fully
+        committed segments are emptied; the rest record the released seqs durably, so a
+        restart does not replay them.
+        """
+        with self._lock:
+            released = defaultdict(list)
+            for record in records:
+                segment = record.get("segment")
+                if segment in self._pending:
+                    self._pending[segment] -= 1
+                    released[segment].append(record["seq"])
+            for segment, seqs in released.items():
+                if self._pending[segment] > 0:
+                    self._mark_released(segment, seqs)
+                    continue
+                del self._pending[segment]
+                if segment == self._segment:
+                    os.ftruncate(self._fd, 0)
+                    self._size = 0
+                else:
+                    os.remove(_segment_path(self.journal_dir, segment))
+
+    def dead_letter(self, records, reason):
+        """
+        Give up on records: append them durably to the dead-letter file, then release them so a
+        restart does not replay them either.
+        """
+        with open(os.path.join(self.journal_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps({"reason": reason, "record": record}, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        with self._lock:
+            self.dead_lettered += len(records)
+        self.release(records)
+
+    def _mark_released(self, segment, seqs):
+        # Called with the lock held. The marker goes in the records' own segment, so it lives
+        # exactly as long as they do
+        data = (json.dumps({RELEASED: seqs}, separators=(",", ":")) + "\n").encode("utf-8")
+        if segment == self._segment:
+            os.write(self._fd, data)
+            self._size += len(data)
+            os.fsync(self._fd)
+            return
+        fd = os.open(_segment_path(self.journal_dir, segment), os.O_WRONLY | os.O_APPEND)
+        try:
+            os.write(fd, data)
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": sum(self._pending.values()),
+                "segments": len(self._pending),
+                "bytes": self._size,
+                "appends": self.appends,
+                "fsyncs": self.fsyncs,
+                "recordsPerFsync": round(self.appends / self.fsyncs, 2) if self.fsyncs else None,
+                "recovered": self.recovered,
+                "deadLettered": self.dead_lettered
+            }
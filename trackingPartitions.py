@@ -0,0 +1,331 @@
+import os
+import sqlite3
+import zlib
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+# Most partitions a layout may have. Rowids handed out beyond the writers (row cache, change
+# feed, analytics) are made global by interleaving: local rowid * PARTITION_STRIDE + partition
+PARTITION_STRIDE = 64
+
+
+def partition_files(base_file, partitions):
+    """['trackingData.db'] for a single partition, else ['trackingData.p0.db', 'trackingData.p1.db', ...]."""
+    if partitions <= 1:
+        return [base_file]
+    root, ext = os.path.splitext(base_file)
+    return [f"{root}.p{partition}{ext}" for partition in range(partitions)]
+
+
+class PartitionLayout:
+    """
+    Where tracking rows live: one SQLite file, or `partitions` files with items hashed into
+    them by order number. With a single partition every helper is the identity, so the
+    single-file layout behaves exactly as before.
+    """
+
+    def __init__(self, base_file, partitions=1):
+        if not 1 <= partitions <= PARTITION_STRIDE:
+            raise ValueError(f"partitions must be between 1 and {PARTITION_STRIDE}")
+        self.partitions = partitions
+        self.files = partition_files(base_file, partitions)
+        self._pool = ThreadPoolExecutor(max_workers=partitions, thread_name_prefix="partition-read") if partitions > 1 else None
+
+    def partition_of(self, key):
+        """Stable partition for a key (an order number, or a barcode when there is none)."""
+        if self.partitions == 1:
+            return 0
+        return zlib.crc32(str(key).encode("utf-8")) % self.partitions
+
+    def owns(self, partition, row):
+        """
+        Whether a row dict (e.g. an archived row, archived by whichever partition held it)
+        counts as `partition`'s: placed by order number, else by lead / ISO barcode.
+        """
+        key = row.get("orderNumber") or row.get("leadBarcode") or row.get("isoBarcode") or ""
+        return self.partition_of(key) == partition
+
+    def global_rowid(self, rowid, partition):
+        if self.partitions == 1 or rowid is None:
+            return rowid
+        return rowid * PARTITION_STRIDE + partition
+
+    def split_rowid(self, rowid):
+        """(local rowid, partition) for a global rowid; the inverse of global_rowid."""
+        if self.partitions == 1 or rowid is None:
+            return rowid, 0
+        return divmod(rowid, PARTITION_STRIDE)
+
+    def globalise_writes(self, writes, partition):
+        """Writes (as returned by collect_tracking_writes) with their rowids made global."""
+        if self.partitions == 1:
+            return writes
+        return [dict(write, rowid=self.global_rowid(write["rowid"], partition)) for write in writes]
+
+    def read_all(self, read):
+        """
+        Run read(cursor, partition) against every partition file, in parallel when there is
+        more than one, each on its own connection. Returns the results in partition order.
+        """
+        def run(partition):
+            conn = sqlite3.connect(self.files[partition])
+            try:
+                return read(conn.cursor(), partition)
+            finally:
+                conn.close()
+
+        if self._pool is None:
+            return [run(0)]
+        return list(self._pool.map(run, range(self.partitions)))
+
+
+def merge_counts(results):
+    """
+    Merge per-partition lists of (key..., count) rows into one: the counts of equal keys are
+    summed and the rows come back sorted by key as ORDER BY sorts them (NULLs first).
+    """
+    counts = Counter()
+    for rows in results:
+        for row in rows:
+            counts[tuple(row[:-1])] += row[-1]
+    return [key + (count,) for key, count in sorted(counts.items(), key=lambda item: tuple((v is not None, v) for v in item[0]))]
+
+
+def split_tracking_file(source_file, layout):
+    """
+    One-off move of a single-file trackingData.db to a partitioned layout: copy its
+    tracking_data rows into the partition files, items placed by order number (an orderless
+    item by its lead barcode's order), else by lead / ISO barcode. Only tracking_data is
+    copied; init_tracking_db builds each partition's derived tables from it, and the source
+    is left as it was. Runs only when partitioned and none of the partition files exist yet,
+    so it happens once; returns the rows copied per partition, or None if nothing was done.
+    """
+    if layout.partitions == 1 or not os.path.exists(source_file) or any(os.path.exists(f) for f in layout.files):
+        return None
+    source = sqlite3.connect(source_file)
+    try:
+        cursor = source.cursor()
+        cursor.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'tracking_data'")
+        table = cursor.fetchone()
+        if table is None:
+            return None
+        cursor.execute("SELECT rowid, orderNumber, leadBarcode, isoBarcode FROM tracking_data ORDER BY rowid")
+        rows = cursor.fetchall()
+    finally:
+        source.close()
+    if not rows:
+        return None
+
+    lead_orders = {}
+    for _rowid, order, lead, _iso in rows:
+        if order and lead:
+            lead_orders.setdefault(lead, order)
+    placed = [[] for _partition in range(layout.partitions)]
+    for rowid, order, lead, iso in rows:
+        placed[layout.partition_of(order or lead_orders.get(lead) or lead or iso or "")].append((rowid,))
+
+    # Built under temporary names and renamed at the end, so an interrupted split is redone
+    temp_files = [db_file + ".split" for db_file in layout.files]
+    for temp_file, rowids in zip(temp_files, placed):
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+        conn = sqlite3.connect(temp_file)
+        try:
+            conn.execute("ATTACH DATABASE ? AS source", (source_file,))
+            conn.execute(table[0])
+            # Inserted in source rowid order, so rows keep their relative age
+            conn.executemany("INSERT INTO main.tracking_data SELECT * FROM source.tracking_data WHERE rowid = ?", rowids)
+            conn.commit()
+        finally:
+            conn.close()
+    for temp_file, db_file in zip(temp_files, layout.files):
+        os.replace(temp_file, db_file)
+    return [len(rowids) for rowids in placed]
+
+
+class PartitionRouter:
+    """
+    Decides which partition(s) each tracking record is written in. New items go to the
+    partition their order number hashes to; a known ISO or lead barcode stays where it
+    already is, and container-wide records (moveContainer) go to every partition holding
+    part of the container. An item first seen without an order number joins its lead
+    barcode's rows, else is placed by its ISO barcode. The maps are learnt from each
+    partition's committed writes (apply) and from the records routed meanwhile, so a scan
+    queued right behind the record creating its item still lands in the same partition.
+    """
+
+    def __init__(self, layout):
+        self.layout = layout
+        self._lock = Lock()
+        # (partition, rowid) -> (isoBarcode, leadBarcode, containerID, seq); seq orders rows by
+        # when they were first seen, as rowids do within a single file
+        self._rows = {}
+        self._seq = 0
+        # isoBarcode -> (partition, rowid); rowid is None for an ISO routed but not yet written
+        self._iso = {}
+        # leadBarcode -> {(partition, rowid)}
+        self._leads = defaultdict(set)
+        # Partition a lead was routed to before any of its rows were written
+        self._lead_claims = {}
+        # containerID -> {partition: rows}
+        self._containers = defaultdict(Counter)
+        self.routed = Counter()
+        self.fanned_out = 0
+
+    def _add(self, partition, rowid, iso, lead, container, seq=None):
+        if seq is None:
+            self._seq += 1
+            seq = self._seq
+        self._rows[(partition, rowid)] = (iso, lead, container, seq)
+        if iso is not None:
+            self._iso[iso] = (partition, rowid)
+        if lead is not None:
+            self._leads[lead].add((partition, rowid))
+            self._lead_claims.pop(lead, None)
+        if container is not None:
+            self._containers[container][partition] += 1
+
+    def _remove(self, partition, rowid):
+        """Forget a row; returns its seq (None if it was unknown)."""
+        entry = self._rows.pop((partition, rowid), None)
+        if entry is None:
+            return None
+        iso, lead, container, seq = entry
+        if self._iso.get(iso) == (partition, rowid):
+            del self._iso[iso]
+        refs = self._leads.get(lead)
+        if refs is not None:
+            refs.discard((partition, rowid))
+            if not refs:
+                del self._leads[lead]
+        counts = self._containers.get(container)
+        if counts is not None:
+            counts[partition] -= 1
+            if counts[partition] <= 0:
+                del counts[partition]
+            if not counts:
+                del self._containers[container]
+        return seq
+
+    def load(self, partition, cursor):
+        """(Re)learn one partition's rows from its tracking_data. Returns the number of rows."""
+        cursor.execute("SELECT rowid, isoBarcode, leadBarcode, containerID FROM tracking_data")
+        rows = cursor.fetchall()
+        with self._lock:
+            for key in [key for key in self._rows if key[0] == partition]:
+                self._remove(*key)
+            for rowid, iso, lead, container in sorted(rows):
+                self._add(partition, rowid, iso, lead, container)
+        return len(rows)
+
+    def apply(self, partition, writes):
+        """Mirror one partition's committed writes (with that partition's local rowids)."""
+        if self.layout.partitions == 1:
+            return
+        with self._lock:
+            for write in writes:
+                seq = self._remove(partition, write["rowid"])
+                if write["op"] != "delete":
+                    row = write["row"]
+                    self._add(partition, write["rowid"], row.get("isoBarcode"), row.get("leadBarcode"), row.get("containerID"), seq)
+
+    def _iso_partition(self, iso):
+        ref = self._iso.get(iso)
+        return ref[0] if ref else None
+
+    def _lead_partitions(self, lead):
+        partitions = {partition for partition, _rowid in self._leads.get(lead, ())}
+        if not partitions and lead in self._lead_claims:
+            partitions.add(self._lead_claims[lead])
+        return partitions
+
+    def _oldest_lead_row(self, lead):
+        refs = self._leads.get(lead)
+        return min(refs, key=lambda ref: self._rows[ref][3]) if refs else None
+
+    def _container_of(self, iso, lead):
+        """
+        (containerID, partition of the row it was found on) for a container move, resolved
+        as moveContainer itself does: the ISO's row, else the lead's oldest row.
+        """
+        ref = self._iso.get(iso) if iso else None
+        if ref and ref[1] is not None and self._rows[ref][2]:
+            return self._rows[ref][2], ref[0]
+        ref = self._oldest_lead_row(lead) if lead else None
+        if ref:
+            return self._rows[ref][2], ref[0]
+        return None, None
+
+    def route(self, record):
+        """
+        [(partition, record)] to queue. The first entry is the record itself; copies for
+        further partitions are new dicts (a lead scan's copies without the ISO barcode, a
+        container move's copies with the containerID resolved here).
+        """
+        if self.layout.partitions == 1:
+            return [(0, record)]
+        kind = record.get("kind")
+        iso = record.get("isoBarcode") or None
+        lead = record.get("leadBarcode") or None
+        order = record.get("orderNumber") or None
+
+        with self._lock:
+            if kind == "saveEtaQuantiles":
+                # The ETA tables live in the first partition
+                targets = [(0, record)]
+
+            elif kind == "moveContainer":
+                # The job resolves the container again in the partition holding the row it is
+                # found on (it may have changed since); the others are sent the one found here
+                container, home = self._container_of(iso, lead)
+                partitions = set(self._containers.get(container, ())) if container else set()
+                if home is None:
+                    home = self._iso_partition(iso) if iso else None
+                if home is None:
+                    home = min(self._lead_partitions(lead) or {self.layout.partition_of(iso or lead or "")})
+                targets = [(home, record)]
+                targets += [(partition, dict(record, containerID=container)) for partition in sorted(partitions - {home})]
+
+            else:
+                lead_partitions = self._lead_partitions(lead) if kind == "orderTrack" and lead else set()
+                if kind == "receivePrintData" and record.get("containerID") is not None and order is not None:
+                    # The container branch only touches rows of the order
+                    home = self.layout.partition_of(order)
+                elif iso:
+                    home = self._iso_partition(iso)
+                    if home is None:
+                        if order:
+                            home = self.layout.partition_of(order)
+                        else:
+                            ref = self._oldest_lead_row(lead) if lead else None
+                            home = ref[0] if ref else self._lead_claims.get(lead, self.layout.partition_of(iso))
+                        self._iso[iso] = (home, None)
+                elif lead_partitions:
+                    ref = self._oldest_lead_row(lead)
+                    home = ref[0] if ref else min(lead_partitions)
+                else:
+                    home = self.layout.partition_of(order or lead or "")
+                if lead and not self._leads.get(lead):
+                    self._lead_claims.setdefault(lead, home)
+                targets = [(home, record)]
+                # A lead scan updates the lead's rows in every partition; the copies carry no
+                # ISO so only the lead branch of the job runs there
+                targets += [(partition, dict(record, isoBarcode=None)) for partition in sorted(lead_partitions - {home})]
+
+            for partition, _target in targets:
+                self.routed[partition] += 1
+            if len(targets) > 1:
+                self.fanned_out += 1
+        return targets
+
+    def stats(self):
+        with self._lock:
+            rows = Counter(partition for partition, _rowid in self._rows)
+            return {
+                "partitions": self.layout.partitions,
+                "rows": [rows[partition] for partition in range(self.layout.partitions)],
+                "routed": [self.routed[partition] for partition in range(self.layout.partitions)],
+                "fannedOut": self.fanned_out,
+                "containers": len(self._containers)
+            }
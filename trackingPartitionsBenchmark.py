@@ -0,0 +1,107 @@
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from threading import Thread
+
+from historyAppend import register_history_functions
+from trackingPartitions import PartitionLayout
+from trackingQueue import TrackingQueue
+
+# === CONFIGURATION ===
+PARTITION_COUNTS = (1, 2, 4, 8)
+BATCH_SIZES = (1, 20, 500)  # scans per transaction: a trickle of station scans up to a full queue batch
+ORDERS = 5000
+ITEMS_PER_ORDER = 3
+SCANS = 6000
+
+# Compares tracking write throughput of the single trackingData.db and its writer thread with
+# the partitioned layout (TRACKING_PARTITIONS in serverb.py): the same scans, hashed by order
+# number into N files each drained by its own writer. Each scan is what orderTrack does for a
+# known ISO - find the row in memory, one UPDATE appending the history line - and every batch
+# is committed (fsync'd) as the tracking worker does. Files go in a temporary directory. Run:
+#   python trackingPartitionsBenchmark.py
+
+
+def build_layout(directory, partitions):
+    layout = PartitionLayout(os.path.join(tempfile.mkdtemp(dir=directory), "trackingData.db"), partitions)
+    history = "2025-10-10T14:56:00 | Printer Station: Oneflow Order Forms Printed | Harry Howford"
+    indexes = []
+    for partition, db_file in enumerate(layout.files):
+        conn = sqlite3.connect(db_file)
+        c = conn.cursor()
+        c.execute("""
+            CREATE TABLE tracking_data (
+                containerID INTEGER, orderNumber TEXT, leadBarcode TEXT, isoBarcode TEXT UNIQUE,
+                history TEXT, itemNum INTEGER, prodType TEXT
+            )
+        """)
+        c.executemany(
+            "INSERT INTO tracking_data (containerID, orderNumber, leadBarcode, isoBarcode, history) VALUES (?, ?, ?, ?, ?)",
+            [(order // 20, str(order), f"L{order}", f"{order}-{item}", history)
+             for order in range(ORDERS) if layout.partition_of(str(order)) == partition
+             for item in range(ITEMS_PER_ORDER)]
+        )
+        conn.commit()
+        c.execute("SELECT isoBarcode, rowid FROM tracking_data")
+        indexes.append(dict(c.fetchall()))
+        conn.close()
+    return layout, indexes
+
+
+def writer(db_file, queue, index, batch_size):
+    conn = sqlite3.connect(db_file)
+    register_history_functions(conn)
+    cursor = conn.cursor()
+    while True:
+        batch = queue.get_batch(batch_size)
+        for scan in batch:
+            if scan is None:
+                conn.close()
+                return
+            iso, line = scan
+            cursor.execute("UPDATE tracking_data SET history = append_history(history, ?, 1) WHERE rowid = ?", (line, index[iso]))
+        conn.commit()
+
+
+def run(directory, partitions, batch_size, scans):
+    layout, indexes = build_layout(directory, partitions)
+    queues = [TrackingQueue(capacity=len(scans) + 1) for _partition in range(partitions)]
+    for order, iso, line in scans:
+        queues[layout.partition_of(order)].put((iso, line), force=True)
+    for queue in queues:
+        queue.put(None, force=True)
+
+    threads = [Thread(target=writer, args=(layout.files[p], queues[p], indexes[p], batch_size)) for p in range(partitions)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return len(scans) / (time.perf_counter() - started)
+
+
+def main():
+    rnd = random.Random(50)
+    scans = []
+    for i in range(SCANS):
+        order = rnd.randrange(ORDERS)
+        scans.append((str(order), f"{order}-{rnd.randrange(ITEMS_PER_ORDER)}", f"2025-10-10T16:{i % 60:02d}:00 | Station {i % 40} | Bench"))
+
+    directory = tempfile.mkdtemp(prefix="trackingPartitions")
+    try:
+        print(f"{os.cpu_count()} CPU(s), {SCANS} scans")
+        print(f"{'batch':>6} {'partitions':>11} {'scans/s':>10} {'vs single':>10}")
+        for batch_size in BATCH_SIZES:
+            single = None
+            for partitions in PARTITION_COUNTS:
+                rate = run(directory, partitions, batch_size, scans)
+                single = single or rate
+                print(f"{batch_size:>6} {partitions:>11} {rate:>10.0f} {rate / single:>9.2f}x")
+    finally:
+        shutil.rmtree(directory)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+import math
+from collections import deque
+from threading import Lock
+
+# Lanes, highest priority first: station scans are committed ahead of bulk print-station ingestion
+INTERACTIVE = "interactive"
+BULK = "bulk"
+LANES = (INTERACTIVE, BULK)
+
+# Hard bound on queued jobs; past the high watermark bulk jobs are refused until the queue
+# has drained to the low watermark, so interactive scans keep the remaining headroom
+DEFAULT_CAPACITY = 10000
+DEFAULT_HIGH_WATERMARK = 8000
+DEFAULT_LOW_WATERMARK = 4000
+
+# Jobs the worker takes per transaction, so a bulk backlog delays a scan by one batch at most
+DEFAULT_BATCH_SIZE = 500
+
+# Bounds on the Retry-After hint given to refused clients (seconds)
+MIN_RETRY_AFTER = 1
+MAX_RETRY_AFTER = 60
+
+
+class TrackingQueue:
+    """
+    Bounded two-lane queue in front of the tracking worker. put() never blocks: it returns
+    False when the job is refused, and the caller answers 503 with retry_after().
+    """
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, high_watermark=DEFAULT_HIGH_WATERMARK, low_watermark=DEFAULT_LOW_WATERMARK):
+        self.capacity = capacity
+        self.high_watermark = high_watermark
+        self.low_watermark = low_watermark
+        self._lock = Lock()
+        self._lanes = {lane: deque() for lane in LANES}
+        self.shedding = False
+        self.accepted = dict.fromkeys(LANES, 0)
+        self.rejected = dict.fromkeys(LANES, 0)
+        self.peak = 0
+        # Jobs per second the worker has been draining, smoothed
+        self.drain_rate = None
+
+    def _size(self):
+        return sum(len(q) for q in self._lanes.values())
+
+    def qsize(self):
+        with self._lock:
+            return self._size()
+
+    def empty(self):
+        return self.qsize() == 0
+
+    def _admits(self, size, lane):
+        if size >= self.high_watermark:
+            self.shedding = True
+        return size < self.capacity and not (self.shedding and lane != INTERACTIVE)
+
+    def admits(self, lane=INTERACTIVE):
+        """Whether put() would currently accept a job for this lane (a cheap check before costlier work)."""
+        with self._lock:
+            if self._admits(self._size(), lane):
+                return True
+            self.rejected[lane] += 1
+            return False
+
+    def put(self, job, lane=INTERACTIVE, force=False):
+        """Queue a job; False if it was refused (queue full, or shedding bulk work). force skips admission."""
+        with self._lock:
+            size = self._size()
+            if not force and not self._admits(size, lane):
+                self.rejected[lane] += 1
+                return False
+            self._lanes[lane].append(job)
+            self.accepted[lane] += 1
+            self.peak = max(self.peak, size + 1)
+            return True
+
+    def requeue(self, jobs, lane_of):
+        """
+        Put jobs taken by get_batch back at the front of their lanes, in their original order
+        (a batch whose commit failed). Never refused: the jobs were already accepted.
+        """
+        with self._lock:
+            for job in reversed(jobs):
+                self._lanes[lane_of(job)].appendleft(job)
+            self.peak = max(self.peak, self._size())
+
+    def get_batch(self, max_jobs=DEFAULT_BATCH_SIZE):
+        """Take up to max_jobs, interactive lane first."""
+        with self._lock:
+            batch = []
+            for lane in LANES:
+                queue = self._lanes[lane]
+                while queue and len(batch) < max_jobs:
+                    batch.append(queue.popleft())
+            if self._size() <= self.low_watermark:
+                self.shedding = False
+            return batch
+
+    def record_drain(self, jobs, seconds):
+        """Note how fast the worker got through a batch, for the Retry-After estimate."""
+        if jobs and seconds > 0:
+            rate = jobs / seconds
+            with self._lock:
+                self.drain_rate = rate if self.drain_rate is None else 0.8 * self.drain_rate + 0.2 * rate
+
+    def retry_after(self):
+        """Seconds a refused client should wait: time to drain back to the low watermark."""
+        with self._lock:
+            excess = self._size() - self.low_watermark
+            rate = self.drain_rate
+        if excess <= 0 or not rate:
+            return MIN_RETRY_AFTER
+        return max(MIN_RETRY_AFTER, min(MAX_RETRY_AFTER, math.ceil(excess / rate)))
+
+    def stats(self):
+        with self._lock:
+            size = self._size()
+            return {
+                "size": size,
+                "lanes": {lane: len(q) for lane, q in self._lanes.items()},
+                "capacity": self.capacity,
+                "highWatermark": self.high_watermark,
+                "lowWatermark": self.low_watermark,
+                "pressure": round(size / self.capacity, 4),
+                "shedding": self.shedding,
+                "peak": self.peak,
+                "accepted": dict(self.accepted),
+                "rejected": dict(self.rejected),
+                "drainRate": round(self.drain_rate, 1) if self.drain_rate else None
+            }
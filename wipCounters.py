@@ -0,0 +1,107 @@
+from collections import Counter, defaultdict
+from threading import Lock
+
+from locationIndex import last_location
+
+
+def init_wip_table(cursor):
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS wip_counts (
+            workstation TEXT NOT NULL,
+            prodType TEXT NOT NULL,
+            count INTEGER NOT NULL,
+            PRIMARY KEY (workstation, prodType)
+        )
+    """)
+
+
+def _key(workstation, prod_type):
+    # NULLs are stored as '' so (workstation, prodType) can be a primary key
+    return workstation or "", prod_type or ""
+
+
+def location_deltas(before, after):
+    """
+    Count changes between two {trackingRowid: (workstation, prodType)} maps - the locations of
+    the touched rows before and after a write. Rows missing from `after` were deleted.
+    """
+    deltas = Counter()
+    for location in before.values():
+        deltas[_key(*location)] -= 1
+    for location in after.values():
+        deltas[_key(*location)] += 1
+    return {key: delta for key, delta in deltas.items() if delta}
+
+
+def persist_deltas(cursor, deltas):
+    """Apply count deltas to wip_counts on the caller's transaction."""
+    if not deltas:
+        return
+    cursor.executemany("""
+        INSERT INTO wip_counts (workstation, prodType, count) VALUES (?, ?, ?)
+        ON CONFLICT (workstation, prodType) DO UPDATE SET count = count + excluded.count
+    """, [(ws, pt, delta) for (ws, pt), delta in deltas.items()])
+    cursor.execute("DELETE FROM wip_counts WHERE count <= 0")
+
+
+def count_from_base_table(cursor):
+    """Recount items per (workstation, prodType) straight from tracking_data histories."""
+    counts = Counter()
+    cursor.execute("SELECT prodType, history FROM tracking_data")
+    for prod_type, history in cursor.fetchall():
+        _timestamp, workstation, _employee = last_location(history)
+        counts[_key(workstation, prod_type)] += 1
+    return counts
+
+
+class WipCounters:
+    """
+    In-memory copy of wip_counts, updated by the tracking worker after each commit and
+    read by /api/wip without touching the database. With partitioned tracking stores each
+    partition's counts are kept apart (so each writer reconciles its own) and summed.
+    """
+
+    def __init__(self):
+        self._counts = Counter()
+        self._partitions = defaultdict(Counter)
+        self._lock = Lock()
+
+    def apply(self, deltas, partition=0):
+        with self._lock:
+            for counts in (self._counts, self._partitions[partition]):
+                for key, delta in deltas.items():
+                    counts[key] += delta
+                    if counts[key] <= 0:
+                        del counts[key]
+
+    def snapshot(self):
+        """{workstation: {"total": n, "byProdType": {prodType: n}}}"""
+        result = {}
+        with self._lock:
+            items = list(self._counts.items())
+        for (workstation, prod_type), count in items:
+            entry = result.setdefault(workstation, {"total": 0, "byProdType": {}})
+            entry["total"] += count
+            entry["byProdType"][prod_type] = count
+        return result
+
+    def reconcile(self, cursor, partition=0):
+        """
+        Rebuild wip_counts from tracking_data and replace the in-memory counts (the
+        partition's share of them) with it. The caller commits. Returns the number of
+        (workstation, prodType) counts that had drifted.
+        """
+        actual = count_from_base_table(cursor)
+        cursor.execute("SELECT workstation, prodType, count FROM wip_counts")
+        stored = Counter({(ws, pt): n for ws, pt, n in cursor.fetchall()})
+        with self._lock:
+            held = self._partitions[partition]
+            drifted = {key for key in set(actual) | set(stored) | set(held)
+                       if actual.get(key, 0) != stored.get(key, 0) or actual.get(key, 0) != held.get(key, 0)}
+            if drifted:
+                cursor.execute("DELETE FROM wip_counts")
+                cursor.executemany("INSERT INTO wip_counts (workstation, prodType, count) VALUES (?, ?, ?)",
+                                   [(ws, pt, n) for (ws, pt), n in actual.items()])
+            self._counts = self._counts - held + actual
+            self._partitions[partition] = actual
+        return len(drifted)